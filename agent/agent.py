@@ -1,32 +1,113 @@
 import json
 import os
-import docker
 import pika as pika
-from pythonping import ping
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from typing import List, Any
+from typing import List, Any, Dict, Tuple
 
-client = docker.from_env()
+import codec
+from correlation import HostLossMonitor
+from docker_api import DockerClient
+from icmp import IcmpProber, ProbeResult
+from inventory import ContainerInventory
+from restarts import RestartExecutor, RestartPolicy, ALLOW, QUARANTINED
+from scheduler import ProbeScheduler
+from stats import LossWindow, RttEstimator
+from status_store import ContainerRecord, StatusStore
+
+# client of the docker daemon of the host. Each thread that uses it gets its own connection.
+client = DockerClient()
 
 # get the name of the host as an environment variable that is set within the docker run command.
 hostname = os.environ["HOSTNAME"]
 
 # initial values for the monitoring configuration
 threshold = 60.0  # tolerated packet loss percentage
-ping_retries = 3  # number of packets sent when trying to reach a monitored container
+ping_retries = 2  # number of packets sent when trying to reach a monitored container
+loss_window = 20  # number of packets over which the packet loss of a container is computed
+min_loss_samples = 6  # packets needed in the window before a container is restarted for packet loss
 monitoring_period = 2  # seconds between each monitoring cycle
-
-# dictionary indexed by container name, with
-# the data associated to each monitored container
-monitored_containers_status = {}
+ping_timeout = 2  # maximum seconds to wait for the replies to the ping packets
+min_ping_timeout = 0.05  # minimum seconds to wait for the replies to the ping packets
+max_restarts = 5  # restarts of a container within the restart window before it is quarantined
+restart_window = 300  # seconds in which the restarts of a container are counted
+restart_backoff = 2  # seconds between the first two restarts of a container, doubled at each restart
+# maximum number of containers probed at the same time during a monitoring cycle
+probe_concurrency = int(os.environ.get("PROBE_CONCURRENCY", 32))
+# maximum number of containers probed per second on the host
+probe_budget = float(os.environ.get("PROBE_BUDGET", 100))
+# maximum number of containers restarted at the same time on the host
+restart_concurrency = int(os.environ.get("RESTART_CONCURRENCY", 4))
+
+# pool of threads that probe the containers. It is kept for the whole life of the agent, so that each
+# worker keeps its connection to the docker daemon open between cycles.
+probe_executor = ThreadPoolExecutor(max_workers=max(1, probe_concurrency))
+
+# prober that pings all the monitored containers at once over a single ICMP socket
+prober = IcmpProber(ping_timeout)
+
+# scheduler that decides when each monitored container is probed
+scheduler = ProbeScheduler(monitoring_period, probe_budget)
+
+# monitor of the host network, used to hold off restarts when the whole host is losing packets. The loss of a
+# container is kept until its next probe, however long the scheduler waits before it.
+host_loss_monitor = HostLossMonitor(max_age=scheduler.max_probe_gap())
+
+# duration, in seconds, of the last monitoring cycle, and time of the last refresh of the inventory
+last_cycle_duration = 0.0
+last_inventory_refresh = 0.0
+
+# store indexed by container name, with the data associated to each monitored container. It is only
+# updated by the monitoring thread, the other threads read its snapshots.
+status_store = StatusStore(lambda: LossWindow(loss_window), lambda: RttEstimator(ping_timeout, min_ping_timeout))
+
+# sequence number of the last status delta sent to the manager, time of the last full checkpoint and
+# seconds between two checkpoints. A resync request from the manager forces a checkpoint at the next tick.
+delta_seq = 0
+last_checkpoint = 0.0
+checkpoint_period = float(os.environ.get("CHECKPOINT_PERIOD", 30))
+resync_requested = threading.Event()
+
+# format of the responses with lists of containers: "fragment" sends the list as a json fragment, with the token
+# in the headers of the message, so that the manager can forward it without decoding it; "json" sends a json
+# object containing the token and the list, for managers that do not support fragments.
+response_format = os.environ.get("RESPONSE_FORMAT", "fragment")
+
+# compression of the messages sent to the manager: the bodies larger than COMPRESSION_THRESHOLD bytes are
+# compressed, once the manager announced in the headers of a request that it can decompress them
+compressor = codec.Compressor(int(os.environ.get("COMPRESSION_THRESHOLD", 8192)))
+compression_accepted = threading.Event()
+
+# version of the agent, seconds between two heartbeats sent to the manager and time of the last one. The
+# manager considers the host down after a few missed heartbeats.
+agent_version = "1.0.0"
+heartbeat_period = 5
+last_heartbeat = 0.0
+
+# version of the configuration last applied, acknowledged to the manager in the heartbeats, and the last versioned
+# configuration received and not yet applied. The monitoring thread applies it between two ticks, so that a
+# monitoring cycle never runs with part of the old parameters and part of the new ones.
+config_version = 0
+# version of the last configuration rejected, with the names of the parameters whose value is not valid
+rejected_config = None
+pending_config = None
+pending_config_lock = threading.Lock()
+
+# executor that restarts the containers in the background, so that the monitoring goes on meanwhile
+restarter = RestartExecutor(client.restart_container, restart_concurrency)
+
+# history of the restarts of each container, used to delay the restarts of flapping containers
+# and to quarantine them
+restart_policy = RestartPolicy(max_restarts, restart_window, restart_backoff)
 
 # list of topics for the general queue
 general_topics = [
     "set_threshold",
     "set_ping_retries",
     "set_monitoring_period",
+    "set_config",
     "all_containers_status",
     "container_list",
     "config"
@@ -38,79 +119,336 @@ general_topics = [
 personal_topics = [
     hostname + "add_container",
     hostname + "remove_container",
-    hostname + "container_status"
+    hostname + "container_status",
+    hostname + "resync",
+    hostname + "set_config"
 ]
 
 # ip address of the host running the rabbitMQ broker
 rabbitMQ_broker_address = '172.16.3.170'
 
 
-def monitor() -> None:
+def monitor(names: List[str] = None) -> Dict[str, bool]:
     """
       Checks the status of the monitored containers on the host and updates the local
       information about each container. If the container has been stopped or is
       experiencing network issues, it is restarted.
+      All the running containers are pinged at once, then the containers are checked concurrently, with
+      at most probe_concurrency checks in flight, and the duration of the whole cycle is saved in
+      last_cycle_duration.
+
+      :param names: the names of the monitored containers to check. If None, all of them are checked.
+      :return: a dictionary that tells, for each checked container, whether it was found healthy
     """
+    global last_cycle_duration, last_inventory_refresh
+
+    start = time.monotonic()
 
-    # We iterate on all the monitored containers
-    for name in monitored_containers_status.keys():
-        # we retrieve the local name from the dictionary
-        local_name = monitored_containers_status[name]["local_name"]
+    if names is None:
+        names = status_store.names()
 
+    # We reconcile the inventory with a single listing of the containers on the host, at most once
+    # per monitoring period. Only the monitored containers that are new or changed state are inspected.
+    if start - last_inventory_refresh >= monitoring_period:
         try:
-            # We try to find the container on the host.
-            container = client.containers.get(local_name)
-        except:
+            inventory.refresh(set(status_store.local_names()))
+            last_inventory_refresh = start
+        except Exception as e:
+            print("Unable to refresh the container inventory: " + str(e))
+
+    # We read the monitored containers from the inventory, which is kept up to date by the docker events,
+    # instead of inspecting them. The containers that are not found on the host are ignored.
+    records = {}
+    for name in names:
+        status = status_store.get(name)
+        if status is None:
             continue
-        if container is None:
-            # If the container is not found on the host, we just ignore its name
+        record = inventory.get(status.local_name)
+        if record is not None:
+            records[name] = record
+
+    # We ping all the running containers at once: the whole host is probed in about one ping timeout.
+    # The gateways of their networks are pinged too, as a baseline of the host network. Each container
+    # is given a timeout that follows its usual round trip time, so most probes end within milliseconds.
+    running = {name: record for name, record in records.items() if record["running"]}
+    gateways = {record["gateway"] for record in running.values() if record["gateway"]}
+    timeouts = {record["ip"]: status_store.get(name).rtt_estimator.timeout for name, record in running.items()}
+    results = prober.probe([record["ip"] for record in running.values()] + list(gateways), ping_retries, timeouts)
+
+    # We add the outcome of the probe to the loss window and to the round trip time estimate of each
+    # container. They are reset when the container was restarted since the previous probe, since their
+    # samples belong to the old instance.
+    losses = {}
+    for name, record in running.items():
+        status = status_store.get(name)
+        result = results.get(record["ip"])
+        if result is None:
             continue
+        if status.started_at != record["started_at"]:
+            status.loss_window.reset()
+            status.rtt_estimator.reset()
+        status.loss_window.add(result.sent, result.received)
+        for rtt in result.rtts:
+            status.rtt_estimator.add(rtt)
+        # the timeout is doubled when some replies did not arrive in time, lost or late
+        if result.received < result.sent or result.late > 0:
+            status.rtt_estimator.backoff()
+        if status.loss_window.samples >= min_loss_samples:
+            losses[name] = status.loss_window.loss
+
+    # We compare the losses of the containers with each other and with the gateways, to know whether the
+    # host network is impaired, before deciding on any restart.
+    host_loss_monitor.update(losses, [results[gateway].packet_loss * 100 for gateway in gateways
+                                      if gateway in results], threshold)
+
+    # Each container is checked by a worker of the pool. The restarts are handed to the restart executor,
+    # so the checks never wait for a container to stop. The workers only read the records: the new status
+    # of each container is written by this thread, that is the only writer of the store.
+    futures = {name: probe_executor.submit(check_container, status_store.get(name), record,
+                                           results.get(record["ip"]))
+               for name, record in records.items()}
+    healthy = {}
+    for name, future in futures.items():
+        try:
+            healthy[name], fields = future.result()
+            status_store.update(name, fields)
+        except Exception as e:
+            print("Probe failed: " + str(e))
+            healthy[name] = False
+
+    last_cycle_duration = time.monotonic() - start
+    print("Monitoring cycle on " + str(len(names)) + " containers took " +
+          str(round(last_cycle_duration, 3)) + " s.")
+    if last_cycle_duration > monitoring_period:
+        print("Monitoring cycle is longer than the monitoring period (" + str(monitoring_period) + " s)!")
+    return healthy
 
-        # We reload the attributes of the container, since they might be cached.
-        container.reload()
-
-        # We retrieve various information about the container. Its IP address, its execution state
-        # (if it is running or not), the start time and the times it was restarted, and the name of
-        # the docker image of the container.
-        p_address = container.attrs['NetworkSettings']['IPAddress']
-        running = container.attrs.get("State").get("Running")
-        print("Name: " + local_name + "; Running: " + str(running) + ".")
-        # status information
-        monitored_containers_status[name]["running"] = running
-        monitored_containers_status[name]["started_at"] = container.attrs.get("State").get("StartedAt")
-        monitored_containers_status[name]["restart_count"] = container.attrs.get("RestartCount")
-        monitored_containers_status[name]["image"] = container.attrs.get("Config").get("Image")
-        monitored_containers_status[name]["ip"] = p_address
-
-        if running:
-            # If the container is running, we try to ping it to see whether
-            # it replies or not, and with which packet loss percentage. For the ping
-            # operation, we exploited the pythonping module.
-            pres = ping(p_address, verbose=False, count=ping_retries)
-            ploss = pres.packet_loss
-            monitored_containers_status[name]["packet_loss"] = ploss * 100
-
-            # if the ping did not succeed we restart the container
-            if not pres.success():
-                print("Ping failed!")
-                print("Restarting container.")
-                container.restart()
-
-            # if the packet loss percentage is higher than a set threshold, we restart the container
-            elif ploss * 100 > threshold:
-                print("Packet Loss: " + str(ploss * 100) + " %")
-                print("Restarting container.")
-                container.restart()
-
-            # if everything is alright, we just print some diagnostic messages.
-            else:
-                print("Healthy container!")
-                print("Packet Loss: " + str(ploss * 100) + " %")
 
+def run_scheduled_probes(names: List[str]) -> None:
+    """
+      Called by the scheduler at every tick. Applies the containers added or removed since the last tick,
+      checks the containers whose probe is due and schedules their next probe according to the outcome,
+      then publishes the new status of the containers and sends the changes to the manager, together with
+      the heartbeat of the agent when it is due.
+      The containers that are not found on the host are scheduled as healthy ones.
+
+      :param names: the names of the containers to check
+    """
+    apply_pending_config()
+    status_store.apply_pending()
+    healthy = {}
+    try:
+        if len(names) > 0:
+            healthy = monitor(names)
+    finally:
+        for name in names:
+            scheduler.reschedule(name, healthy.get(name, True))
+        # The volatile fields of the status, such as the round trip times, are only sent in the checkpoints.
+        full = checkpoint_due()
+        changed, removed = status_store.publish(refresh=full)
+        send_status_delta(changed, removed, full)
+        send_heartbeat()
+
+
+def send_heartbeat() -> None:
+    """
+      Sends the heartbeat of the agent to the manager, if heartbeat_period seconds passed since the last one.
+      It is sent by the monitoring thread, so the host is considered down if the monitoring is stuck.
+    """
+    global last_heartbeat
+
+    now = time.monotonic()
+    if now - last_heartbeat < heartbeat_period:
+        return
+    last_heartbeat = now
+    heartbeat = {"name": hostname, "version": agent_version, "containers": len(status_store.names()),
+                 "load": os.getloadavg()[0], "config-version": config_version, "config": current_config(),
+                 "rejected-config": rejected_config, "metrics": current_metrics(),
+                 "accept-encoding": codec.CONTENT_ENCODING_DEFLATE}
+    try:
+        send_message(rabbitMQ_broker_address, "heartbeat", heartbeat)
+    except Exception as e:
+        print("Unable to send the heartbeat: " + str(e))
+
+
+def checkpoint_due() -> bool:
+    """
+      Returns whether the next status delta must be a full checkpoint: the first one, every checkpoint_period
+      seconds and when the manager requests a resync.
+    """
+    return delta_seq == 0 or resync_requested.is_set() or time.monotonic() - last_checkpoint >= checkpoint_period
+
+
+def send_status_delta(changed: List[str], removed: List[str], full: bool) -> None:
+    """
+      Sends to the manager the status of the containers that changed since the last delta and the names of
+      the removed ones, with a sequence number that lets the manager detect the lost deltas, and the packet
+      loss threshold against which the manager reports the changes of the containers. Periodically,
+      or when the manager requests a resync, the status of all the containers is sent instead, as a full
+      checkpoint that replaces what the manager knows about the host.
+
+      :param changed: the names of the containers whose status changed
+      :param removed: the names of the containers no longer monitored
+      :param full: whether to send a full checkpoint, as returned by checkpoint_due
+    """
+    global delta_seq, last_checkpoint
+
+    if not full and len(changed) == 0 and len(removed) == 0:
+        return
+
+    # The status of the containers is taken from the last published snapshot, already encoded in json.
+    if full:
+        resync_requested.clear()
+        last_checkpoint = time.monotonic()
+        containers = status_store.encoded_snapshot()
+        removed = []
+    else:
+        containers = b"{" + b", ".join(json.dumps(name).encode() + b": " + status_store.encoded(name)
+                                       for name in changed) + b"}"
+    delta_seq += 1
+    message = b'{"host": ' + json.dumps(hostname).encode() + b', "seq": ' + str(delta_seq).encode() + \
+              b', "full": ' + (b"true" if full else b"false") + b', "containers": ' + containers + \
+              b', "removed": ' + json.dumps(removed).encode() + \
+              b', "threshold": ' + json.dumps(threshold).encode() + b'}'
+    try:
+        send_raw_message(rabbitMQ_broker_address, "status_delta", message)
+    except Exception as e:
+        # the manager will detect the gap in the sequence numbers and request a resync
+        print("Unable to send the status delta " + str(delta_seq) + ": " + str(e))
+
+
+def check_container(status: ContainerRecord, record: dict, result: ProbeResult) -> Tuple[bool, dict]:
+    """
+      Checks the state of a single monitored container and the result of its ping, and decides whether
+      it must be restarted. The new information about the container is returned, to be saved in the store.
+
+      :param status: the record of the container in the status store
+      :param record: the information about the container found in the inventory
+      :param result: the result of the ping of the container, None if it was not pinged
+      :return: True if the container is healthy, False if it is suspect or it was restarted, and the
+               new values of the status fields of the container
+    """
+    local_name = status.local_name
+
+    # We retrieve various information about the container. Its IP address, its execution state
+    # (if it is running or not), the start time and the times it was restarted, and the name of
+    # the docker image of the container.
+    running = record["running"]
+    print("Name: " + local_name + "; Running: " + str(running) + ".")
+    # status information
+    fields = {
+        "running": running,
+        "started_at": record["started_at"],
+        "restart_count": record["restart_count"],
+        "image": record["image"],
+        "ip": record["ip"],
+        "quarantined": restart_policy.is_quarantined(local_name)
+    }
+
+    if running:
+        # If the container is running, we check whether it replied to the ping or not, and
+        # with which packet loss percentage. The decision is taken on the loss of the last packets
+        # sent to the container, kept in its loss window, rather than on the last probe alone.
+        window = status.loss_window
+        wloss = window.loss
+        estimator = status.rtt_estimator
+        fields["window_loss"] = wloss
+        fields["loss_ewma"] = window.ewma
+        fields["samples"] = window.samples
+        fields["rtt_avg_ms"] = estimator.average * 1000 if estimator.count > 0 else None
+        fields["rtt_p95_ms"] = estimator.p95 * 1000 if estimator.count > 0 else None
+        fields["probe_timeout_ms"] = estimator.timeout * 1000
+
+        # if the container could not be pinged, for example because the ICMP socket could not be opened,
+        # nothing is known about its loss, so no decision is taken
+        if result is None:
+            print(local_name + ": not pinged.")
+            fields["packet_loss"] = None
+            return True, fields
+
+        ploss = result.packet_loss
+        fields["packet_loss"] = ploss * 100
+        enough_samples = window.samples >= min_loss_samples
+
+        # if the whole host network is impaired, restarting the container would not help, so
+        # we hold off the restart
+        if enough_samples and wloss > threshold and host_loss_monitor.suppress_restart():
+            print(local_name + ": Packet Loss: " + str(wloss) + " %, host network impaired, not restarting.")
+            return False, fields
+
+        # if no packet of the window received a reply we restart the container
+        elif enough_samples and window.lost == window.samples:
+            print(local_name + ": Ping failed!")
+            print("Restarting container.")
+            restart_container(local_name)
+            return False, fields
+
+        # if the packet loss percentage is higher than a set threshold, we restart the container
+        elif enough_samples and wloss > threshold:
+            print(local_name + ": Packet Loss: " + str(wloss) + " %")
+            print("Restarting container.")
+            restart_container(local_name)
+            return False, fields
+
+        # if everything is alright, we just print some diagnostic messages. The container is
+        # suspect if the last probe lost some packets.
         else:
-            # if the container is not running, we try to restart it
-            print(local_name + " is down!")
-            container.restart()
+            print(local_name + ": Healthy container!")
+            print(local_name + ": Packet Loss: " + str(wloss) + " % over " + str(window.samples) + " packets")
+            return ploss == 0, fields
+
+    elif restarter.is_restarting(local_name):
+        # if the container is not running because the agent is restarting it, we just wait
+        print(local_name + " is restarting.")
+        return False, fields
+
+    else:
+        # if the container is not running, we try to restart it
+        print(local_name + " is down!")
+        restart_container(local_name)
+        return False, fields
+
+
+def restart_container(local_name: str) -> None:
+    """
+      Hands the restart of a container to the restart executor, unless the container is already restarting
+      or the restart policy does not allow it: a container that restarted recently is restarted again only
+      after an exponential backoff, and one that restarted too many times is quarantined.
+
+      :param local_name: the name of the container on the host
+    """
+    outcome = restart_policy.check(local_name)
+    if outcome == QUARANTINED:
+        print(local_name + " is quarantined, it will not be restarted.")
+    elif outcome != ALLOW:
+        print(local_name + " restarted recently, the restart is delayed.")
+    elif restarter.submit(local_name):
+        restart_policy.record(local_name)
+    else:
+        print(local_name + " is already restarting.")
+
+
+def on_container_die(local_name: str, event_time: float) -> None:
+    """
+      Handler of the die events received by the inventory. If the container that died is monitored,
+      it is restarted immediately instead of waiting for the next monitoring cycle.
+
+      :param local_name: the name of the container on the host
+      :param event_time: the time of the die event, in seconds since the epoch
+    """
+    if not status_store.is_monitored(hostname + "-" + local_name):
+        return
+
+    # The die events caused by the restarts of the agent must be ignored, otherwise every restart
+    # would trigger another one.
+    if restarter.caused(local_name, event_time):
+        return
+
+    print(local_name + " died, restarting it.")
+    restart_container(local_name)
+
+    # the container was just restarted, so it is probed more often for a while
+    scheduler.reschedule(hostname + "-" + local_name, False)
 
 
 def listen_on_queue(broker: str, topics: List[str], queue: str = '', callback: Any = None) -> None:
@@ -175,39 +513,89 @@ def send_message(broker: str, topic: str, body: Any) -> None:
       :param topic: the topic related to the message
       :param body: the content of the message body
     """
+    # We encode the message in json format (needed since we sometimes need to send complex
+    # objects like dictionaries and lists), then we encode the message in bytes.
+    send_raw_message(broker, topic, json.dumps(body).encode())
+
+
+def send_raw_message(broker: str, topic: str, body: bytes, headers: Dict[str, Any] = None,
+                     content_type: str = None) -> None:
+    """
+      Opens a connection with a rabbitMQ broker to send a message already encoded, then closes
+      the connection.
+
+      :param broker: the ip address of the broker
+      :param topic: the topic related to the message
+      :param body: the encoded message body
+      :param headers: the headers of the message, if any
+      :param content_type: the content type of the body, if it is not json
+    """
     # We open the connection with a rabbitMQ broker.
     connection = pika.BlockingConnection(
         pika.ConnectionParameters(host=broker))
     channel = connection.channel()
     channel.exchange_declare(exchange="topics", exchange_type="topic")
 
-    # We encode the message in json format (needed since we sometimes need to send complex
-    # objects like dictionaries and lists). We then encode the message in bytes and send it with the topic
-    # provided as parameter, closing the connection at the end.
-    message = json.dumps(body).encode()
-    channel.basic_publish(exchange="topics", routing_key=topic, body=message)
+    # We send the message with the topic provided as parameter, closing the connection at the end.
+    content_encoding = None
+    if compression_accepted.is_set():
+        body, content_encoding = compressor.compress(body)
+    properties = None
+    if headers is not None or content_type is not None or content_encoding is not None:
+        properties = pika.BasicProperties(headers=headers, content_type=content_type,
+                                          content_encoding=content_encoding)
+    channel.basic_publish(exchange="topics", routing_key=topic, body=body, properties=properties)
     connection.close()
 
 
+def send_fragment(topic: str, token: str, fragment: bytes, content_type: str = codec.CONTENT_TYPE_JSON) -> None:
+    """
+      Sends a response as a fragment, with the token of the request and the name of the host in the
+      headers of the message.
+
+      :param topic: the topic of the response
+      :param token: the request id, used to link the response with the request
+      :param fragment: the encoding of the content of the response
+      :param content_type: the content type of the encoding, json unless the manager accepts the columns format
+    """
+    send_raw_message(rabbitMQ_broker_address, topic, fragment, {"token": token, "host": hostname, "format": "fragment"},
+                     content_type)
+
+
 def send_configuration(message: str) -> None:
     """
-        Sends a rabbitMQ message with the current monitoring parameters.
+        Sends a rabbitMQ message with the current monitoring parameters and the counters of the agent.
     """
-    result = {"token": message,
-              "config": {"name": hostname, "threshold": threshold, "ping-retries": ping_retries,
-                         "monitoring-period": monitoring_period}}
+    config = {"name": hostname, "config-version": config_version, "rejected-config": rejected_config}
+    config.update(current_config())
+    config.update(current_metrics())
+    result = {"token": message, "config": config}
     send_message(rabbitMQ_broker_address, "config_response", result)
 
 
+def decode_request(properties, body) -> Tuple[Any, Dict[str, Any]]:
+    """
+      Decompresses a request received from the manager and parses it from json format. Returns the content
+      of the request and its headers. If the headers tell that the manager can decompress the messages,
+      the next messages sent to it are compressed.
+    """
+    headers = properties.headers if properties is not None and properties.headers is not None else {}
+    if codec.accepts_deflate(headers.get("accept-encoding")):
+        compression_accepted.set()
+    if body is None:
+        return None, headers
+    content_encoding = properties.content_encoding if properties is not None else None
+    return json.loads(compressor.decompress(body, content_encoding).decode()), headers
+
+
 def general_broker_callback(channel, method, properties, body) -> None:
     """
       Callback method for all requests received on the general queue.
     """
-    # We decode the message and parse it from json format.
-    if body is None:
-        message = None
-    else:
-        message = json.loads(body.decode())
+    message, headers = decode_request(properties, body)
+
+    # The manager lists in the headers of its requests the content types it can decode in the responses.
+    accept = headers.get("accept")
 
     # We check the topic of the message, on which the actions to be done depend.
     topic = method.routing_key
@@ -218,10 +606,12 @@ def general_broker_callback(channel, method, properties, body) -> None:
         set_ping_retries(message)
     elif topic == "set_monitoring_period":
         set_monitoring_period(message)
+    elif topic == "set_config":
+        receive_config(message)
     elif topic == "all_containers_status":
-        send_all_monitored_containers_status(message)
+        send_all_monitored_containers_status(message, accept)
     elif topic == "container_list":
-        send_all_containers(message)
+        send_all_containers(message, accept)
     elif topic == "config":
         send_configuration(message)
 
@@ -230,25 +620,32 @@ def personal_broker_callback(channel, method, properties, body):
     """
           Callback method for all requests received on the general queue.
         """
-    # We decode the message and parse it from json format.
-    if body is None:
-        message = None
-    else:
-        message = json.loads(body.decode())
+    message, _ = decode_request(properties, body)
 
     # We check the topic of the message, on which the actions to be done depend.
     topic = method.routing_key
     print("Personal callback: Received command on topic " + topic + ", body: " + str(message))
+    # The containers to add or remove can be a single name or a list of names.
     if topic == hostname + "add_container":
-        add_container(message)
+        for container_name in message if isinstance(message, list) else [message]:
+            add_container(container_name)
     elif topic == hostname + "remove_container":
-        remove_container(message)
+        for container_name in message if isinstance(message, list) else [message]:
+            remove_container(container_name)
     elif topic == hostname + "container_status":
         if "token" in message:
             uuid = message["token"]
             if "container" in message:
                 container_name = message["container"]
                 send_monitored_container_status(uuid, container_name)
+            elif "containers" in message:
+                send_monitored_containers_status(uuid, message["containers"])
+    elif topic == hostname + "resync":
+        # the manager lost some of our status deltas: the next one will be a full checkpoint
+        resync_requested.set()
+    elif topic == hostname + "set_config":
+        # the manager sends the current configuration again, since our heartbeats show an older version
+        receive_config(message)
 
 
 def send_monitored_container_status(token: str, container_name: str) -> None:
@@ -266,29 +663,61 @@ def send_monitored_container_status(token: str, container_name: str) -> None:
     # If the container is found between the list of monitored containers, its status is inserted in the
     # container field of the dictionary sent as message. Otherwise, the container field is set to None.
     # The received token is sent as part of the message, so that the manager knows the request to which this
-    # message is replying.
-    if container_name in monitored_containers_status:
-        message = {"token": token, "container": monitored_containers_status[container_name]}
-    else:
-        message = {"container": None, "token": token}
-    send_message(rabbitMQ_broker_address, 'status_response', message)
+    # message is replying. The status is taken from the last published snapshot, already encoded in json,
+    # so it is not encoded again for each request.
+    encoded = status_store.encoded(container_name)
+    if encoded is None:
+        encoded = b"null"
+    if response_format == "fragment":
+        send_fragment('status_response', token, encoded)
+        return
+    message = b'{"token": ' + json.dumps(token).encode() + b', "container": ' + encoded + b'}'
+    send_raw_message(rabbitMQ_broker_address, 'status_response', message)
+
+
+def send_monitored_containers_status(token: str, container_names: List[str]) -> None:
+    """
+        Sends a rabbitMQ message with the status of a list of containers, as a json fragment with the
+        status of each container indexed by name, null for the containers that are not monitored.
+
+        :param token: the request id, used to link the response with the request
+        :param container_names: the names of the requested containers
+    """
+    # The status of each container is taken from the last published snapshot, already encoded in json.
+    # The response is always a fragment, since the managers that request a list of containers support them.
+    items = []
+    for container_name in container_names:
+        name = hostname + "-" + container_name
+        encoded = status_store.encoded(name)
+        items.append(json.dumps(name).encode() + b": " + (encoded if encoded is not None else b"null"))
+    send_fragment("status_response", token, b"{" + b", ".join(items) + b"}")
 
 
-def send_all_monitored_containers_status(token: str) -> None:
+def send_all_monitored_containers_status(token: str, accept: str = None) -> None:
     """
         Sends a rabbitMQ message with the status of all the monitored containers.
 
         :param token: the request id, used to link the response with the request
+        :param accept: the content types accepted by the manager, from the headers of the request
     """
-    result = {"token": token, "containers": monitored_containers_status}
-    send_message(rabbitMQ_broker_address, "status_response", result)
+    # The status of the containers is taken from the last published snapshot, already encoded.
+    if response_format == "fragment":
+        if codec.accepts_columns(accept):
+            send_fragment("status_response", token, status_store.encoded_columns(), codec.CONTENT_TYPE_COLUMNS)
+        else:
+            send_fragment("status_response", token, status_store.encoded_list())
+        return
+    result = b'{"token": ' + json.dumps(token).encode() + b', "host": ' + json.dumps(hostname).encode() + \
+             b', "containers": ' + status_store.encoded_snapshot() + b'}'
+    send_raw_message(rabbitMQ_broker_address, "status_response", result)
 
 
-def send_all_containers(token: str) -> None:
+def send_all_containers(token: str, accept: str = None) -> None:
     """
         Sends a rabbitMQ message with the list of all active containers on the host.
 
         :param token: the request id, used to link the response with the request
+        :param accept: the content types accepted by the manager, from the headers of the request
     """
     names = []
 
@@ -296,15 +725,20 @@ def send_all_containers(token: str) -> None:
     # message is replying.
     result = {"token": token}
 
-    # We retrieve the list of active containers on the host and append the names to a local list.
-    # The names are edited to contain the name of the host, so that a container name is unique in the
-    # cluster.
-    container_list = client.containers.list()
-    for c in container_list:
-        names.append(hostname + c.attrs.get("Name").replace("/", "-"))
+    # We retrieve the list of active containers on the host from the inventory and append the names to a
+    # local list. The names are edited to contain the name of the host, so that a container name is unique
+    # in the cluster.
+    for local_name in inventory.running_names():
+        names.append(hostname + "-" + local_name)
     result["containers"] = names
 
     # We send the message with the list
+    if response_format == "fragment":
+        if codec.accepts_columns(accept):
+            send_fragment("containers_list_response", token, codec.encode_strings(names), codec.CONTENT_TYPE_COLUMNS)
+        else:
+            send_fragment("containers_list_response", token, json.dumps(names).encode())
+        return
     send_message(rabbitMQ_broker_address, "containers_list_response", result)
 
 
@@ -316,11 +750,11 @@ def add_container(container_name: str) -> None:
     """
 
     # We compute the full name of the container, that includes the name of the host,
-    # so that a container name is unique in the cluster. Then we add the key in the
-    # monitored_containers_status dictionary, so it will be considered in the next monitoring cycle.
+    # so that a container name is unique in the cluster. Then we add it to the status store, so it will be
+    # considered in the next monitoring cycle.
     composite_name = hostname + "-" + container_name
-    if composite_name not in monitored_containers_status:
-        monitored_containers_status[composite_name] = {"local_name": container_name}
+    if status_store.add(composite_name, container_name):
+        scheduler.add(composite_name)
 
 
 def remove_container(container_name) -> None:
@@ -331,11 +765,13 @@ def remove_container(container_name) -> None:
     """
 
     # We compute the full name of the container, that includes the name of the host,
-    # so that a container name is unique in the cluster. Then we remove the key from the
-    # monitored_containers_status dictionary, so it will not be considered in the next monitoring cycles.
+    # so that a container name is unique in the cluster. Then we remove it from the status store, so it
+    # will not be considered in the next monitoring cycles.
     composite_name = hostname + "-" + container_name
-    if composite_name in monitored_containers_status:
-        del monitored_containers_status[composite_name]
+    status_store.remove(composite_name)
+    scheduler.remove(composite_name)
+    restart_policy.forget(container_name)
+    host_loss_monitor.forget(composite_name)
 
 
 def set_threshold(new_threshold: float) -> None:
@@ -369,21 +805,149 @@ def set_monitoring_period(period: int) -> None:
     global monitoring_period
     if int(period) >= 0:
         monitoring_period = int(period)
+        scheduler.set_period(monitoring_period)
+        host_loss_monitor.max_age = scheduler.max_probe_gap()
+
+
+def set_max_restarts(new_max_restarts: int) -> None:
+    """
+        Sets a new value for the number of restarts of a container within the restart window before it is
+        quarantined.
+
+        :param new_max_restarts: The new value for the max_restarts configuration parameter. Must be higher than 0.
+    """
+    global max_restarts
+    if int(new_max_restarts) > 0:
+        max_restarts = int(new_max_restarts)
+        restart_policy.configure(max_restarts=max_restarts)
+
+
+def set_restart_window(window: int) -> None:
+    """
+        Sets a new value for the length of the window in which the restarts of a container are counted.
+
+        :param window: The new length of the restart window, in seconds. Must be higher than 0.
+    """
+    global restart_window
+    if int(window) > 0:
+        restart_window = int(window)
+        restart_policy.configure(window=restart_window)
 
 
+def set_restart_backoff(backoff: float) -> None:
+    """
+        Sets a new value for the delay between the first two restarts of a container.
+
+        :param backoff: The new delay, in seconds, doubled at each following restart. Must be at least 0.
+    """
+    global restart_backoff
+    if float(backoff) >= 0:
+        restart_backoff = float(backoff)
+        restart_policy.configure(backoff=restart_backoff)
+
+
+def current_config() -> dict:
+    """
+      Returns the current monitoring parameters, with the names used by the manager.
+    """
+    return {"threshold": threshold, "ping-retries": ping_retries, "monitoring-period": monitoring_period,
+            "max-restarts": max_restarts, "restart-window": restart_window, "restart-backoff": restart_backoff}
+
+
+def current_metrics() -> dict:
+    """
+      Returns the counters of the agent, sent to the manager in the heartbeats.
+    """
+    return {"probe-concurrency": probe_concurrency, "probe-budget": probe_budget,
+            "last-cycle-duration": last_cycle_duration, "scheduler": scheduler.stats(),
+            "restarts": restarter.stats(), "host-network": host_loss_monitor.stats(),
+            "compression": compressor.stats()}
+
+
+def receive_config(message: dict) -> None:
+    """
+      Keeps a versioned configuration sent by the manager until the monitoring thread applies it. A
+      configuration older than the one applied, or than the one already waiting, is ignored.
+
+      :param message: the configuration, containing its version and the value of each parameter
+    """
+    global pending_config
+    with pending_config_lock:
+        if message["version"] <= config_version:
+            return
+        if pending_config is None or message["version"] > pending_config["version"]:
+            pending_config = message
+
+
+def apply_pending_config() -> None:
+    """
+      Applies the versioned configuration received since the last tick, if any, and makes the next
+      heartbeat acknowledge its version, or report its rejection, right away.
+    """
+    global pending_config, last_heartbeat
+    with pending_config_lock:
+        message = pending_config
+        pending_config = None
+    if message is not None:
+        apply_config(message["version"], message["config"])
+        last_heartbeat = 0.0
+
+
+def apply_config(version: int, config: dict) -> List[str]:
+    """
+      Applies a versioned configuration atomically: if the value of every parameter is valid, all of them are
+      applied and the version is acknowledged, otherwise none is, the agent keeps its current configuration
+      and reports the rejected version in the heartbeats. The parameters unknown to this agent are ignored.
+      Returns the names of the parameters rejected.
+
+      :param version: the version of the configuration
+      :param config: the new value of each parameter
+    """
+    global config_version, rejected_config
+
+    setters = {
+        "threshold": (set_threshold, lambda value: 0 <= float(value) <= 100),
+        "ping-retries": (set_ping_retries, lambda value: int(value) >= 0),
+        "monitoring-period": (set_monitoring_period, lambda value: int(value) >= 0),
+        "max-restarts": (set_max_restarts, lambda value: int(value) > 0),
+        "restart-window": (set_restart_window, lambda value: int(value) > 0),
+        "restart-backoff": (set_restart_backoff, lambda value: float(value) >= 0)
+    }
+    config = {name: value for name, value in config.items() if name in setters}
+    rejected = []
+    for name, value in config.items():
+        try:
+            valid = setters[name][1](value)
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            rejected.append(name)
+    if len(rejected) > 0:
+        rejected_config = {"version": version, "parameters": rejected}
+        print("Rejected configuration version " + str(version) + ", invalid parameters: " + str(rejected))
+        return rejected
+
+    for name, value in config.items():
+        setters[name][0](value)
+    config_version = version
+    rejected_config = None
+    print("Applied configuration version " + str(version))
+    return rejected
+
+
+# host-local view of the containers, kept up to date by the docker events
+inventory = ContainerInventory(client, on_container_die)
+
 if __name__ == '__main__':
+    # We load the containers on the host and start following the docker events.
+    inventory.start()
+
     # At the beginning of the agent script, we start listening on the two queues that the agent requires:
     # the personal queue and the general queue. We need to do this to receive requests.
     listen_on_general_queue()
     listen_on_personal_queue()
 
-    # The agent then enters an infinite loop in which it periodically checks some attributes of the monitored
-    # containers. The monitor function is wrapped in a try catch block to avoid terminating the agent in case
-    # some errors occur.
-    while True:
-        try:
-            monitor()
-            time.sleep(monitoring_period)
-        except Exception as e:
-            time.sleep(monitoring_period)
-            continue
+    # The agent then runs the scheduler, which periodically checks some attributes of the monitored
+    # containers whose probe is due. Errors raised by a check are caught by the scheduler, to avoid
+    # terminating the agent in case some errors occur.
+    scheduler.run(run_scheduled_probes)
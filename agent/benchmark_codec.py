@@ -0,0 +1,68 @@
+"""
+  Compares the columns codec with json on the status of 1000 and 10000 containers: time to encode and decode
+  the status of all the containers of a host, and bytes sent on the wire. Run it with: python benchmark_codec.py
+"""
+import json
+import random
+import timeit
+
+import codec
+from status_store import STATUS_FIELDS
+
+
+def make_status(count: int) -> list:
+    """
+      Returns the status of count containers, with values like the ones sent by the agent.
+
+      :param count: the number of containers
+    """
+    random.seed(count)
+    statuses = []
+    for i in range(count):
+        loss = random.choice([0.0, 0.0, 0.0, 5.0, 100.0])
+        statuses.append({
+            "local_name": "container-" + str(i),
+            "running": loss < 100,
+            "started_at": "2020-01-01T00:00:00.000000000Z",
+            "restart_count": random.randint(0, 3),
+            "image": "nginx:latest",
+            "ip": "172.17." + str(i // 256 % 256) + "." + str(i % 256),
+            "quarantined": False,
+            "packet_loss": loss,
+            "window_loss": loss,
+            "loss_ewma": round(loss * 0.3, 2),
+            "samples": 20,
+            "rtt_avg_ms": round(random.uniform(0.05, 2), 3),
+            "rtt_p95_ms": round(random.uniform(0.1, 5), 3),
+            "probe_timeout_ms": 50.0
+        })
+    assert set(statuses[0].keys()) == set(STATUS_FIELDS)
+    return statuses
+
+
+def measure(function, repeat: int = 5) -> float:
+    """
+      Returns the best time, in milliseconds, of a call to function.
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def main() -> None:
+    print("{:>6} {:>8} {:>10} {:>11} {:>11}".format("count", "codec", "bytes", "encode ms", "decode ms"))
+    for count in [1000, 10000]:
+        statuses = make_status(count)
+        json_body = json.dumps(statuses).encode()
+        columns_body = codec.encode_records(statuses)
+        assert codec.decode(columns_body, codec.CONTENT_TYPE_COLUMNS) == statuses
+        results = [
+            ("json", json_body, lambda: json.dumps(statuses).encode(), lambda: json.loads(json_body.decode())),
+            ("columns", columns_body, lambda: codec.encode_records(statuses),
+             lambda: codec.decode(columns_body, codec.CONTENT_TYPE_COLUMNS))
+        ]
+        for name, body, encode, decode in results:
+            print("{:>6} {:>8} {:>10} {:>11.2f} {:>11.2f}".format(count, name, len(body), measure(encode),
+                                                                   measure(decode)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+# Wire codec shared by the agents and the manager. The agent and the manager are built from separate
+# directories, so this module is copied in both: agent/codec.py and
+# python-flask-server/swagger_server/controllers/codec.py must stay identical, which test_codec checks.
+import array
+import json
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# content types of the messages exchanged by the agents and the manager. The json one is understood by every
+# version, the columns one only by the versions that list it in the accept header of their requests.
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_COLUMNS = "application/x-healthmonitoring-columns; version=1"
+ACCEPT = CONTENT_TYPE_COLUMNS + ", " + CONTENT_TYPE_JSON
+
+# The columns payload starts with a magic number, the version of the format and the kind of content:
+# a list of records, that is, of dictionaries, or a list of strings.
+MAGIC = b"HMC"
+VERSION = 1
+RECORDS = b"R"
+STRINGS = b"S"
+
+# kinds of column, each one stored as a bitmap of the null values followed by the other values
+BOOLEANS = b"b"
+INTEGERS = b"q"
+FLOATS = b"d"
+TEXTS = b"s"
+LABELS = b"e"  # strings with few distinct values, stored once and referenced by index
+VALUES = b"j"  # values of mixed types, each one encoded in json
+
+# content encoding of the compressed messages, understood by the versions that list it in the accept-encoding
+# header of their requests or of their heartbeats
+CONTENT_ENCODING_DEFLATE = "deflate"
+
+HEADER = struct.Struct("<3sBcI")
+FIELD_COUNT = struct.Struct("<H")
+LENGTH = struct.Struct("<I")
+
+
+def accepts_columns(accept: Optional[str]) -> bool:
+    """
+      Tells whether the sender of a request, according to its accept header, can decode a response in the
+      columns format.
+
+      :param accept: the content types accepted by the sender, separated by commas, or None
+    """
+    if accept is None:
+        return False
+    return CONTENT_TYPE_COLUMNS in [content_type.strip() for content_type in accept.split(",")]
+
+
+def accepts_deflate(accept_encoding: Optional[str]) -> bool:
+    """
+      Tells whether the sender of a message, according to its accept-encoding header, can decompress
+      a message compressed with deflate.
+
+      :param accept_encoding: the content encodings accepted by the sender, separated by commas, or None
+    """
+    if accept_encoding is None:
+        return False
+    return CONTENT_ENCODING_DEFLATE in [encoding.strip() for encoding in accept_encoding.split(",")]
+
+
+class Compressor:
+    """
+      Compresses the bodies of the messages larger than a threshold, and decompresses the bodies of the
+      messages received. It counts the bytes before and after the compression and the cpu time spent, so
+      that the threshold can be tuned against the bandwidth of the broker.
+    """
+
+    def __init__(self, threshold: int, level: int = 6) -> None:
+        """
+          :param threshold: the size, in bytes, from which a body is compressed. 0 disables the compression
+          :param level: the zlib compression level, from 1 (fastest) to 9 (smallest)
+        """
+        self.threshold = threshold
+        self.level = level
+        self.lock = threading.Lock()
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_time = 0.0
+        self.decompressed = 0
+        self.decompress_time = 0.0
+
+    def compress(self, body: bytes) -> Tuple[bytes, Optional[str]]:
+        """
+          Compresses a body if it is larger than the threshold. Returns the body and its content encoding,
+          None if it was left as it is. A body that the compression would not make smaller is left as it is.
+
+          :param body: the body of the message
+        """
+        if self.threshold <= 0 or len(body) < self.threshold:
+            return body, None
+        start = time.thread_time()
+        compressed = zlib.compress(body, self.level)
+        elapsed = time.thread_time() - start
+        with self.lock:
+            self.compress_time += elapsed
+            if len(compressed) >= len(body):
+                self.skipped += 1
+                return body, None
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return compressed, CONTENT_ENCODING_DEFLATE
+
+    def decompress(self, body: bytes, content_encoding: Optional[str]) -> bytes:
+        """
+          Decompresses a body according to its content encoding. A body without content encoding is returned
+          as it is.
+
+          :param body: the body of the message
+          :param content_encoding: the content encoding of the body, or None
+        """
+        if content_encoding is None or content_encoding == "identity":
+            return body
+        if content_encoding != CONTENT_ENCODING_DEFLATE:
+            raise ValueError("Unsupported content encoding " + content_encoding)
+        start = time.thread_time()
+        decompressed = zlib.decompress(body)
+        elapsed = time.thread_time() - start
+        with self.lock:
+            self.decompressed += 1
+            self.decompress_time += elapsed
+        return decompressed
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"threshold": self.threshold,
+                    "compressed-messages": self.compressed,
+                    "incompressible-messages": self.skipped,
+                    "bytes-before-compression": self.bytes_in,
+                    "bytes-after-compression": self.bytes_out,
+                    "compression-ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out > 0 else None,
+                    "compression-cpu-seconds": round(self.compress_time, 6),
+                    "decompressed-messages": self.decompressed,
+                    "decompression-cpu-seconds": round(self.decompress_time, 6)}
+
+
+def encode(value: Any) -> Tuple[bytes, str]:
+    """
+      Encodes a list of records or a list of strings in the columns format, and any other value in json.
+      Returns the encoded value and its content type.
+
+      :param value: the value to encode
+    """
+    if isinstance(value, list) and len(value) > 0:
+        if all(isinstance(item, dict) for item in value):
+            return encode_records(value), CONTENT_TYPE_COLUMNS
+        if all(isinstance(item, str) for item in value):
+            return encode_strings(value), CONTENT_TYPE_COLUMNS
+    return json.dumps(value).encode(), CONTENT_TYPE_JSON
+
+
+def decode(body: bytes, content_type: Optional[str]) -> Any:
+    """
+      Decodes a message according to its content type. A message without content type is in json.
+
+      :param body: the body of the message
+      :param content_type: the content type of the message, or None
+    """
+    if content_type is None or content_type == CONTENT_TYPE_JSON:
+        return json.loads(body.decode())
+    if content_type != CONTENT_TYPE_COLUMNS:
+        raise ValueError("Unsupported content type " + content_type)
+    magic, version, kind, count = HEADER.unpack_from(body, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unsupported columns payload, version " + str(version))
+    if kind == STRINGS:
+        values, _ = unpack_column(body, HEADER.size, count)
+        return values
+    return decode_records(body, count)
+
+
+def encode_records(records: List[Dict[str, Any]]) -> bytes:
+    """
+      Encodes a list of records in the columns format: the names of the fields are written once, then the
+      values of each field for all the records, packed according to their type.
+
+      :param records: the records to encode, with values that are None, booleans, numbers or strings
+    """
+    fields = list(dict.fromkeys(field for record in records for field in record))
+    parts = [HEADER.pack(MAGIC, VERSION, RECORDS, len(records)), FIELD_COUNT.pack(len(fields))]
+    for field in fields:
+        name = field.encode()
+        parts.append(FIELD_COUNT.pack(len(name)))
+        parts.append(name)
+    for field in fields:
+        parts.append(pack_column([record.get(field) for record in records]))
+    return b"".join(parts)
+
+
+def decode_records(body: bytes, count: int) -> List[Dict[str, Any]]:
+    """
+      Decodes the records of a payload in the columns format. The fields missing from a record when it was
+      encoded are decoded as None.
+
+      :param body: the payload
+      :param count: the number of records, read from the header of the payload
+    """
+    offset = HEADER.size
+    field_count, = FIELD_COUNT.unpack_from(body, offset)
+    offset += FIELD_COUNT.size
+    fields = []
+    for _ in range(field_count):
+        length, = FIELD_COUNT.unpack_from(body, offset)
+        offset += FIELD_COUNT.size
+        fields.append(body[offset:offset + length].decode())
+        offset += length
+    columns = []
+    for _ in fields:
+        column, offset = unpack_column(body, offset, count)
+        columns.append(column)
+    return [dict(zip(fields, row)) for row in zip(*columns)] if len(fields) > 0 else [{} for _ in range(count)]
+
+
+def encode_strings(strings: List[str]) -> bytes:
+    """
+      Encodes a list of strings in the columns format, as a single column.
+
+      :param strings: the strings to encode
+    """
+    return HEADER.pack(MAGIC, VERSION, STRINGS, len(strings)) + pack_column(strings)
+
+
+def pack_column(values: List[Any]) -> bytes:
+    """
+      Packs the values of a column: its kind, the bitmap of the null values, the length of the packed values
+      and the values that are not null. Numbers and booleans have a fixed width, strings are written after
+      the array of their lengths, and labels are written once, followed by the array of their indexes.
+
+      :param values: the values of the column, one for each record
+    """
+    nulls = bytearray((len(values) + 7) // 8)
+    present = []
+    for i, value in enumerate(values):
+        if value is None:
+            nulls[i >> 3] |= 1 << (i & 7)
+        else:
+            present.append(value)
+    kind = column_kind(present)
+    if kind == BOOLEANS:
+        data = bytes(present)
+    elif kind == INTEGERS or kind == FLOATS:
+        data = little_endian(array.array(kind.decode(), present)).tobytes()
+    elif kind == LABELS:
+        labels = {label: index for index, label in enumerate(dict.fromkeys(present))}
+        data = LENGTH.pack(len(labels)) + pack_strings(list(labels)) + \
+            little_endian(array.array("H", [labels[value] for value in present])).tobytes()
+    else:
+        if kind == VALUES:
+            present = [json.dumps(value) for value in present]
+        data = pack_strings(present)
+    return kind + bytes(nulls) + LENGTH.pack(len(data)) + data
+
+
+def unpack_column(body: bytes, offset: int, count: int) -> Tuple[List[Any], int]:
+    """
+      Unpacks a column packed by pack_column. Returns its values and the offset of the next column.
+
+      :param body: the payload containing the column
+      :param offset: the offset of the column in the payload
+      :param count: the number of values in the column
+    """
+    kind = body[offset:offset + 1]
+    offset += 1
+    nulls = body[offset:offset + (count + 7) // 8]
+    offset += len(nulls)
+    length, = LENGTH.unpack_from(body, offset)
+    offset += LENGTH.size
+    data = body[offset:offset + length]
+    offset += length
+    present_count = count - sum(bin(byte).count("1") for byte in nulls)
+
+    if kind == BOOLEANS:
+        present = [byte != 0 for byte in data]
+    elif kind == INTEGERS or kind == FLOATS:
+        numbers = array.array(kind.decode())
+        numbers.frombytes(data)
+        present = little_endian(numbers).tolist()
+    elif kind == LABELS:
+        label_count, = LENGTH.unpack_from(data, 0)
+        labels, position = unpack_strings(data, LENGTH.size, label_count)
+        indexes = array.array("H")
+        indexes.frombytes(data[position:])
+        present = [labels[index] for index in little_endian(indexes)]
+    else:
+        present, _ = unpack_strings(data, 0, present_count)
+        if kind == VALUES:
+            present = [json.loads(value) for value in present]
+
+    if present_count == count:
+        return present, offset
+    values = [None] * count
+    iterator = iter(present)
+    for i in range(count):
+        if not nulls[i >> 3] & (1 << (i & 7)):
+            values[i] = next(iterator)
+    return values, offset
+
+
+def pack_strings(strings: List[str]) -> bytes:
+    """
+      Packs a list of strings: the array of their lengths, then the strings.
+    """
+    encoded = [value.encode() for value in strings]
+    return little_endian(array.array("q", [len(value) for value in encoded])).tobytes() + b"".join(encoded)
+
+
+def unpack_strings(data: bytes, offset: int, count: int) -> Tuple[List[str], int]:
+    """
+      Unpacks count strings packed by pack_strings. Returns the strings and the offset after the last one.
+    """
+    lengths = array.array("q")
+    lengths.frombytes(data[offset:offset + count * lengths.itemsize])
+    position = offset + count * lengths.itemsize
+    strings = []
+    for length in little_endian(lengths):
+        strings.append(data[position:position + length].decode())
+        position += length
+    return strings, position
+
+
+def column_kind(values: List[Any]) -> bytes:
+    """
+      Returns the kind of column that can hold all the values: booleans, 64 bit integers, floats, strings, or
+      json values when the values have mixed types. The strings with at most half as many distinct values as
+      values are stored as labels.
+
+      :param values: the values of the column that are not null
+    """
+    if all(type(value) is bool for value in values):
+        return BOOLEANS
+    if all(type(value) is int and -2 ** 63 <= value < 2 ** 63 for value in values):
+        return INTEGERS
+    if all(type(value) is float or type(value) is int for value in values):
+        return FLOATS
+    if all(type(value) is str for value in values):
+        distinct = len(set(values))
+        return LABELS if distinct * 2 <= len(values) and distinct <= 65536 else TEXTS
+    return VALUES
+
+
+def little_endian(values: array.array) -> array.array:
+    """
+      Converts an array between the byte order of the machine and the little endian order of the payload.
+
+      :param values: the array, converted in place
+    """
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
@@ -0,0 +1,90 @@
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+
+class HostLossMonitor:
+    """
+      Tells a host-wide network impairment apart from the faults of single containers. The host is
+      considered impaired when the loss towards the bridge gateway is over the threshold, or when most of
+      the recently probed containers are over the threshold at the same time. While the host is impaired,
+      restarting the containers would not help, so their restarts are held off.
+    """
+
+    def __init__(self, majority: float = 0.5, min_containers: int = 3, max_age: float = 10) -> None:
+        """
+          :param majority: the fraction of containers over the threshold above which the host is impaired
+          :param min_containers: the minimum number of probed containers needed to judge by majority
+          :param max_age: seconds after which the loss of a container, or of the gateway, is too old to be
+                          considered. It must be longer than the interval between two probes of a container
+        """
+        self.majority = majority
+        self.min_containers = min_containers
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        # latest loss percentage of each container and the time it was measured
+        self.losses = {}  # type: Dict[str, Tuple[float, float]]
+        # latest loss percentage towards the gateways and the time it was measured
+        self.gateway_loss = None
+        self.gateway_measured = None
+        self.impaired = False
+        self.impaired_since = None
+        self.suppressed_restarts = 0
+
+    def update(self, losses: Dict[str, float], gateway_losses: Iterable[float], threshold: float) -> bool:
+        """
+          Records the losses measured in a probe cycle and evaluates the state of the host.
+          Returns True if the host network is impaired.
+
+          :param losses: the loss percentage of each container probed in the cycle
+          :param gateway_losses: the loss percentages towards the gateways of the probed containers
+          :param threshold: the tolerated loss percentage
+        """
+        now = time.monotonic()
+        with self.lock:
+            for name, loss in losses.items():
+                self.losses[name] = (loss, now)
+            for name in [name for name, (_, measured) in self.losses.items() if now - measured > self.max_age]:
+                del self.losses[name]
+
+            gateway_losses = list(gateway_losses)
+            if len(gateway_losses) > 0:
+                self.gateway_loss = max(gateway_losses)
+                self.gateway_measured = now
+            elif self.gateway_measured is not None and now - self.gateway_measured > self.max_age:
+                self.gateway_loss = None
+                self.gateway_measured = None
+            gateway_impaired = self.gateway_loss is not None and self.gateway_loss > threshold
+
+            over = sum(1 for loss, _ in self.losses.values() if loss > threshold)
+            majority_impaired = len(self.losses) >= self.min_containers and \
+                over > self.majority * len(self.losses)
+
+            impaired = gateway_impaired or majority_impaired
+            if impaired and not self.impaired:
+                print("Host network impaired: " + str(over) + " of " + str(len(self.losses)) +
+                      " containers over the threshold, gateway loss " + str(self.gateway_loss) + " %.")
+                self.impaired_since = time.time()
+            elif not impaired and self.impaired:
+                print("Host network recovered.")
+                self.impaired_since = None
+            self.impaired = impaired
+            return impaired
+
+    def forget(self, name: str) -> None:
+        with self.lock:
+            self.losses.pop(name, None)
+
+    def suppress_restart(self) -> bool:
+        """
+          Returns True if a restart caused by packet loss must be held off, counting it.
+        """
+        with self.lock:
+            if self.impaired:
+                self.suppressed_restarts += 1
+            return self.impaired
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"impaired": self.impaired, "impaired-since": self.impaired_since,
+                    "gateway-loss": self.gateway_loss, "suppressed-restarts": self.suppressed_restarts}
@@ -0,0 +1,176 @@
+import http.client
+import json
+import socket
+import threading
+import urllib.parse
+from typing import Any, Iterator, List, Optional
+
+# path of the unix socket on which the docker daemon listens
+docker_socket = "/var/run/docker.sock"
+
+# version of the docker engine API used by the agent
+api_version = "v1.40"
+
+# seconds to wait for a response of the docker daemon. It must be longer than the time
+# needed to stop a container when restarting it.
+request_timeout = 60
+
+# seconds given to a container to stop before it is killed, when restarting it
+stop_timeout = 10
+
+
+class DockerError(Exception):
+    """
+      Raised when the docker daemon replies to a request with an error status.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(str(status) + ": " + message)
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+      HTTP connection over a unix socket instead of a TCP socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerClient:
+    """
+      Minimal client of the docker engine API. Each thread gets its own persistent keep-alive
+      connection to the daemon, so that threads never share a connection and do not pay a new
+      connection for every request.
+    """
+
+    def __init__(self, socket_path: str = docker_socket, timeout: float = request_timeout) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def connection(self) -> UnixHTTPConnection:
+        """
+          Returns the connection of the calling thread, opening it if needed.
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = UnixHTTPConnection(self.socket_path, self.timeout)
+            self.local.connection = connection
+        return connection
+
+    def close(self) -> None:
+        """
+          Closes the connection of the calling thread.
+        """
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def request(self, method: str, path: str, query: dict = None) -> Any:
+        """
+          Sends a request to the docker daemon on the connection of the calling thread and returns
+          the decoded json body of the response, or None if the body is empty.
+          If the daemon closed the idle keep-alive connection, the request is sent again on a new one.
+
+          :param method: the HTTP method
+          :param path: the path of the endpoint, without the API version
+          :param query: the parameters of the query string
+        """
+        url = "/" + api_version + path
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        for attempt in range(2):
+            connection = self.connection()
+            try:
+                connection.request(method, url)
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if attempt == 1:
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+        if response.status >= 400:
+            try:
+                message = json.loads(body.decode()).get("message", "")
+            except ValueError:
+                message = body.decode(errors="replace")
+            raise DockerError(response.status, message)
+        if len(body) == 0:
+            return None
+        return json.loads(body.decode())
+
+    def list_containers(self, all: bool = True) -> List[dict]:
+        """
+          Returns the summary of the containers on the host, as returned by /containers/json.
+
+          :param all: if True also the stopped containers are listed
+        """
+        return self.request("GET", "/containers/json", {"all": 1 if all else 0})
+
+    def inspect_container(self, name: str) -> dict:
+        """
+          Returns all the low-level information about a container.
+
+          :param name: the id or the name of the container
+        """
+        return self.request("GET", "/containers/" + urllib.parse.quote(name) + "/json")
+
+    def restart_container(self, name: str, timeout: int = stop_timeout) -> None:
+        """
+          Restarts a container, waiting at most timeout seconds for it to stop before killing it.
+
+          :param name: the id or the name of the container
+          :param timeout: seconds to wait before killing the container
+        """
+        self.request("POST", "/containers/" + urllib.parse.quote(name) + "/restart", {"t": timeout})
+
+    def events(self, since: int = None, filters: dict = None) -> Iterator[dict]:
+        """
+          Follows the events stream of the docker daemon, yielding each decoded event. The stream uses a
+          dedicated connection without timeout, since it stays idle until something happens on the host.
+
+          :param since: the unix time from which the events are returned
+          :param filters: the filters of the events, as a dictionary of lists
+        """
+        query = {}
+        if since is not None:
+            query["since"] = since
+        if filters:
+            query["filters"] = json.dumps({key: value if isinstance(value, list) else [value]
+                                           for key, value in filters.items()})
+        url = "/" + api_version + "/events"
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        connection = UnixHTTPConnection(self.socket_path)
+        try:
+            connection.request("GET", url)
+            response = connection.getresponse()
+            if response.status >= 400:
+                raise DockerError(response.status, response.read().decode(errors="replace"))
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield json.loads(line.decode())
+        finally:
+            connection.close()
@@ -0,0 +1,226 @@
+import random
+import select
+import socket
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+# payload of the echo requests sent by the agent
+payload = b"HealthMonitoring"
+
+# the sequence number of the echo requests has 16 bits, so at most this number of packets can be
+# matched to their replies in a single exchange
+max_packets_per_exchange = 0xffff
+
+
+class ProbeResult:
+    """
+      Outcome of the echo requests sent to one address: the number of packets sent, the round trip
+      time, in seconds, of each reply received and the number of replies received after the timeout of
+      the address. The late replies are not lost: they only tell that the timeout is too short.
+    """
+
+    def __init__(self, sent: int = 0, rtts: List[float] = None, late: int = 0) -> None:
+        self.sent = sent
+        self.rtts = rtts if rtts is not None else []
+        self.late = late
+
+    @property
+    def received(self) -> int:
+        return len(self.rtts)
+
+    @property
+    def packet_loss(self) -> float:
+        """
+          The fraction of packets that did not receive a reply, between 0 and 1.
+        """
+        if self.sent == 0:
+            return 0.0
+        return (self.sent - self.received) / self.sent
+
+    @property
+    def rtt_avg(self) -> Optional[float]:
+        if len(self.rtts) == 0:
+            return None
+        return sum(self.rtts) / len(self.rtts)
+
+    def success(self) -> bool:
+        """
+          Returns True if at least one packet received a reply.
+        """
+        return self.received > 0
+
+
+def checksum(data: bytes) -> int:
+    """
+      Computes the internet checksum (RFC 1071) of the provided data.
+
+      :param data: the bytes on which the checksum is computed
+    """
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack("!%dH" % (len(data) // 2), data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def build_echo_request(identifier: int, sequence: int, data: bytes = payload) -> bytes:
+    """
+      Builds an ICMP echo request packet.
+
+      :param identifier: the identifier of the request, 16 bits
+      :param sequence: the sequence number of the request, 16 bits
+      :param data: the payload of the request
+    """
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum(header + data), identifier, sequence) + data
+
+
+def parse_echo_reply(packet: bytes, has_ip_header: bool = True) -> Optional[Tuple[int, int]]:
+    """
+      Parses a received ICMP packet and returns the identifier and the sequence number of the echo reply,
+      or None if the packet is not an echo reply.
+
+      :param packet: the received packet
+      :param has_ip_header: True if the packet starts with the IP header, as it happens on raw sockets
+    """
+    if has_ip_header:
+        if len(packet) < 20:
+            return None
+        packet = packet[(packet[0] & 0x0f) * 4:]
+    if len(packet) < 8:
+        return None
+    icmp_type, code, _, identifier, sequence = struct.unpack("!BBHHH", packet[:8])
+    if icmp_type != ICMP_ECHO_REPLY:
+        return None
+    return identifier, sequence
+
+
+def open_socket() -> Tuple[socket.socket, bool]:
+    """
+      Opens the socket used to send the echo requests. A raw socket requires CAP_NET_RAW; without it, an
+      unprivileged ICMP datagram socket is used, if allowed by net.ipv4.ping_group_range.
+      Returns the socket and True if it is a raw socket.
+    """
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+    except PermissionError:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+
+
+class IcmpProber:
+    """
+      Pings many addresses at once over a single ICMP socket. The echo requests to all the addresses are
+      sent in a burst and the replies are matched by identifier and sequence number, so that the whole
+      exchange lasts about one timeout instead of one timeout for each packet.
+      A reply is waited for up to late_factor times the timeout of its address, and never longer than the
+      timeout of the prober: the replies received after the timeout of their address are counted as late.
+      If no ICMP socket can be opened, no address is probed: a probe that could not be sent tells nothing
+      about the loss of the addresses.
+    """
+
+    def __init__(self, timeout: float = 2, late_factor: float = 2) -> None:
+        """
+          :param timeout: seconds to wait for the replies after the last request is sent
+          :param late_factor: the multiple of the timeout of an address after which its replies are lost
+        """
+        self.timeout = timeout
+        self.late_factor = late_factor
+        self.socket_error_logged = False
+
+    def probe(self, addresses: Iterable[str], count: int,
+              timeouts: Dict[str, float] = None) -> Dict[str, ProbeResult]:
+        """
+          Sends count echo requests to each address and returns the result of each address. If the ICMP
+          socket cannot be opened, no result is returned.
+
+          :param addresses: the ip addresses to ping
+          :param count: the number of echo requests sent to each address
+          :param timeouts: the timeout, in seconds, of the echo requests sent to each address. The replies
+                           received after it, but within late_factor times it, are counted as late.
+                           The addresses without a timeout use the timeout of the prober.
+        """
+        if timeouts is None:
+            timeouts = {}
+        addresses = list(dict.fromkeys(address for address in addresses if address))
+        results = {address: ProbeResult() for address in addresses}
+        if len(addresses) == 0 or count <= 0:
+            return results
+
+        try:
+            sock, raw = open_socket()
+        except OSError as e:
+            # The error is the same at every probe, so it is only logged once.
+            if not self.socket_error_logged:
+                self.socket_error_logged = True
+                print("Unable to open an ICMP socket, the containers are not pinged: " + str(e))
+            return {}
+
+        with sock:
+            batch_size = max(1, max_packets_per_exchange // count)
+            for i in range(0, len(addresses), batch_size):
+                self.exchange(sock, raw, addresses[i:i + batch_size], count, timeouts, results)
+        return results
+
+    def exchange(self, sock: socket.socket, raw: bool, addresses: List[str], count: int,
+                 timeouts: Dict[str, float], results: Dict[str, ProbeResult]) -> None:
+        """
+          Sends count echo requests to each address on the socket, then collects the replies until all
+          of them are received or timed out.
+
+          :param sock: the ICMP socket
+          :param raw: True if the socket is a raw socket
+          :param addresses: the addresses to ping, at most max_packets_per_exchange / count
+          :param count: the number of echo requests sent to each address
+          :param timeouts: the timeout of the echo requests sent to each address
+          :param results: the dictionary in which the results are saved
+        """
+        # On datagram sockets the kernel replaces the identifier with its own and only delivers the
+        # replies addressed to the socket, so the identifier is only checked on raw sockets.
+        identifier = random.randrange(0x10000)
+        pending = {}
+        sequence = 0
+        for _ in range(count):
+            for address in addresses:
+                sequence += 1
+                results[address].sent += 1
+                try:
+                    sock.sendto(build_echo_request(identifier, sequence), (address, 0))
+                except OSError:
+                    # the packet is counted as lost
+                    continue
+                sent_at = time.monotonic()
+                timeout = timeouts.get(address, self.timeout)
+                pending[sequence] = (address, sent_at, sent_at + timeout,
+                                     sent_at + max(timeout, min(timeout * self.late_factor, self.timeout)))
+
+        # We wait until every request received its reply or timed out: when the timeouts follow the
+        # usual latency of the addresses, the exchange ends within milliseconds, even if some packets are
+        # lost. A request without reply within the timeout of its address is waited for a little longer,
+        # so that a latency spike is counted as a late reply instead of a lost packet.
+        while len(pending) > 0:
+            now = time.monotonic()
+            for expired in [sequence for sequence, request in pending.items() if request[3] <= now]:
+                del pending[expired]
+            if len(pending) == 0:
+                break
+            remaining = max(request[3] for request in pending.values()) - now
+            ready, _, _ = select.select([sock], [], [], remaining)
+            if len(ready) == 0:
+                break
+            packet, source = sock.recvfrom(4096)
+            received_at = time.monotonic()
+            reply = parse_echo_reply(packet, raw)
+            if reply is None or (raw and reply[0] != identifier):
+                continue
+            request = pending.get(reply[1])
+            if request is None or request[0] != source[0] or received_at > request[3]:
+                continue
+            del pending[reply[1]]
+            results[request[0]].rtts.append(received_at - request[1])
+            if received_at > request[2]:
+                results[request[0]].late += 1
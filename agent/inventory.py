@@ -0,0 +1,198 @@
+import threading
+import time
+from typing import Callable, Collection, Dict, List, Optional
+
+from docker_api import DockerClient, DockerError
+
+# docker events that change the information kept in the inventory
+tracked_actions = ["start", "die", "stop", "rename", "destroy"]
+
+# seconds to wait before reopening the events stream when it breaks
+reconnect_delay = 1
+
+
+class ContainerInventory:
+    """
+      Host-local view of the containers, indexed by their local name (without the leading slash).
+      It is kept up to date from the docker events stream and reconciled with a single listing of the
+      containers at every monitoring cycle, so that readers never have to query the docker daemon.
+    """
+
+    def __init__(self, client: DockerClient, on_die: Callable[[str, float], None] = None) -> None:
+        """
+          :param client: the docker client
+          :param on_die: a function called with the local name of a container and the time of the event
+                         every time a container dies. It is called from the events thread.
+        """
+        self.client = client
+        self.on_die = on_die
+        self.lock = threading.Lock()
+        self.containers = {}  # type: Dict[str, dict]
+        self.names_by_id = {}  # type: Dict[str, str]
+
+    def refresh(self, wanted: Collection[str] = ()) -> None:
+        """
+          Reconciles the inventory with one listing of the containers on the host, both running and stopped.
+          The listing does not contain the start time and the restart count of the containers: they are kept
+          from the previous record while the container keeps the same id and state, and a container is
+          inspected only when it is wanted and such information is missing or outdated.
+
+          :param wanted: the local names of the containers for which the complete information is needed
+        """
+        summaries = self.client.list_containers(all=True)
+        with self.lock:
+            previous = dict(self.containers)
+
+        containers = {}
+        names_by_id = {}
+        for summary in summaries:
+            record = self.make_summary_record(summary)
+            old = previous.get(record["name"])
+            if old is not None and old["id"] == record["id"] and old["running"] == record["running"]:
+                record["started_at"] = old["started_at"]
+                record["restart_count"] = old["restart_count"]
+                record["inspected"] = old["inspected"]
+            if record["name"] in wanted and not record["inspected"]:
+                try:
+                    record = self.make_record(self.client.inspect_container(record["id"]))
+                except DockerError:
+                    pass
+            containers[record["name"]] = record
+            names_by_id[record["id"]] = record["name"]
+        with self.lock:
+            # The records changed by an event while the listing was processed are more recent than the
+            # listing itself, so they are kept.
+            for name, record in self.containers.items():
+                if previous.get(name) is not record:
+                    containers[name] = record
+                    names_by_id[record["id"]] = name
+            self.containers = containers
+            self.names_by_id = names_by_id
+
+    def start(self) -> None:
+        """
+          Loads the inventory and starts following the docker events in a new thread.
+        """
+        self.refresh()
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def watch(self) -> None:
+        """
+          Follows the docker events stream and applies each container event to the inventory. If the stream
+          breaks, the inventory is refreshed before following it again, since events may have been missed.
+        """
+        while True:
+            try:
+                since = int(time.time())
+                for event in self.client.events(since=since, filters={"type": ["container"]}):
+                    self.apply_event(event)
+            except Exception as e:
+                print("Docker events stream interrupted: " + str(e))
+            time.sleep(reconnect_delay)
+            try:
+                self.refresh()
+            except Exception as e:
+                print("Unable to reload the container inventory: " + str(e))
+
+    def apply_event(self, event: dict) -> None:
+        """
+          Updates the inventory according to a docker container event.
+
+          :param event: the decoded event, as returned by the docker events stream
+        """
+        action = event.get("Action", event.get("status"))
+        if action not in tracked_actions:
+            return
+        actor = event.get("Actor", {})
+        container_id = actor.get("ID", event.get("id"))
+        name = actor.get("Attributes", {}).get("name", "").lstrip("/")
+
+        if action in ("start", "rename"):
+            # The container has a new ip address, start time or name: we inspect it once here instead of
+            # doing it at every monitoring cycle.
+            try:
+                attrs = self.client.inspect_container(container_id)
+            except Exception:
+                return
+            record = self.make_record(attrs)
+            with self.lock:
+                old_name = self.names_by_id.get(container_id)
+                if old_name is not None and old_name != record["name"]:
+                    self.containers.pop(old_name, None)
+                self.containers[record["name"]] = record
+                self.names_by_id[container_id] = record["name"]
+
+        elif action in ("die", "stop"):
+            with self.lock:
+                name = self.names_by_id.get(container_id, name)
+                if name in self.containers:
+                    self.containers[name] = dict(self.containers[name], running=False)
+            if action == "die" and self.on_die is not None:
+                self.on_die(name, event.get("time", time.time()))
+
+        elif action == "destroy":
+            with self.lock:
+                name = self.names_by_id.pop(container_id, name)
+                self.containers.pop(name, None)
+
+    def get(self, name: str) -> Optional[dict]:
+        """
+          Returns a copy of the record of a container, or None if the container is not on the host.
+
+          :param name: the local name of the container
+        """
+        with self.lock:
+            record = self.containers.get(name)
+            return dict(record) if record is not None else None
+
+    def running_names(self) -> List[str]:
+        """
+          Returns the local names of the containers that are running on the host.
+        """
+        with self.lock:
+            return [name for name, record in self.containers.items() if record["running"]]
+
+    @staticmethod
+    def make_record(attrs: dict) -> dict:
+        """
+          Extracts from the attributes returned by a docker inspect the information kept in the inventory.
+
+          :param attrs: the attributes of a container
+        """
+        state = attrs.get("State") or {}
+        return {
+            "id": attrs.get("Id"),
+            "name": attrs.get("Name", "").lstrip("/"),
+            "running": state.get("Running"),
+            "started_at": state.get("StartedAt"),
+            "restart_count": attrs.get("RestartCount"),
+            "image": (attrs.get("Config") or {}).get("Image"),
+            "ip": (attrs.get("NetworkSettings") or {}).get("IPAddress"),
+            "gateway": (attrs.get("NetworkSettings") or {}).get("Gateway"),
+            "inspected": True
+        }
+
+    @staticmethod
+    def make_summary_record(summary: dict) -> dict:
+        """
+          Extracts the information kept in the inventory from the summary of a container returned by
+          /containers/json. The start time and the restart count are not part of the summary.
+
+          :param summary: the summary of a container
+        """
+        networks = (summary.get("NetworkSettings") or {}).get("Networks") or {}
+        network = networks.get("bridge") or {}
+        if not network.get("IPAddress"):
+            network = next((network for network in networks.values() if network.get("IPAddress")), {})
+        names = summary.get("Names") or [""]
+        return {
+            "id": summary.get("Id"),
+            "name": names[0].lstrip("/"),
+            "running": summary.get("State") == "running",
+            "started_at": None,
+            "restart_count": None,
+            "image": summary.get("Image"),
+            "ip": network.get("IPAddress", ""),
+            "gateway": network.get("Gateway", ""),
+            "inspected": False
+        }
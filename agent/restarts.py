@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Tuple
+
+# outcomes of RestartPolicy.check
+ALLOW = "allow"
+BACKOFF = "backoff"
+QUARANTINED = "quarantined"
+
+
+class RestartExecutor:
+    """
+      Runs the restarts of the containers in the background, at most max_concurrent at the same time,
+      so that the monitoring never waits for a container to stop. A restart requested for a container
+      that is already restarting is dropped. The duration of each restart is tracked.
+    """
+
+    def __init__(self, restart: Callable[[str], None], max_concurrent: int = 4) -> None:
+        """
+          :param restart: the function that restarts a container, given its local name
+          :param max_concurrent: the maximum number of restarts running at the same time
+        """
+        self.restart = restart
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent))
+        self.lock = threading.Lock()
+        self.restarting = set()
+        # time interval of the last restart of each container, and its duration in seconds
+        self.intervals = {}  # type: Dict[str, Tuple[float, float]]
+        self.durations = {}  # type: Dict[str, float]
+
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def submit(self, name: str) -> bool:
+        """
+          Requests the restart of a container. Returns False if the container is already restarting,
+          in which case the request is dropped.
+
+          :param name: the local name of the container
+        """
+        with self.lock:
+            if name in self.restarting:
+                self.dropped += 1
+                return False
+            self.restarting.add(name)
+        self.executor.submit(self.run, name)
+        return True
+
+    def run(self, name: str) -> None:
+        """
+          Restarts a container and records the time interval of the restart.
+
+          :param name: the local name of the container
+        """
+        start = time.time()
+        failed = False
+        try:
+            self.restart(name)
+        except Exception as e:
+            failed = True
+            print("Unable to restart " + name + ": " + str(e))
+        end = time.time()
+        with self.lock:
+            self.restarting.discard(name)
+            self.intervals[name] = (start, end)
+            self.durations[name] = end - start
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self.total_duration += end - start
+                self.max_duration = max(self.max_duration, end - start)
+        print(name + " restarted in " + str(round(end - start, 3)) + " s.")
+
+    def is_restarting(self, name: str) -> bool:
+        with self.lock:
+            return name in self.restarting
+
+    def caused(self, name: str, event_time: float) -> bool:
+        """
+          Returns True if an event of a container happened while the container was being restarted,
+          that is, if the event was caused by the restart. The time of docker events has a resolution
+          of one second.
+
+          :param name: the local name of the container
+          :param event_time: the time of the event, in seconds since the epoch
+        """
+        with self.lock:
+            if name in self.restarting:
+                return True
+            interval = self.intervals.get(name)
+            return interval is not None and interval[0] - 1 <= event_time <= interval[1] + 1
+
+    def stats(self) -> dict:
+        """
+          Returns the counters of the restarts.
+        """
+        with self.lock:
+            average = self.total_duration / self.completed if self.completed > 0 else 0.0
+            return {"in-flight": len(self.restarting), "completed": self.completed, "failed": self.failed,
+                    "dropped": self.dropped, "average-duration": average, "max-duration": self.max_duration}
+
+
+class RestartPolicy:
+    """
+      Keeps the history of the restarts of each container to detect flapping containers. After each
+      restart the next one is delayed exponentially (backoff, 2 * backoff, 4 * backoff...), and a
+      container restarted max_restarts times within window seconds is quarantined: it is not restarted
+      again until a whole window has passed.
+    """
+
+    def __init__(self, max_restarts: int = 5, window: float = 300, backoff: float = 2) -> None:
+        """
+          :param max_restarts: the maximum number of restarts of a container within the window
+          :param window: the length, in seconds, of the window in which restarts are counted
+          :param backoff: the minimum delay, in seconds, between the first two restarts of a container
+        """
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self.history = {}  # type: Dict[str, Deque[float]]
+        self.quarantined_until = {}  # type: Dict[str, float]
+
+    def configure(self, max_restarts: int = None, window: float = None, backoff: float = None) -> None:
+        """
+          Changes the parameters of the policy. The parameters left to None are not changed.
+        """
+        with self.lock:
+            if max_restarts is not None:
+                self.max_restarts = max_restarts
+            if window is not None:
+                self.window = window
+            if backoff is not None:
+                self.backoff = backoff
+
+    def check(self, name: str, now: float = None) -> str:
+        """
+          Tells whether a container can be restarted now: returns ALLOW, BACKOFF if the delay after its last
+          restart has not elapsed yet, or QUARANTINED if it restarted too many times within the window.
+
+          :param name: the local name of the container
+          :param now: the current time, in seconds since the epoch
+        """
+        if now is None:
+            now = time.time()
+        with self.lock:
+            if self.is_quarantined_locked(name, now):
+                return QUARANTINED
+            history = self.prune(name, now)
+            if len(history) >= self.max_restarts:
+                print(name + " restarted " + str(len(history)) + " times in " + str(self.window) +
+                      " s, it is quarantined.")
+                self.quarantined_until[name] = now + self.window
+                return QUARANTINED
+            if len(history) > 0 and now - history[-1] < self.backoff * 2 ** (len(history) - 1):
+                return BACKOFF
+            return ALLOW
+
+    def record(self, name: str, now: float = None) -> None:
+        """
+          Records a restart of a container.
+
+          :param name: the local name of the container
+          :param now: the time of the restart, in seconds since the epoch
+        """
+        with self.lock:
+            self.history.setdefault(name, deque()).append(time.time() if now is None else now)
+
+    def is_quarantined(self, name: str, now: float = None) -> bool:
+        with self.lock:
+            return self.is_quarantined_locked(name, time.time() if now is None else now)
+
+    def is_quarantined_locked(self, name: str, now: float) -> bool:
+        until = self.quarantined_until.get(name)
+        if until is None:
+            return False
+        if now < until:
+            return True
+        # the quarantine is over: the container starts again with a clean history
+        del self.quarantined_until[name]
+        self.history.pop(name, None)
+        return False
+
+    def prune(self, name: str, now: float) -> Deque[float]:
+        history = self.history.get(name, deque())
+        while len(history) > 0 and now - history[0] > self.window:
+            history.popleft()
+        return history
+
+    def forget(self, name: str) -> None:
+        """
+          Drops the history of a container, for example when it is no longer monitored.
+
+          :param name: the local name of the container
+        """
+        with self.lock:
+            self.history.pop(name, None)
+            self.quarantined_until.pop(name, None)
@@ -0,0 +1,169 @@
+import heapq
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+class ProbeScheduler:
+    """
+      Decides when each monitored container is probed. Every container has its own next due time, kept
+      in a heap: healthy containers back off towards max_interval, while suspect ones are probed every
+      min_interval. A host-wide budget of probes per second, together with a random jitter on the due
+      times, spreads the probes over time instead of firing them all in one burst.
+    """
+
+    def __init__(self, period: float, probes_per_second: float, tick: float = 0.5, jitter: float = 0.1,
+                 backoff_factor: float = 4) -> None:
+        """
+          :param period: the base interval, in seconds, between two probes of a container
+          :param probes_per_second: the maximum number of probes per second on the host
+          :param tick: seconds between two runs of the scheduler
+          :param jitter: maximum relative deviation applied to each interval
+          :param backoff_factor: the interval of a healthy container grows up to period * backoff_factor
+        """
+        self.probes_per_second = probes_per_second
+        self.tick = tick
+        self.jitter = jitter
+        self.backoff_factor = backoff_factor
+        self.set_period(period)
+
+        self.lock = threading.Lock()
+        self.heap = []
+        # current interval of each scheduled container, and the due time of its valid heap entry:
+        # entries of removed or rescheduled containers are discarded lazily when they reach the top.
+        self.intervals = {}  # type: Dict[str, float]
+        self.due_times = {}  # type: Dict[str, float]
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+
+        # ticks that started late because the previous one lasted longer than the tick interval, and
+        # probes that were delayed past their due time because the budget was exhausted
+        self.overruns = 0
+        self.deferred_probes = 0
+
+    def set_period(self, period: float) -> None:
+        """
+          Sets the base interval between two probes of a container.
+
+          :param period: the new base interval, in seconds
+        """
+        self.max_interval = max(period * self.backoff_factor, self.tick)
+        self.base_interval = max(period, self.tick)
+        self.min_interval = max(period / 2, self.tick)
+
+    def max_probe_gap(self) -> float:
+        """
+          Returns the longest time, in seconds, between two probes of a container: the interval of a healthy
+          container with the largest jitter, plus one tick of delay before it is found due and one tick for
+          the probe cycle to end.
+        """
+        return self.max_interval * (1 + self.jitter) + 2 * self.tick
+
+    def add(self, name: str) -> None:
+        """
+          Schedules a container. Its first probe is placed at a random time within the base interval,
+          so that containers added together are not probed together.
+
+          :param name: the name of the container
+        """
+        with self.lock:
+            if name in self.intervals:
+                return
+            self.intervals[name] = self.base_interval
+            self.push(name, time.monotonic() + random.uniform(0, self.base_interval))
+
+    def remove(self, name: str) -> None:
+        """
+          Stops scheduling a container.
+
+          :param name: the name of the container
+        """
+        with self.lock:
+            self.intervals.pop(name, None)
+            self.due_times.pop(name, None)
+
+    def reschedule(self, name: str, healthy: bool) -> None:
+        """
+          Schedules the next probe of a container after a probe: the interval of a healthy container is
+          doubled up to max_interval, while a suspect container goes back to min_interval.
+
+          :param name: the name of the container
+          :param healthy: the outcome of the last probe of the container
+        """
+        with self.lock:
+            if name not in self.intervals:
+                return
+            if healthy:
+                interval = min(max(self.intervals[name], self.base_interval) * 2, self.max_interval)
+            else:
+                interval = self.min_interval
+            self.intervals[name] = interval
+            interval *= 1 + random.uniform(-self.jitter, self.jitter)
+            self.push(name, time.monotonic() + interval)
+
+    def pop_due(self) -> List[str]:
+        """
+          Returns the containers whose probe is due, within the budget of probes available. The containers
+          exceeding the budget stay in the heap and are returned by the next calls.
+        """
+        now = time.monotonic()
+        with self.lock:
+            # the budget is refilled with the probes of the elapsed time, but it never exceeds the probes
+            # of a single tick, so that the unused budget does not turn into a burst.
+            self.tokens = min(self.tokens + (now - self.last_refill) * self.probes_per_second,
+                              max(1.0, self.probes_per_second * self.tick))
+            self.last_refill = now
+
+            due = []
+            while len(self.heap) > 0 and self.heap[0][0] <= now:
+                due_time, name = self.heap[0]
+                if self.due_times.get(name) != due_time:
+                    heapq.heappop(self.heap)
+                    continue
+                if self.tokens < 1:
+                    break
+                heapq.heappop(self.heap)
+                del self.due_times[name]
+                self.tokens -= 1
+                due.append(name)
+                # a probe that waited more than a tick did not fit in the budget when it was due
+                if now - due_time > self.tick:
+                    self.deferred_probes += 1
+            return due
+
+    def push(self, name: str, due_time: float) -> None:
+        self.due_times[name] = due_time
+        heapq.heappush(self.heap, (due_time, name))
+
+    def run(self, handler: Callable[[List[str]], None]) -> None:
+        """
+          Runs the scheduler at a fixed rate: every tick, the due containers are passed to the handler. The
+          handler is called at every tick, even when no container is due. The tick times do not depend on how
+          long the handler runs; if a tick starts late, it is counted as an overrun and the missed ticks are
+          skipped.
+
+          :param handler: a function called with the list of the containers to probe
+        """
+        next_tick = time.monotonic()
+        while True:
+            due = self.pop_due()
+            try:
+                handler(due)
+            except Exception as e:
+                print("Scheduled probe failed: " + str(e))
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                self.overruns += 1
+                next_tick = time.monotonic()
+            else:
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        """
+          Returns the counters of the scheduler.
+        """
+        with self.lock:
+            return {"scheduled": len(self.intervals), "overruns": self.overruns,
+                    "deferred-probes": self.deferred_probes}
@@ -0,0 +1,147 @@
+from array import array
+from typing import Optional
+
+
+class LossWindow:
+    """
+      Ring buffer of the outcomes of the last packets sent to a container (1 if the packet was lost, 0 if
+      it received a reply), with a running count of the lost ones, and an exponentially weighted moving
+      average of the loss of each probe. Deciding on the window gives the accuracy of a large sample while
+      each probe only sends one or two packets.
+    """
+
+    __slots__ = ("outcomes", "size", "next", "count", "lost", "alpha", "ewma")
+
+    def __init__(self, size: int = 20, alpha: float = 0.2) -> None:
+        """
+          :param size: the number of packets in the window
+          :param alpha: the weight of the last probe in the moving average
+        """
+        self.outcomes = array("B", bytes(size))
+        self.size = size
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self) -> None:
+        """
+          Empties the window, for example after the container is restarted.
+        """
+        self.next = 0
+        self.count = 0
+        self.lost = 0
+        self.ewma = None  # type: Optional[float]
+
+    def add(self, sent: int, received: int) -> None:
+        """
+          Records the outcome of a probe.
+
+          :param sent: the number of packets sent
+          :param received: the number of replies received
+        """
+        if sent <= 0:
+            return
+        lost = sent - received
+        for i in range(sent):
+            outcome = 1 if i < lost else 0
+            if self.count == self.size:
+                self.lost -= self.outcomes[self.next]
+            else:
+                self.count += 1
+            self.outcomes[self.next] = outcome
+            self.lost += outcome
+            self.next = (self.next + 1) % self.size
+
+        sample = lost / sent * 100
+        self.ewma = sample if self.ewma is None else self.alpha * sample + (1 - self.alpha) * self.ewma
+
+    @property
+    def samples(self) -> int:
+        """
+          The number of packets in the window.
+        """
+        return self.count
+
+    @property
+    def loss(self) -> float:
+        """
+          The loss percentage of the packets in the window.
+        """
+        if self.count == 0:
+            return 0.0
+        return self.lost / self.count * 100
+
+
+class RttEstimator:
+    """
+      Smoothed round trip time and round trip time variation of a container, computed as in RFC 6298, used
+      to give each container a probe timeout close to its usual latency. The last round trip times are also
+      kept in a ring buffer to compute their average and 95th percentile.
+    """
+
+    __slots__ = ("rtts", "size", "next", "count", "srtt", "rttvar", "timeout", "min_timeout", "max_timeout")
+
+    # gains of the smoothed round trip time and of its variation (RFC 6298)
+    alpha = 1 / 8
+    beta = 1 / 4
+
+    def __init__(self, max_timeout: float, min_timeout: float = 0.05, size: int = 20) -> None:
+        """
+          :param max_timeout: the maximum probe timeout, in seconds, also used before any round trip is measured
+          :param min_timeout: the minimum probe timeout, in seconds
+          :param size: the number of round trip times kept for the average and the percentile
+        """
+        self.rtts = array("f", bytes(4 * size))
+        self.size = size
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        self.next = 0
+        self.count = 0
+        self.srtt = None  # type: Optional[float]
+        self.rttvar = None  # type: Optional[float]
+        self.timeout = self.max_timeout
+
+    def add(self, rtt: float) -> None:
+        """
+          Records a round trip time and updates the probe timeout.
+
+          :param rtt: the round trip time, in seconds
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        self.timeout = min(max(self.srtt + 4 * self.rttvar, self.min_timeout), self.max_timeout)
+
+        self.rtts[self.next] = rtt
+        self.next = (self.next + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def backoff(self) -> None:
+        """
+          Doubles the probe timeout after a packet was lost, as a retransmission timeout would.
+        """
+        self.timeout = min(self.timeout * 2, self.max_timeout)
+
+    @property
+    def average(self) -> Optional[float]:
+        """
+          The average of the last round trip times, in seconds.
+        """
+        if self.count == 0:
+            return None
+        return sum(self.rtts[:self.count]) / self.count
+
+    @property
+    def p95(self) -> Optional[float]:
+        """
+          The 95th percentile of the last round trip times, in seconds.
+        """
+        if self.count == 0:
+            return None
+        rtts = sorted(self.rtts[:self.count])
+        return rtts[min(self.count - 1, int(0.95 * self.count))]
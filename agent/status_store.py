@@ -0,0 +1,244 @@
+import json
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import codec
+
+# fields of the status of a container sent to the manager
+STATUS_FIELDS = (
+    "local_name",
+    "running",
+    "started_at",
+    "restart_count",
+    "image",
+    "ip",
+    "quarantined",
+    "packet_loss",
+    "window_loss",
+    "loss_ewma",
+    "samples",
+    "rtt_avg_ms",
+    "rtt_p95_ms",
+    "probe_timeout_ms"
+)
+
+# fields that change at almost every probe: a change of them alone does not make the status of a container
+# changed, they are only published again with the other fields or when a refresh is requested. The agent
+# refreshes them at each checkpoint, so the values read by the manager, and its history, can be up to one
+# checkpoint period old (30 seconds by default).
+VOLATILE_FIELDS = frozenset(("loss_ewma", "rtt_avg_ms", "rtt_p95_ms", "probe_timeout_ms"))
+
+
+class ContainerRecord:
+    """
+      Status of a monitored container, together with the statistics of its probes. It only has slots,
+      so it takes a fraction of the memory of a dictionary with the same fields.
+    """
+
+    __slots__ = STATUS_FIELDS + ("loss_window", "rtt_estimator", "changed", "stale", "published", "encoded")
+
+    def __init__(self, local_name: str, loss_window: Any, rtt_estimator: Any) -> None:
+        for field in STATUS_FIELDS:
+            setattr(self, field, None)
+        self.local_name = local_name
+        self.loss_window = loss_window
+        self.rtt_estimator = rtt_estimator
+        self.changed = True
+        # whether a volatile field changed since the last publish
+        self.stale = False
+        self.published = None  # type: Optional[dict]
+        self.encoded = None  # type: Optional[bytes]
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in STATUS_FIELDS}
+
+
+class StatusStore:
+    """
+      Status of the monitored containers of the host. The records are only written by the monitoring
+      thread: the containers added or removed by other threads are queued and applied by the monitoring
+      thread itself. After each update, the monitoring thread publishes an immutable snapshot that the
+      other threads can read at any time, without locks and without seeing a half-done update.
+      The snapshot is also kept encoded in json, for the whole host and for each container, so that the
+      status requests are answered with bytes encoded once per change instead of once per request.
+      The encoding in the columns format is only built when requested, once per snapshot.
+    """
+
+    def __init__(self, loss_window_factory: Callable[[], Any], rtt_estimator_factory: Callable[[], Any]) -> None:
+        """
+          :param loss_window_factory: a function that returns a new loss window for a container
+          :param rtt_estimator_factory: a function that returns a new round trip time estimator for a container
+        """
+        self.loss_window_factory = loss_window_factory
+        self.rtt_estimator_factory = rtt_estimator_factory
+        self.records = {}  # type: Dict[str, ContainerRecord]
+        self.lock = threading.Lock()
+        # monitored containers, updated as soon as they are added or removed, and the operations
+        # not yet applied to the records by the monitoring thread
+        self.monitored = {}  # type: Dict[str, str]
+        self.pending = []  # type: List[tuple]
+        self.current = MappingProxyType({})  # type: Mapping[str, dict]
+        self.current_encoded = MappingProxyType({})  # type: Mapping[str, bytes]
+        self.current_encoded_all = b"{}"
+        self.current_encoded_list = b"[]"
+        # snapshot encoded in the columns format, with the encoding
+        self.current_columns = None  # type: Optional[Tuple[Mapping[str, dict], bytes]]
+
+    # Methods that can be called by any thread.
+
+    def add(self, name: str, local_name: str) -> bool:
+        """
+          Adds a container to the monitored ones. Returns False if it was already monitored.
+
+          :param name: the name of the container, containing the hostname
+          :param local_name: the name of the container on the host
+        """
+        with self.lock:
+            if name in self.monitored:
+                return False
+            self.monitored[name] = local_name
+            self.pending.append(("add", name, local_name))
+            return True
+
+    def remove(self, name: str) -> bool:
+        """
+          Removes a container from the monitored ones. Returns False if it was not monitored.
+
+          :param name: the name of the container, containing the hostname
+        """
+        with self.lock:
+            if name not in self.monitored:
+                return False
+            del self.monitored[name]
+            self.pending.append(("remove", name, None))
+            return True
+
+    def is_monitored(self, name: str) -> bool:
+        with self.lock:
+            return name in self.monitored
+
+    def local_names(self) -> List[str]:
+        with self.lock:
+            return list(self.monitored.values())
+
+    def snapshot(self) -> Mapping[str, dict]:
+        """
+          Returns the last published status of the monitored containers, indexed by name. Neither the
+          snapshot nor the dictionaries in it are ever modified.
+        """
+        return self.current
+
+    def encoded(self, name: str) -> Optional[bytes]:
+        """
+          Returns the last published status of a container encoded in json, or None if it is not monitored.
+
+          :param name: the name of the container, containing the hostname
+        """
+        return self.current_encoded.get(name)
+
+    def encoded_snapshot(self) -> bytes:
+        """
+          Returns the last published status of all the monitored containers, encoded in json as an object
+          indexed by name.
+        """
+        return self.current_encoded_all
+
+    def encoded_list(self) -> bytes:
+        """
+          Returns the last published status of all the monitored containers, encoded in json as a list.
+        """
+        return self.current_encoded_list
+
+    def encoded_columns(self) -> bytes:
+        """
+          Returns the last published status of all the monitored containers, encoded in the columns format
+          as a list.
+        """
+        # Two threads may build the encoding of the same snapshot at the same time: they build the same bytes.
+        snapshot = self.current
+        cached = self.current_columns
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        columns = codec.encode_records(list(snapshot.values()))
+        self.current_columns = (snapshot, columns)
+        return columns
+
+    # Methods that can only be called by the monitoring thread.
+
+    def apply_pending(self) -> None:
+        """
+          Applies the additions and removals of containers requested since the last call.
+        """
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+        for operation, name, local_name in pending:
+            if operation == "add":
+                if name not in self.records:
+                    self.records[name] = ContainerRecord(local_name, self.loss_window_factory(),
+                                                         self.rtt_estimator_factory())
+            else:
+                self.records.pop(name, None)
+
+    def names(self) -> List[str]:
+        return list(self.records.keys())
+
+    def get(self, name: str) -> Optional[ContainerRecord]:
+        return self.records.get(name)
+
+    def update(self, name: str, fields: Dict[str, Any]) -> bool:
+        """
+          Updates the status fields of a container. Returns True if any value other than a volatile one
+          changed.
+
+          :param name: the name of the container, containing the hostname
+          :param fields: the new value of each field to update
+        """
+        record = self.records.get(name)
+        if record is None:
+            return False
+        changed = False
+        for field, value in fields.items():
+            if getattr(record, field) != value:
+                setattr(record, field, value)
+                if field in VOLATILE_FIELDS:
+                    record.stale = True
+                else:
+                    changed = True
+        record.changed = record.changed or changed
+        return changed
+
+    def publish(self, refresh: bool = False) -> Tuple[List[str], List[str]]:
+        """
+          Publishes a new snapshot of the records. The dictionary of a container, and its encoding, are
+          only rebuilt if its status changed since the previous snapshot, otherwise the previous ones are
+          shared. The encoding of the whole host is only rebuilt if any container changed.
+          Returns the names of the containers whose status changed since the previous snapshot, and the
+          names of the containers removed since then.
+
+          :param refresh: whether to also publish the containers of which only volatile fields changed
+        """
+        snapshot = {}
+        encoded = {}
+        changed = []
+        for name, record in self.records.items():
+            if record.changed or record.published is None or (refresh and record.stale):
+                record.published = record.as_dict()
+                record.encoded = json.dumps(record.published).encode()
+                record.changed = record.stale = False
+                changed.append(name)
+            snapshot[name] = record.published
+            encoded[name] = record.encoded
+        removed = [name for name in self.current if name not in self.records]
+        if len(changed) == 0 and len(removed) == 0:
+            return changed, removed
+        # We join the encoded containers instead of encoding the whole snapshot again.
+        encoded_all = b"{" + b", ".join(json.dumps(name).encode() + b": " + value
+                                        for name, value in encoded.items()) + b"}"
+        encoded_list = b"[" + b", ".join(encoded.values()) + b"]"
+        self.current = MappingProxyType(snapshot)
+        self.current_encoded = MappingProxyType(encoded)
+        self.current_encoded_all = encoded_all
+        self.current_encoded_list = encoded_list
+        return changed, removed
@@ -0,0 +1,123 @@
+# coding: utf-8
+
+import os
+import sys
+import threading
+import types
+import unittest
+
+# The agent reads the name of the host from the environment and imports pika when it is imported, so it is
+# imported with a fake pika module. No connection to the broker is opened until a message is sent.
+os.environ.setdefault("HOSTNAME", "h")
+real_pika = sys.modules.get("pika")
+sys.modules["pika"] = types.ModuleType("pika")
+try:
+    import agent
+finally:
+    if real_pika is not None:
+        sys.modules["pika"] = real_pika
+    else:
+        del sys.modules["pika"]
+
+from icmp import ProbeResult  # noqa: E402
+from stats import LossWindow, RttEstimator  # noqa: E402
+from status_store import StatusStore  # noqa: E402
+
+
+class FakeInventory:
+    """Inventory of the host in which every container is running, with an address made from its name"""
+
+    def refresh(self, wanted) -> None:
+        pass
+
+    def get(self, local_name: str) -> dict:
+        return {"ip": "10.0.0." + local_name, "running": True, "gateway": None, "started_at": "1"}
+
+
+class FakeProber:
+    """Prober that receives a reply to every packet"""
+
+    def probe(self, addresses, count, timeouts=None) -> dict:
+        return {address: ProbeResult(count, [0.001] * count) for address in addresses}
+
+
+class TestMonitor(unittest.TestCase):
+    """monitor unit tests"""
+
+    def setUp(self):
+        self.globals = {name: getattr(agent, name) for name in ("status_store", "inventory", "prober",
+                                                                   "check_container")}
+        agent.status_store = StatusStore(lambda: LossWindow(agent.loss_window),
+                                         lambda: RttEstimator(agent.ping_timeout, agent.min_ping_timeout))
+        agent.inventory = FakeInventory()
+        agent.prober = FakeProber()
+        for local_name in ("1", "2", "3"):
+            agent.status_store.add("h-" + local_name, local_name)
+        agent.status_store.apply_pending()
+
+    def tearDown(self):
+        for name, value in self.globals.items():
+            setattr(agent, name, value)
+
+    def test_concurrent_checks(self):
+        """The containers are checked concurrently by the pool, and a failing check only fails its container"""
+        # the checks wait for each other, so the barrier is only passed if they run at the same time
+        barrier = threading.Barrier(3, timeout=5)
+        threads = set()
+
+        def check_container(status, record, result):
+            barrier.wait()
+            threads.add(threading.current_thread())
+            if status.local_name == "2":
+                raise RuntimeError("docker unreachable")
+            return True, {"running": True, "packet_loss": result.packet_loss * 100}
+
+        agent.check_container = check_container
+        self.assertEqual(agent.monitor(), {"h-1": True, "h-2": False, "h-3": True})
+        self.assertEqual(len(threads), 3)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertTrue(agent.status_store.get("h-1").running)
+        self.assertIsNone(agent.status_store.get("h-2").running)
+
+        # the pool keeps running the checks after a failure
+        agent.check_container = lambda status, record, result: (True, {})
+        self.assertEqual(agent.monitor(), {"h-1": True, "h-2": True, "h-3": True})
+
+
+class TestApplyConfig(unittest.TestCase):
+    """apply_config unit tests"""
+
+    def setUp(self):
+        self.globals = {name: getattr(agent, name) for name in ("config_version", "rejected_config", "threshold",
+                                                                   "ping_retries", "max_restarts")}
+
+    def tearDown(self):
+        for name, value in self.globals.items():
+            setattr(agent, name, value)
+        agent.restart_policy.configure(max_restarts=agent.max_restarts)
+
+    def test_applied(self):
+        """A valid configuration is applied and its version is acknowledged"""
+        self.assertEqual(agent.apply_config(7, {"threshold": 40, "max-restarts": 3, "unknown": 1}), [])
+        self.assertEqual((agent.threshold, agent.max_restarts), (40.0, 3))
+        self.assertEqual(agent.config_version, 7)
+        self.assertIsNone(agent.rejected_config)
+
+    def test_rejected(self):
+        """A configuration with a value that is not valid is not applied at all, and its version is reported"""
+        agent.config_version = 3
+        threshold, ping_retries = agent.threshold, agent.ping_retries
+        self.assertEqual(agent.apply_config(7, {"threshold": 40, "ping-retries": -1, "max-restarts": "x"}),
+                         ["ping-retries", "max-restarts"])
+        self.assertEqual((agent.threshold, agent.ping_retries), (threshold, ping_retries))
+        self.assertEqual(agent.config_version, 3)
+        self.assertEqual(agent.rejected_config, {"version": 7, "parameters": ["ping-retries", "max-restarts"]})
+
+        # a later valid configuration is applied and clears the rejection
+        agent.apply_config(8, {"threshold": 40})
+        self.assertEqual((agent.threshold, agent.config_version), (40.0, 8))
+        self.assertIsNone(agent.rejected_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
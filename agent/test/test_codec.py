@@ -0,0 +1,120 @@
+# coding: utf-8
+
+import json
+import os
+import unittest
+
+import codec
+
+# status of two containers, one of them not found on the host
+records = [
+    {"local_name": "a", "running": True, "restart_count": 0, "ip": "172.17.0.2", "packet_loss": 0.0,
+     "samples": 20, "rtt_avg_ms": 0.1},
+    {"local_name": "b", "running": None, "restart_count": None, "ip": None, "packet_loss": None,
+     "samples": 0, "rtt_avg_ms": 2}
+]
+
+
+class TestCodec(unittest.TestCase):
+    """codec unit tests"""
+
+    def test_records(self):
+        """The records are decoded with the same fields and values"""
+        body, content_type = codec.encode(records)
+        self.assertEqual(content_type, codec.CONTENT_TYPE_COLUMNS)
+        self.assertEqual(codec.decode(body, content_type), records)
+        self.assertLess(len(body), len(json.dumps(records)))
+
+    def test_missing_and_mixed_fields(self):
+        """The missing fields are decoded as None, the values of mixed types keep their type"""
+        mixed = [{"a": 1, "b": "x"}, {"a": "one", "c": [1, 2]}, {}]
+        body, content_type = codec.encode(mixed)
+        self.assertEqual(codec.decode(body, content_type),
+                         [{"a": 1, "b": "x", "c": None}, {"a": "one", "b": None, "c": [1, 2]},
+                          {"a": None, "b": None, "c": None}])
+
+    def test_strings(self):
+        """The lists of strings are encoded as a single column"""
+        names = ["host-a", "host-é", ""]
+        body, content_type = codec.encode(names)
+        self.assertEqual(content_type, codec.CONTENT_TYPE_COLUMNS)
+        self.assertEqual(codec.decode(body, content_type), names)
+
+    def test_json_fallback(self):
+        """The values that are not lists of records or strings are encoded in json"""
+        for value in [[], {"a": 1}, [1, 2], ["a", 1]]:
+            body, content_type = codec.encode(value)
+            self.assertEqual(content_type, codec.CONTENT_TYPE_JSON)
+            self.assertEqual(codec.decode(body, content_type), value)
+        self.assertEqual(codec.decode(b'["a"]', None), ["a"])
+
+    def test_unsupported(self):
+        """A payload of an unknown content type or version is rejected"""
+        body, content_type = codec.encode(["a"])
+        with self.assertRaises(ValueError):
+            codec.decode(body, "application/x-healthmonitoring-columns; version=2")
+        with self.assertRaises(ValueError):
+            codec.decode(body[:3] + bytes([2]) + body[4:], content_type)
+
+    def test_accepts_columns(self):
+        self.assertTrue(codec.accepts_columns(codec.ACCEPT))
+        self.assertFalse(codec.accepts_columns(codec.CONTENT_TYPE_JSON))
+        self.assertFalse(codec.accepts_columns(None))
+
+
+class TestCompressor(unittest.TestCase):
+    """Compressor unit tests"""
+
+    def test_threshold(self):
+        """Only the bodies larger than the threshold are compressed"""
+        compressor = codec.Compressor(100)
+        body = json.dumps(records * 10).encode()
+        self.assertEqual(compressor.compress(b"[]"), (b"[]", None))
+        compressed, content_encoding = compressor.compress(body)
+        self.assertEqual(content_encoding, codec.CONTENT_ENCODING_DEFLATE)
+        self.assertLess(len(compressed), len(body))
+        self.assertEqual(compressor.decompress(compressed, content_encoding), body)
+        self.assertEqual(compressor.decompress(b"[]", None), b"[]")
+
+        stats = compressor.stats()
+        self.assertEqual(stats["compressed-messages"], 1)
+        self.assertEqual(stats["bytes-before-compression"], len(body))
+        self.assertEqual(stats["bytes-after-compression"], len(compressed))
+        self.assertGreater(stats["compression-ratio"], 1)
+        self.assertEqual(stats["decompressed-messages"], 1)
+
+    def test_disabled_and_incompressible(self):
+        """A threshold of 0 disables the compression, and incompressible bodies are sent as they are"""
+        body = bytes(range(256))
+        self.assertEqual(codec.Compressor(0).compress(b"a" * 1000), (b"a" * 1000, None))
+        compressor = codec.Compressor(10)
+        self.assertEqual(compressor.compress(body), (body, None))
+        self.assertEqual(compressor.stats()["incompressible-messages"], 1)
+        self.assertIsNone(compressor.stats()["compression-ratio"])
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            codec.Compressor(10).decompress(b"", "br")
+
+    def test_accepts_deflate(self):
+        self.assertTrue(codec.accepts_deflate("gzip, deflate"))
+        self.assertFalse(codec.accepts_deflate("identity"))
+        self.assertFalse(codec.accepts_deflate(None))
+
+
+class TestCodecCopies(unittest.TestCase):
+    """Copies of the codec unit tests"""
+
+    def test_identical(self):
+        """The codec of the manager is the same as the one of the agent, so that they understand each other"""
+        manager_codec = os.path.join(os.path.dirname(os.path.abspath(codec.__file__)), os.pardir,
+                                     "python-flask-server", "swagger_server", "controllers", "codec.py")
+        if not os.path.exists(manager_codec):
+            self.skipTest("the manager is not in the tree")
+        with open(codec.__file__, "rb") as agent_file, open(manager_codec, "rb") as manager_file:
+            self.assertEqual(agent_file.read(), manager_file.read(),
+                             "agent/codec.py and the codec of the manager differ")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+import time
+import unittest
+
+from correlation import HostLossMonitor
+from scheduler import ProbeScheduler
+
+
+class TestHostLossMonitor(unittest.TestCase):
+    """HostLossMonitor unit tests"""
+
+    def test_single_container_fault(self):
+        """One lossy container among healthy ones is not a host impairment"""
+        monitor = HostLossMonitor(min_containers=3)
+        self.assertFalse(monitor.update({"a": 100, "b": 0, "c": 0, "d": 0}, [0], 60))
+        self.assertFalse(monitor.suppress_restart())
+
+    def test_majority_over_threshold(self):
+        """Most containers over the threshold together mean a host impairment"""
+        monitor = HostLossMonitor(min_containers=3)
+        self.assertTrue(monitor.update({"a": 100, "b": 70, "c": 80, "d": 0}, [], 60))
+        self.assertTrue(monitor.suppress_restart())
+        self.assertEqual(monitor.stats()["suppressed-restarts"], 1)
+
+        # the losses of the containers probed in previous cycles are still considered
+        self.assertTrue(monitor.update({"d": 0}, [], 60))
+        self.assertFalse(monitor.update({"a": 0, "b": 0}, [], 60))
+
+    def test_gateway(self):
+        """A lossy gateway is a host impairment even with few containers"""
+        monitor = HostLossMonitor(min_containers=3)
+        self.assertTrue(monitor.update({"a": 100}, [80], 60))
+        self.assertFalse(monitor.update({"a": 0}, [0], 60))
+
+    def test_gateway_age(self):
+        """The loss of the gateway is forgotten when no gateway was probed for max_age seconds"""
+        monitor = HostLossMonitor(min_containers=3, max_age=10)
+        self.assertTrue(monitor.update({"a": 100}, [80], 60))
+        self.assertTrue(monitor.update({}, [], 60))
+        monitor.gateway_measured = time.monotonic() - 11
+        self.assertFalse(monitor.update({}, [], 60))
+        self.assertIsNone(monitor.stats()["gateway-loss"])
+
+    def test_max_age(self):
+        """The loss of a container probed at the longest interval of the scheduler is still considered"""
+        scheduler = ProbeScheduler(period=2, probes_per_second=100)
+        monitor = HostLossMonitor(min_containers=3, max_age=scheduler.max_probe_gap())
+        monitor.update({"a": 0, "b": 0, "c": 100}, [], 60)
+        measured = time.monotonic() - scheduler.max_interval * (1 + scheduler.jitter) - scheduler.tick
+        monitor.losses["a"] = (0, measured)
+        monitor.losses["b"] = (0, measured)
+        self.assertFalse(monitor.update({"c": 100}, [], 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
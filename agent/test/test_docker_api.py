@@ -0,0 +1,120 @@
+# coding: utf-8
+
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from docker_api import DockerClient, DockerError, api_version
+
+CONTAINERS = [
+    {"Id": "a1", "Names": ["/web"], "Image": "nginx", "State": "running",
+     "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.2"}}}}
+]
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        return "docker"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path))
+        prefix = "/" + api_version
+        if self.path.startswith(prefix + "/containers/json"):
+            self.send_json(200, CONTAINERS)
+        elif self.path == prefix + "/containers/web/json":
+            self.send_json(200, {"Id": "a1", "Name": "/web", "State": {"Running": True}})
+        elif self.path.startswith(prefix + "/events"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for action in ("die", "start"):
+                data = json.dumps({"Type": "container", "Action": action}).encode() + b"\n"
+                self.wfile.write(("%x\r\n" % len(data)).encode() + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_json(404, {"message": "No such container"})
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path))
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path):
+        super().__init__(path, FakeDockerHandler)
+        self.requests = []
+        self.connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class TestDockerClient(unittest.TestCase):
+    """DockerClient unit tests against a fake docker daemon"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = FakeDockerServer(os.path.join(self.directory.name, "docker.sock"))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = DockerClient(self.server.server_address, timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def test_keep_alive(self):
+        """Subsequent requests of a thread reuse the same connection"""
+        self.assertEqual(self.client.list_containers()[0]["Names"], ["/web"])
+        self.assertEqual(self.client.inspect_container("web")["Id"], "a1")
+        self.client.restart_container("web", timeout=3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertIn(("POST", "/" + api_version + "/containers/web/restart?t=3"), self.server.requests)
+
+    def test_connection_per_thread(self):
+        """Each thread opens its own connection"""
+        self.client.list_containers()
+        thread = threading.Thread(target=self.client.list_containers)
+        thread.start()
+        thread.join()
+        self.assertEqual(self.server.connections, 2)
+
+    def test_error(self):
+        """Error statuses of the daemon are raised as DockerError"""
+        with self.assertRaises(DockerError) as context:
+            self.client.inspect_container("missing")
+        self.assertEqual(context.exception.status, 404)
+        self.assertEqual(context.exception.message, "No such container")
+
+    def test_events(self):
+        """The chunked events stream is decoded one event per line"""
+        events = list(self.client.events(since=0, filters={"type": "container"}))
+        self.assertEqual([event["Action"] for event in events], ["die", "start"])
+
+
+if __name__ == '__main__':
+    unittest.main()
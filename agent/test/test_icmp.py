@@ -0,0 +1,114 @@
+# coding: utf-8
+
+import socket
+import struct
+import time
+import unittest
+
+import icmp
+from icmp import IcmpProber, ProbeResult, build_echo_request, checksum, open_socket, parse_echo_reply
+
+
+class TestIcmp(unittest.TestCase):
+    """ICMP prober unit tests"""
+
+    def test_checksum(self):
+        """A packet with its checksum sums to zero"""
+        packet = build_echo_request(0x1234, 7)
+        self.assertEqual(checksum(packet), 0)
+
+    def test_parse_echo_reply(self):
+        """Echo replies are parsed with and without IP header, other packets are ignored"""
+        reply = b"\x00" + build_echo_request(0x1234, 7)[1:]
+        self.assertEqual(parse_echo_reply(reply, False), (0x1234, 7))
+        ip_header = struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(reply), 0, 0, 64, 1, 0,
+                                b"\x7f\x00\x00\x01", b"\x7f\x00\x00\x01")
+        self.assertEqual(parse_echo_reply(ip_header + reply), (0x1234, 7))
+        self.assertIsNone(parse_echo_reply(build_echo_request(0x1234, 7), False))
+
+    def test_probe_result(self):
+        """Packet loss is the fraction of packets without reply"""
+        result = ProbeResult(4, [0.001, 0.003])
+        self.assertEqual(result.packet_loss, 0.5)
+        self.assertAlmostEqual(result.rtt_avg, 0.002)
+        self.assertTrue(result.success())
+        self.assertFalse(ProbeResult(3).success())
+
+    def test_probe_localhost(self):
+        """All the packets sent to the loopback address receive a reply"""
+        try:
+            open_socket()[0].close()
+        except OSError:
+            self.skipTest("ICMP sockets are not allowed")
+        results = IcmpProber(timeout=1).probe(["127.0.0.1", "127.0.0.1"], 3)
+        self.assertEqual(list(results), ["127.0.0.1"])
+        self.assertEqual(results["127.0.0.1"].sent, 3)
+        self.assertEqual(results["127.0.0.1"].packet_loss, 0.0)
+
+    def test_probe_timeouts(self):
+        """The exchange ends as soon as every request received a reply or timed out"""
+        try:
+            open_socket()[0].close()
+        except OSError:
+            self.skipTest("ICMP sockets are not allowed")
+        start = time.monotonic()
+        results = IcmpProber(timeout=5).probe(["127.0.0.1"], 2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(results["127.0.0.1"].packet_loss, 0.0)
+
+        # a reply received after the timeout of its address, but within late_factor times it, is
+        # counted as late and not as lost
+        results = IcmpProber(timeout=5, late_factor=100000).probe(["127.0.0.1"], 2, {"127.0.0.1": 0.000001})
+        self.assertEqual(results["127.0.0.1"].packet_loss, 0.0)
+        self.assertEqual(results["127.0.0.1"].late, 2)
+
+    def test_probe_lost(self):
+        """A lost packet ends the exchange after late_factor times the timeout of its address"""
+        class SilentSocket:
+            """A socket on which the echo requests are sent and no reply ever arrives"""
+
+            def __init__(self):
+                self.pair = socket.socketpair()
+
+            def sendto(self, packet, address):
+                pass
+
+            def fileno(self):
+                return self.pair[0].fileno()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                for sock in self.pair:
+                    sock.close()
+
+        original = icmp.open_socket
+        icmp.open_socket = lambda: (SilentSocket(), True)
+        try:
+            start = time.monotonic()
+            results = IcmpProber(timeout=5).probe(["10.0.0.1"], 2, {"10.0.0.1": 0.1})
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertEqual(results["10.0.0.1"].packet_loss, 1.0)
+            self.assertEqual(results["10.0.0.1"].late, 0)
+        finally:
+            icmp.open_socket = original
+
+    def test_probe_without_socket(self):
+        """If no ICMP socket can be opened, no address is reported as lost"""
+        def fail():
+            raise PermissionError("Operation not permitted")
+
+        original = icmp.open_socket
+        icmp.open_socket = fail
+        try:
+            prober = IcmpProber(timeout=1)
+            self.assertEqual(prober.probe(["10.0.0.1"], 2), {})
+            self.assertTrue(prober.socket_error_logged)
+            self.assertEqual(prober.probe(["10.0.0.1"], 2), {})
+        finally:
+            icmp.open_socket = original
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# coding: utf-8
+
+import unittest
+
+from inventory import ContainerInventory
+
+
+def make_attrs(container_id, name, running=True, ip="172.17.0.2"):
+    return {
+        "Id": container_id,
+        "Name": "/" + name,
+        "State": {"Running": running, "StartedAt": "2020-01-01T00:00:00Z"},
+        "RestartCount": 0,
+        "Config": {"Image": "nginx"},
+        "NetworkSettings": {"IPAddress": ip}
+    }
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.attrs = {}
+        self.summaries = []
+        self.inspected = []
+
+    def list_containers(self, all=True):
+        return self.summaries
+
+    def inspect_container(self, container_id):
+        self.inspected.append(container_id)
+        return self.attrs[container_id]
+
+
+def make_event(action, container_id, name, **attributes):
+    attributes["name"] = name
+    return {"Type": "container", "Action": action, "time": 100,
+            "Actor": {"ID": container_id, "Attributes": attributes}}
+
+
+class TestContainerInventory(unittest.TestCase):
+    """ContainerInventory unit tests"""
+
+    def setUp(self):
+        self.client = FakeClient()
+        self.died = []
+        self.inventory = ContainerInventory(self.client, lambda name, t: self.died.append(name))
+
+    def start_container(self, container_id, name):
+        self.client.attrs[container_id] = make_attrs(container_id, name)
+        self.inventory.apply_event(make_event("start", container_id, name))
+
+    def test_start_and_die(self):
+        """A die event marks the container as stopped and notifies the handler"""
+        self.start_container("a1", "web")
+        self.assertEqual(self.inventory.running_names(), ["web"])
+        self.assertEqual(self.inventory.get("web")["ip"], "172.17.0.2")
+
+        self.inventory.apply_event(make_event("die", "a1", "web", exitCode="137"))
+        self.assertFalse(self.inventory.get("web")["running"])
+        self.assertEqual(self.inventory.running_names(), [])
+        self.assertEqual(self.died, ["web"])
+
+    def test_rename(self):
+        """A rename event moves the record under the new name"""
+        self.start_container("a1", "web")
+        self.client.attrs["a1"] = make_attrs("a1", "frontend")
+        self.inventory.apply_event(make_event("rename", "a1", "frontend", oldName="/web"))
+        self.assertIsNone(self.inventory.get("web"))
+        self.assertEqual(self.inventory.get("frontend")["id"], "a1")
+
+    def test_destroy(self):
+        """A destroy event removes the container from the inventory"""
+        self.start_container("a1", "web")
+        self.inventory.apply_event(make_event("destroy", "a1", "web"))
+        self.assertIsNone(self.inventory.get("web"))
+        self.assertEqual(self.died, [])
+
+    def test_refresh_inspects_only_wanted(self):
+        """A refresh lists the containers once and inspects only the wanted ones missing information"""
+        self.client.attrs["a1"] = make_attrs("a1", "web")
+        self.client.summaries = [
+            {"Id": "a1", "Names": ["/web"], "Image": "nginx", "State": "running",
+             "NetworkSettings": {"Networks": {"bridge": {"IPAddress": "172.17.0.2"}}}},
+            {"Id": "b2", "Names": ["/db"], "Image": "redis", "State": "exited",
+             "NetworkSettings": {"Networks": {}}}
+        ]
+        self.inventory.refresh({"web"})
+        self.assertEqual(self.client.inspected, ["a1"])
+        self.assertEqual(self.inventory.get("web")["started_at"], "2020-01-01T00:00:00Z")
+        self.assertEqual(self.inventory.running_names(), ["web"])
+
+        # a second refresh keeps the information of the unchanged container without inspecting it
+        self.inventory.refresh({"web"})
+        self.assertEqual(self.client.inspected, ["a1"])
+        self.assertEqual(self.inventory.get("web")["started_at"], "2020-01-01T00:00:00Z")
+
+
+if __name__ == '__main__':
+    unittest.main()
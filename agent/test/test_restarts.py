@@ -0,0 +1,89 @@
+# coding: utf-8
+
+import threading
+import time
+import unittest
+
+from restarts import RestartExecutor, RestartPolicy, ALLOW, BACKOFF, QUARANTINED
+
+
+class TestRestartExecutor(unittest.TestCase):
+    """RestartExecutor unit tests"""
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def restart(self, name):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+
+    def test_duplicates_dropped(self):
+        """A restart requested for a restarting container is dropped"""
+        executor = RestartExecutor(self.restart, 2)
+        self.assertTrue(executor.submit("web"))
+        self.assertFalse(executor.submit("web"))
+        self.assertTrue(executor.is_restarting("web"))
+        self.assertTrue(executor.caused("web", time.time()))
+        self.release.set()
+        executor.executor.shutdown(wait=True)
+        stats = executor.stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["dropped"], 1)
+        self.assertFalse(executor.is_restarting("web"))
+        self.assertTrue(executor.caused("web", time.time()))
+        self.assertFalse(executor.caused("web", time.time() + 60))
+
+    def test_concurrency_cap(self):
+        """No more than max_concurrent restarts run at the same time"""
+        executor = RestartExecutor(self.restart, 2)
+        for i in range(5):
+            executor.submit("c" + str(i))
+        time.sleep(0.1)
+        self.assertEqual(self.max_running, 2)
+        self.release.set()
+        executor.executor.shutdown(wait=True)
+        self.assertEqual(executor.stats()["completed"], 5)
+
+
+class TestRestartPolicy(unittest.TestCase):
+    """RestartPolicy unit tests"""
+
+    def test_exponential_backoff(self):
+        """The delay between restarts doubles at each restart"""
+        policy = RestartPolicy(max_restarts=10, window=300, backoff=2)
+        self.assertEqual(policy.check("web", 0), ALLOW)
+        policy.record("web", 0)
+        self.assertEqual(policy.check("web", 1), BACKOFF)
+        self.assertEqual(policy.check("web", 2), ALLOW)
+        policy.record("web", 2)
+        self.assertEqual(policy.check("web", 5), BACKOFF)
+        self.assertEqual(policy.check("web", 6), ALLOW)
+
+    def test_quarantine(self):
+        """A container restarted max_restarts times in the window is quarantined for a window"""
+        policy = RestartPolicy(max_restarts=3, window=100, backoff=0)
+        for t in range(3):
+            self.assertEqual(policy.check("web", t), ALLOW)
+            policy.record("web", t)
+        self.assertEqual(policy.check("web", 3), QUARANTINED)
+        self.assertTrue(policy.is_quarantined("web", 50))
+        self.assertFalse(policy.is_quarantined("web", 104))
+        self.assertEqual(policy.check("web", 104), ALLOW)
+
+    def test_window(self):
+        """Restarts older than the window are not counted"""
+        policy = RestartPolicy(max_restarts=2, window=10, backoff=0)
+        policy.record("web", 0)
+        policy.record("web", 1)
+        self.assertEqual(policy.check("web", 12), ALLOW)
+
+
+if __name__ == '__main__':
+    unittest.main()
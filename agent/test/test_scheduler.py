@@ -0,0 +1,52 @@
+# coding: utf-8
+
+import time
+import unittest
+
+from scheduler import ProbeScheduler
+
+
+class TestProbeScheduler(unittest.TestCase):
+    """ProbeScheduler unit tests"""
+
+    def test_first_probe_within_period(self):
+        """A new container is due within one base interval"""
+        scheduler = ProbeScheduler(period=0.05, probes_per_second=1000, tick=0.01)
+        scheduler.add("host-web")
+        time.sleep(0.06)
+        self.assertEqual(scheduler.pop_due(), ["host-web"])
+        self.assertEqual(scheduler.pop_due(), [])
+
+    def test_backoff_and_suspect(self):
+        """Healthy containers back off up to the maximum interval, suspect ones go to the minimum"""
+        scheduler = ProbeScheduler(period=1, probes_per_second=1000, tick=0.1, backoff_factor=4)
+        scheduler.add("host-web")
+        scheduler.reschedule("host-web", True)
+        self.assertEqual(scheduler.intervals["host-web"], 2)
+        scheduler.reschedule("host-web", True)
+        scheduler.reschedule("host-web", True)
+        self.assertEqual(scheduler.intervals["host-web"], 4)
+        scheduler.reschedule("host-web", False)
+        self.assertEqual(scheduler.intervals["host-web"], 0.5)
+
+    def test_budget(self):
+        """No more probes than the budget of a tick are returned at once"""
+        scheduler = ProbeScheduler(period=0.01, probes_per_second=100, tick=0.05)
+        for i in range(20):
+            scheduler.add("host-c" + str(i))
+        time.sleep(0.05)
+        self.assertEqual(len(scheduler.pop_due()), 5)
+
+    def test_remove(self):
+        """Removed containers are never returned"""
+        scheduler = ProbeScheduler(period=0.01, probes_per_second=1000, tick=0.01)
+        scheduler.add("host-web")
+        scheduler.remove("host-web")
+        time.sleep(0.02)
+        self.assertEqual(scheduler.pop_due(), [])
+        scheduler.reschedule("host-web", True)
+        self.assertEqual(scheduler.stats()["scheduled"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# coding: utf-8
+
+import unittest
+
+from stats import LossWindow, RttEstimator
+
+
+class TestLossWindow(unittest.TestCase):
+    """LossWindow unit tests"""
+
+    def test_window_loss(self):
+        """The loss is computed over the last packets of the window only"""
+        window = LossWindow(size=4)
+        window.add(2, 0)
+        self.assertEqual(window.loss, 100)
+        window.add(2, 2)
+        self.assertEqual(window.loss, 50)
+        self.assertEqual(window.samples, 4)
+        window.add(2, 2)
+        self.assertEqual(window.loss, 0)
+        self.assertEqual(window.samples, 4)
+
+    def test_ewma(self):
+        """The moving average weights the last probe by alpha"""
+        window = LossWindow(size=10, alpha=0.5)
+        self.assertIsNone(window.ewma)
+        window.add(2, 0)
+        self.assertEqual(window.ewma, 100)
+        window.add(2, 2)
+        self.assertEqual(window.ewma, 50)
+
+    def test_reset(self):
+        """A reset empties the window"""
+        window = LossWindow(size=4)
+        window.add(2, 1)
+        window.reset()
+        self.assertEqual(window.samples, 0)
+        self.assertEqual(window.loss, 0)
+        self.assertIsNone(window.ewma)
+
+
+class TestRttEstimator(unittest.TestCase):
+    """RttEstimator unit tests"""
+
+    def test_timeout_follows_rtt(self):
+        """The timeout is the smoothed round trip time plus four times its variation, within the bounds"""
+        estimator = RttEstimator(max_timeout=2, min_timeout=0.001)
+        self.assertEqual(estimator.timeout, 2)
+        estimator.add(0.01)
+        self.assertAlmostEqual(estimator.srtt, 0.01)
+        self.assertAlmostEqual(estimator.rttvar, 0.005)
+        self.assertAlmostEqual(estimator.timeout, 0.03)
+        for _ in range(50):
+            estimator.add(0.01)
+        self.assertLess(estimator.timeout, 0.011)
+
+    def test_bounds_and_backoff(self):
+        """The timeout never goes below the minimum and doubles after a loss"""
+        estimator = RttEstimator(max_timeout=2, min_timeout=0.05)
+        estimator.add(0.0001)
+        self.assertEqual(estimator.timeout, 0.05)
+        estimator.backoff()
+        self.assertEqual(estimator.timeout, 0.1)
+
+    def test_average_and_percentile(self):
+        """The average and the 95th percentile are computed over the last round trip times"""
+        estimator = RttEstimator(max_timeout=2, size=20)
+        for i in range(1, 21):
+            estimator.add(i / 1000)
+        self.assertAlmostEqual(estimator.average, 0.0105, places=6)
+        self.assertAlmostEqual(estimator.p95, 0.020, places=6)
+
+
+if __name__ == '__main__':
+    unittest.main()
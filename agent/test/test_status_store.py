@@ -0,0 +1,194 @@
+# coding: utf-8
+
+import json
+import tracemalloc
+import unittest
+
+from stats import LossWindow, RttEstimator
+import codec
+import status_store
+from status_store import STATUS_FIELDS, StatusStore
+
+# status of a running container, as written after each probe
+fields = {
+    "running": True,
+    "started_at": "2020-01-01T00:00:00.000000000Z",
+    "restart_count": 0,
+    "image": "nginx:latest",
+    "ip": "172.17.0.2",
+    "quarantined": False,
+    "packet_loss": 0.0,
+    "window_loss": 0.0,
+    "loss_ewma": 0.0,
+    "samples": 20,
+    "rtt_avg_ms": 0.1,
+    "rtt_p95_ms": 0.2,
+    "probe_timeout_ms": 50.0
+}
+
+
+def make_store() -> StatusStore:
+    return StatusStore(lambda: LossWindow(20), lambda: RttEstimator(2))
+
+
+class TestStatusStore(unittest.TestCase):
+    """StatusStore unit tests"""
+
+    def test_pending(self):
+        """The containers added or removed are only applied by the monitoring thread"""
+        store = make_store()
+        self.assertTrue(store.add("host-a", "a"))
+        self.assertFalse(store.add("host-a", "a"))
+        self.assertTrue(store.is_monitored("host-a"))
+        self.assertEqual(store.local_names(), ["a"])
+        self.assertIsNone(store.get("host-a"))
+        store.apply_pending()
+        self.assertEqual(store.get("host-a").local_name, "a")
+
+        self.assertTrue(store.remove("host-a"))
+        self.assertFalse(store.remove("host-a"))
+        self.assertFalse(store.is_monitored("host-a"))
+        self.assertIsNotNone(store.get("host-a"))
+        store.apply_pending()
+        self.assertIsNone(store.get("host-a"))
+
+    def test_add_and_remove_before_apply(self):
+        """A container added and removed between two cycles is never created"""
+        store = make_store()
+        store.add("host-a", "a")
+        store.remove("host-a")
+        store.apply_pending()
+        self.assertEqual(store.names(), [])
+
+    def test_update(self):
+        """An update tells whether any field changed"""
+        store = make_store()
+        store.add("host-a", "a")
+        store.apply_pending()
+        self.assertTrue(store.update("host-a", fields))
+        self.assertFalse(store.update("host-a", fields))
+        self.assertFalse(store.update("host-b", fields))
+
+    def test_volatile_fields(self):
+        """A change of the volatile fields alone is only published when a refresh is requested"""
+        store = make_store()
+        store.add("host-a", "a")
+        store.apply_pending()
+        store.update("host-a", fields)
+        store.publish()
+        self.assertFalse(store.update("host-a", dict(fields, rtt_avg_ms=0.3, loss_ewma=1.5)))
+        self.assertEqual(store.publish(), ([], []))
+        self.assertEqual(store.snapshot()["host-a"]["rtt_avg_ms"], 0.1)
+
+        self.assertEqual(store.publish(refresh=True), (["host-a"], []))
+        self.assertEqual(store.snapshot()["host-a"]["rtt_avg_ms"], 0.3)
+        self.assertEqual(store.publish(refresh=True), ([], []))
+
+        self.assertTrue(store.update("host-a", dict(fields, rtt_avg_ms=0.4, packet_loss=50.0)))
+        self.assertEqual(store.publish(), (["host-a"], []))
+        self.assertEqual(store.snapshot()["host-a"]["rtt_avg_ms"], 0.4)
+
+    def test_snapshot(self):
+        """The snapshots are immutable and share the status of the containers that did not change"""
+        store = make_store()
+        store.add("host-a", "a")
+        store.add("host-b", "b")
+        store.apply_pending()
+        store.update("host-a", fields)
+        store.update("host-b", fields)
+        store.publish()
+        first = store.snapshot()
+        self.assertEqual(first["host-a"]["local_name"], "a")
+        self.assertEqual(set(first["host-a"].keys()), set(STATUS_FIELDS))
+        with self.assertRaises(TypeError):
+            first["host-c"] = {}
+
+        store.update("host-a", dict(fields, packet_loss=50.0))
+        store.publish()
+        second = store.snapshot()
+        self.assertEqual(first["host-a"]["packet_loss"], 0.0)
+        self.assertEqual(second["host-a"]["packet_loss"], 50.0)
+        self.assertIs(first["host-b"], second["host-b"])
+
+    def test_publish_changes(self):
+        """A publish returns the containers changed and removed since the previous one"""
+        store = make_store()
+        store.add("host-a", "a")
+        store.add("host-b", "b")
+        store.apply_pending()
+        self.assertEqual(store.publish(), (["host-a", "host-b"], []))
+        self.assertEqual(store.publish(), ([], []))
+
+        store.update("host-a", fields)
+        store.remove("host-b")
+        store.apply_pending()
+        self.assertEqual(store.publish(), (["host-a"], ["host-b"]))
+        self.assertEqual(store.publish(), ([], []))
+
+    def test_encoded_snapshot(self):
+        """The encoded snapshot matches the snapshot and is only rebuilt when something changed"""
+        store = make_store()
+        self.assertEqual(json.loads(store.encoded_snapshot()), {})
+        store.add("host-a", "a")
+        store.add("host-b", "b")
+        store.apply_pending()
+        store.update("host-a", fields)
+        store.publish()
+        first = store.encoded_snapshot()
+        self.assertEqual(json.loads(first), dict(store.snapshot()))
+        self.assertEqual(json.loads(store.encoded("host-a")), store.snapshot()["host-a"])
+        self.assertEqual(json.loads(store.encoded_list()), list(store.snapshot().values()))
+        self.assertEqual(codec.decode(store.encoded_columns(), codec.CONTENT_TYPE_COLUMNS),
+                         list(store.snapshot().values()))
+        self.assertIs(store.encoded_columns(), store.encoded_columns())
+        self.assertIsNone(store.encoded("host-c"))
+
+        store.update("host-a", fields)
+        store.publish()
+        self.assertIs(store.encoded_snapshot(), first)
+
+        store.remove("host-b")
+        store.apply_pending()
+        store.publish()
+        self.assertEqual(list(json.loads(store.encoded_snapshot()).keys()), ["host-a"])
+        self.assertIsNone(store.encoded("host-b"))
+
+    def test_memory(self):
+        """The slot records take less memory than a dictionary per container"""
+        count = 1000
+
+        def make_dicts():
+            dicts = {}
+            for i in range(count):
+                dicts["host-" + str(i)] = dict(fields, local_name=str(i))
+            return dicts
+
+        def make_records():
+            # the statistics of the probes are left out, since the dictionaries do not have them
+            store = StatusStore(lambda: None, lambda: None)
+            for i in range(count):
+                store.add("host-" + str(i), str(i))
+            store.apply_pending()
+            for i in range(count):
+                store.update("host-" + str(i), fields)
+            return store
+
+        self.assertLess(traced_size(make_records), traced_size(make_dicts))
+
+
+def traced_size(function) -> int:
+    """
+      Returns the memory allocated by this module and by the status store to build the result of function,
+      ignoring the allocations of the other threads.
+    """
+    tracemalloc.start()
+    result = function()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, __file__),
+                                                          tracemalloc.Filter(True, status_store.__file__)])
+    tracemalloc.stop()
+    del result
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,23 +7,34 @@ from flask import Response
 from swagger_server.models.config import Config  # noqa: E501
 
 
-def get_configuration() -> Response:  # noqa: E501
+def get_configuration(max_staleness=None) -> Response:  # noqa: E501
     """
     REST controller method that is triggered by a request for the agent's configurations.
-    It returns to the client a list of dictionaries with the following form:
+    The configurations are taken from the last heartbeats of the agents, or from a cache, if they are not older
+    than max_staleness seconds; their age, in seconds, is returned in the Age header.
+    It returns to the client a list of dictionaries with the following form, where config-version is the version of
+    the configuration applied by the agent, up-to-date tells whether it is the last one requested and rejected-config,
+    if not null, is the last version that the agent did not apply, with the parameters whose value is not valid:
 
     {
-        "hostname": "name"
+        "name": "name",
+        "config-version": 1589450000000,
+        "up-to-date": true,
+        "rejected-config": null,
         "threshold": 50.0,
         "ping-retries": 2,
-        "monitoring-period": 4
+        "monitoring-period": 4,
+        "max-restarts": 5,
+        "restart-window": 300,
+        "restart-backoff": 2.0
     }
     """
-    config = rabbitMQ_manager.get_configuration()
+    config, age = rabbitMQ_manager.get_configuration(max_staleness)
     if config is not None:
         return Response(
             json.dumps(config),
-            status=200
+            status=200,
+            headers={"Age": str(int(age))}
         )
     return Response(
         status=500
@@ -38,25 +49,46 @@ def update_configuration(body) -> Response:  # noqa: E501
     {
         "threshold": 50.0,
         "ping-retries": 2,
-        "monitoring-period": 4
+        "monitoring-period": 4,
+        "max-restarts": 5,
+        "restart-window": 300,
+        "restart-backoff": 2.0
     }
 
-    None of the dictionary entries is mandatory.
+    None of the dictionary entries is mandatory. If a value is not valid, nothing is changed and the status
+    is 400. If any parameter is changed, it returns the version of the new configuration, which the agents
+    acknowledge once they applied it:
+
+    {
+        "config-version": 1589450000000
+    }
     """
     if connexion.request.is_json:
         body = Config.from_dict(connexion.request.get_json())  # noqa: E501
-        threshold = body.threshold
-        ping_retries = body.ping_retries
-        monitoring_period = body.monitoring_period
-
-        # we send to the rabbitMQ manager a request for each parameter that must be changed so that
-        # the request will be forwarded to the whole cluster.
-        if threshold is not None:
-            rabbitMQ_manager.set_threshold(threshold)
-        if ping_retries is not None:
-            rabbitMQ_manager.set_ping_retries(ping_retries)
-        if monitoring_period is not None:
-            rabbitMQ_manager.set_monitoring_period(monitoring_period)
+        config = {
+            "threshold": body.threshold,
+            "ping-retries": body.ping_retries,
+            "monitoring-period": body.monitoring_period,
+            "max-restarts": body.max_restarts,
+            "restart-window": body.restart_window,
+            "restart-backoff": body.restart_backoff
+        }
+
+        # we send to the rabbitMQ manager a single request with all the parameters that must be changed, so that
+        # the request will be forwarded to the whole cluster and applied by each agent at once.
+        config = {name: value for name, value in config.items() if value is not None}
+        if len(config) > 0:
+            try:
+                version = rabbitMQ_manager.update_configuration(config)
+            except ValueError as e:
+                return Response(
+                    str(e),
+                    status=400
+                )
+            return Response(
+                json.dumps({"config-version": version}),
+                status=200
+            )
     return Response(
         status=200
     )
@@ -1,7 +1,12 @@
 import json
 
+import connexion
 from flask import Response
 import swagger_server.controllers.rabbitMQ_manager as rabbitMQ_manager
+from swagger_server.controllers import codec
+
+# seconds without events after which a comment is sent to the clients of the watch endpoint
+WATCH_KEEPALIVE = 15
 
 
 def add_container(name):  # noqa: E501
@@ -27,54 +32,148 @@ def add_container(name):  # noqa: E501
     )
 
 
-def get_containers_list():  # noqa: E501
+def add_containers(body):  # noqa: E501
+    """
+    REST controller method that is triggered by a request to add a list of containers.
+    It forwards the request to the cluster, with a single message for each host.
+
+    :param body: the names of the containers to add, each containing the hostname.
+    :type body: List[str]
+    """
+    containers = rabbitMQ_manager.group_by_host(body)
+    if containers is None:
+        return Response(
+            status=400
+        )
+    rabbitMQ_manager.add_containers(containers)
+    return Response(
+        status=200
+    )
+
+
+def remove_containers(body):  # noqa: E501
+    """
+    REST controller method that is triggered by a request to remove a list of containers.
+    It forwards the request to the cluster, with a single message for each host.
+
+    :param body: the names of the containers to remove, each containing the hostname.
+    :type body: List[str]
+    """
+    containers = rabbitMQ_manager.group_by_host(body)
+    if containers is None:
+        return Response(
+            status=400
+        )
+    rabbitMQ_manager.remove_containers(containers)
+    return Response(
+        status=200
+    )
+
+
+def get_containers_status(body):  # noqa: E501
+    """get_containers_status
+
+    REST controller method that is triggered by a request for the status of a list of containers.
+    It forwards the request to the cluster, with a single message for each host, and returns a dictionary
+    with the status of each container, indexed by name.
+
+    :param body: the names of the containers of interest, each containing the hostname.
+    :type body: List[str]
+
+    :rtype: Dict[str, Container]
+    """
+    containers = rabbitMQ_manager.group_by_host(body)
+    if containers is None:
+        return Response(
+            status=400
+        )
+    return Response(
+        rabbitMQ_manager.get_containers_status(containers),
+        status=200
+    )
+
+
+def get_containers_list(max_staleness=None):  # noqa: E501
     """get_containers_list
 
     REST controller method that is triggered by a request for the list of containers.
-    It forwards the request to the cluster and returns the result.
+    It forwards the request to the cluster and returns the result. The age of the result, in seconds, is
+    returned in the Age header. The result is encoded in the columns format if the Accept header lists it.
+
+    :param max_staleness: the maximum age, in seconds, of a cached result
+    :type max_staleness: float
 
     :rtype: List[str]
     """
-    result = rabbitMQ_manager.get_containers_list()
+    columns = codec.accepts_columns(connexion.request.headers.get("Accept"))
+    result, age = rabbitMQ_manager.get_containers_list(max_staleness, columns)
     if result is None:
         return Response(
             status=500
         )
     else:
         return Response(
-            json.dumps(result),
-            status=200
+            result,
+            status=200,
+            content_type=codec.CONTENT_TYPE_COLUMNS if columns else None,
+            headers={"Age": str(int(age))}
         )
 
 
-def get_monitored_containers_status():  # noqa: E501
+def get_monitored_containers_status(max_staleness=None):  # noqa: E501
     """
 
     REST controller method that is triggered by a request for the status of all containers.
-    It forwards the request to the cluster and returns the result.
+    It forwards the request to the cluster and returns the result. The age of the result, in seconds, is
+    returned in the Age header. The result is encoded in the columns format if the Accept header lists it.
+
+    :param max_staleness: the maximum age, in seconds, of a cached result
+    :type max_staleness: float
 
     :rtype: List[Container]
     """
-    result = rabbitMQ_manager.get_container_status()
+    columns = codec.accepts_columns(connexion.request.headers.get("Accept"))
+    result, age = rabbitMQ_manager.get_container_status(max_staleness=max_staleness, columns=columns)
     if result is None:
         return Response(
             status=500
         )
     else:
         return Response(
-            json.dumps(result),
-            status=200
+            result,
+            status=200,
+            content_type=codec.CONTENT_TYPE_COLUMNS if columns else None,
+            headers={"Age": str(int(age))}
         )
 
 
-def get_monitored_container_status(name):  # noqa: E501
+def get_monitored_containers_status_stream():  # noqa: E501
+    """get_monitored_containers_status_stream
+
+    REST controller method that is triggered by a request for the streamed status of all containers.
+    It forwards the request to the cluster and streams the containers of each host, as a line of json,
+    as soon as the host answers. The last line lists the hosts that answered and the ones that timed out.
+
+    :rtype: str
+    """
+    return Response(
+        rabbitMQ_manager.stream_container_status(),
+        status=200,
+        mimetype="application/x-ndjson"
+    )
+
+
+def get_monitored_container_status(name, max_staleness=None):  # noqa: E501
     """get_monitored_container_status
 
     REST controller method that is triggered by a request for the status of one container.
-    It forwards the request to the cluster and returns the result.
+    It forwards the request to the cluster and returns the result. The age of the result, in seconds, is
+    returned in the Age header.
 
     :param name: the name of the container of interest
     :type name: str
+    :param max_staleness: the maximum age, in seconds, of a cached result
+    :type max_staleness: float
 
     :rtype: Container
     """
@@ -88,7 +187,58 @@ def get_monitored_container_status(name):  # noqa: E501
     hostname = split[0]
     container = split[1]
 
-    result = rabbitMQ_manager.get_container_status(container, hostname)
+    result, age = rabbitMQ_manager.get_container_status(container, hostname, max_staleness)
+    if result is None:
+        return Response(
+            status=404
+        )
+    return Response(
+        result,
+        status=200,
+        headers={"Age": str(int(age))}
+    )
+
+
+def get_container_history(name, to=None, step=None, **kwargs):  # noqa: E501
+    """get_container_history
+
+    REST controller method that is triggered by a request for the history of one container.
+    It returns the packet loss, round trip time, running state and restart count of the container, kept by
+    the manager from the status changes sent by the agents, in points of step seconds:
+
+    {
+        "name": "host-container",
+        "step": 60,
+        "points": [
+            {"time": 1600000000, "samples": 4, "running": 1.0, "packet_loss": 0.0, "rtt_avg_ms": 0.12,
+             "restart_count": 0},
+            ...
+        ]
+    }
+
+    :param name: the name of the container of interest
+    :type name: str
+    :param to: the end time, in seconds since the epoch, by default the current time
+    :type to: float
+    :param step: the duration of each point, in seconds, by default the finest one available
+    :type step: float
+
+    The start time, in seconds since the epoch, is the "from" query parameter, by default one hour before the
+    end time. Since from is a keyword, it is received in kwargs.
+
+    :rtype: object
+    """
+    start = kwargs.get("from", kwargs.get("from_"))
+    if step is not None and step <= 0 or start is not None and to is not None and start > to:
+        return Response(
+            status=400
+        )
+    try:
+        result = rabbitMQ_manager.get_container_history(name, start, to, step)
+    except ValueError:
+        return Response(
+            status=400
+        )
     if result is None:
         return Response(
             status=404
@@ -121,3 +271,40 @@ def remove_container(name):  # noqa: E501
     return Response(
         status=200
     )
+
+
+def watch_containers(host=None, container=None):  # noqa: E501
+    """watch_containers
+
+    REST controller method that is triggered by a request to watch the state changes of the containers.
+    It streams the changes as Server-Sent Events, as they are reported by the agents: containers started
+    or stopped, restarted, added or removed, and whose packet loss crossed the threshold. If the client
+    reads slowly, some events are dropped and a "dropped" event tells how many. A comment is sent every
+    WATCH_KEEPALIVE seconds without events, so that the proxies keep the connection open.
+
+    :param host: the hosts whose containers are watched. If empty, all the hosts are watched.
+    :type host: List[str]
+    :param container: the containers to watch, containing the hostname. If empty, all the containers are watched.
+    :type container: List[str]
+
+    :rtype: str
+    """
+    subscription = rabbitMQ_manager.watch_hub.subscribe(host, container)
+
+    def stream():
+        try:
+            while True:
+                events = subscription.get(WATCH_KEEPALIVE)
+                if len(events) == 0:
+                    yield ": keepalive\n\n"
+                for event in events:
+                    yield "event: " + event["type"] + "\ndata: " + json.dumps(event) + "\n\n"
+        finally:
+            rabbitMQ_manager.watch_hub.unsubscribe(subscription)
+
+    return Response(
+        stream(),
+        status=200,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
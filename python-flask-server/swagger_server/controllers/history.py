@@ -0,0 +1,263 @@
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# resolutions of the history: the step of the buckets, in seconds, and the number of buckets kept in each
+# tier. By default the last 2 minutes are kept per second, the last 2 hours per minute and the last 2 days
+# per hour.
+TIERS = ((1, 120), (60, 120), (3600, 48))
+
+# maximum number of points returned by a query
+MAX_POINTS = 10000
+
+
+class HistoryTier:
+    """
+      History of the containers at one resolution. Each container has a row of buckets used as a ring buffer:
+      the bucket of a time is at the position of its bucket number modulo the number of buckets, and the
+      bucket number saved in it tells whether it holds that time or an older one. The buckets of all the
+      containers are stored in a few flat arrays, one for each aggregated value, so that the memory they
+      take only depends on the number of rows.
+    """
+
+    # typecode of each array and the largest value of the counters
+    TYPECODES = (("buckets", "I"), ("samples", "H"), ("running", "H"), ("loss_sum", "f"), ("loss_samples", "H"),
+                 ("rtt_sum", "f"), ("rtt_samples", "H"), ("restarts", "I"))
+    MAX_SAMPLES = 65535
+
+    def __init__(self, step: int, size: int) -> None:
+        """
+          :param step: the duration of a bucket, in seconds
+          :param size: the number of buckets of each container
+        """
+        self.step = step
+        self.size = size
+        for name, typecode in self.TYPECODES:
+            setattr(self, name, array(typecode))
+
+    def span(self) -> int:
+        """
+          Returns the number of seconds covered by the buckets of a container.
+        """
+        return self.step * self.size
+
+    def row_bytes(self) -> int:
+        """
+          Returns the memory taken by the buckets of a container, in bytes.
+        """
+        return sum(getattr(self, name).itemsize for name, _ in self.TYPECODES) * self.size
+
+    def add_row(self) -> None:
+        for name, _ in self.TYPECODES:
+            values = getattr(self, name)
+            values.frombytes(bytes(values.itemsize * self.size))
+
+    def clear_row(self, row: int) -> None:
+        start = row * self.size
+        for i in range(start, start + self.size):
+            self.buckets[i] = 0
+
+    def add(self, row: int, timestamp: float, loss: Optional[float], rtt: Optional[float], running: Optional[bool],
+            restarts: Optional[int]) -> None:
+        """
+          Adds a sample of the status of a container to the bucket of its time.
+
+          :param row: the row of the container
+          :param timestamp: the time of the sample, in seconds since the epoch
+          :param loss: the packet loss of the container, or None
+          :param rtt: the average round trip time to the container, in milliseconds, or None
+          :param running: whether the container is running, or None
+          :param restarts: the restart count of the container, or None
+        """
+        bucket = int(timestamp // self.step)
+        i = row * self.size + bucket % self.size
+        if self.buckets[i] != bucket:
+            self.buckets[i] = bucket
+            self.samples[i] = self.running[i] = self.loss_samples[i] = self.rtt_samples[i] = self.restarts[i] = 0
+            self.loss_sum[i] = self.rtt_sum[i] = 0.0
+        if self.samples[i] == self.MAX_SAMPLES:
+            return
+        self.samples[i] += 1
+        if running:
+            self.running[i] += 1
+        if loss is not None:
+            self.loss_sum[i] += loss
+            self.loss_samples[i] += 1
+        if rtt is not None:
+            self.rtt_sum[i] += rtt
+            self.rtt_samples[i] += 1
+        if restarts is not None:
+            self.restarts[i] = max(self.restarts[i], restarts)
+
+    def bucket(self, row: int, bucket: int) -> Optional[Tuple[int, int, float, int, float, int, int]]:
+        """
+          Returns the aggregated values of a bucket of a container, or None if it holds no sample.
+
+          :param row: the row of the container
+          :param bucket: the bucket number, that is, the time of the bucket divided by the step
+        """
+        i = row * self.size + bucket % self.size
+        if self.buckets[i] != bucket or self.samples[i] == 0:
+            return None
+        return (self.samples[i], self.running[i], self.loss_sum[i], self.loss_samples[i], self.rtt_sum[i],
+                self.rtt_samples[i], self.restarts[i])
+
+
+class History:
+    """
+      Fixed-memory history of the status of the containers: packet loss, round trip time, running state and
+      restart count. Each sample is added to every tier, so that each tier downsamples the samples into its
+      own buckets. At most max_containers containers are kept: when a new container needs a row and there is
+      none left, the row of the container updated least recently is reused.
+    """
+
+    def __init__(self, max_containers: int = 10000, tiers: Tuple[Tuple[int, int], ...] = TIERS) -> None:
+        """
+          :param max_containers: the maximum number of containers with a history
+          :param tiers: the step, in seconds, and the number of buckets of each tier, from the finest one
+        """
+        self.max_containers = max_containers
+        self.tiers = [HistoryTier(step, size) for step, size in tiers]
+        self.lock = threading.Lock()
+        # row of each container, time of its last sample and time it stopped being monitored, if it did
+        self.rows = {}  # type: Dict[str, int]
+        self.updated = {}  # type: Dict[str, float]
+        self.stopped = {}  # type: Dict[str, float]
+
+    def record(self, name: str, timestamp: float, status: Dict[str, Any]) -> None:
+        """
+          Adds a sample of the status of a container.
+
+          :param name: the name of the container
+          :param timestamp: the time of the sample, in seconds since the epoch
+          :param status: the status of the container, as sent by its agent
+        """
+        loss = status.get("window_loss")
+        if loss is None:
+            loss = status.get("packet_loss")
+        with self.lock:
+            row = self.rows.get(name)
+            if row is None:
+                row = self.new_row(name)
+            self.updated[name] = timestamp
+            self.stopped.pop(name, None)
+            for tier in self.tiers:
+                tier.add(row, timestamp, loss, status.get("rtt_avg_ms"), status.get("running"),
+                         status.get("restart_count"))
+
+    def stop(self, name: str, timestamp: float) -> None:
+        """
+          Records that a container is no longer monitored. Its history is kept, but it does not go on after
+          this time.
+
+          :param name: the name of the container
+          :param timestamp: the time the container stopped being monitored, in seconds since the epoch
+        """
+        with self.lock:
+            if name in self.rows:
+                self.stopped[name] = timestamp
+
+    def new_row(self, name: str) -> int:
+        """
+          Returns a row for a new container: a new one, or the one of the container updated least recently.
+          Must be called holding the lock.
+        """
+        if len(self.rows) < self.max_containers:
+            row = len(self.rows)
+            for tier in self.tiers:
+                tier.add_row()
+        else:
+            oldest = min(self.updated, key=self.updated.get)
+            row = self.rows.pop(oldest)
+            del self.updated[oldest]
+            self.stopped.pop(oldest, None)
+            for tier in self.tiers:
+                tier.clear_row(row)
+        self.rows[name] = row
+        return row
+
+    def query(self, name: str, start: float, end: float, step: float = None) -> Optional[Dict[str, Any]]:
+        """
+          Returns the history of a container between two times, or None if it has none. The history is read
+          from the finest tier that covers the start time with buckets not longer than the step, and its
+          buckets are merged into points of step seconds. Since the agents only send the status of a container
+          when it changes, a point without samples repeats the values of the previous one, up to the current
+          time or until the container stopped being monitored. Raises a ValueError if there would be more than
+          MAX_POINTS points.
+
+          :param name: the name of the container
+          :param start: the start time, in seconds since the epoch
+          :param end: the end time, in seconds since the epoch
+          :param step: the duration of each point, in seconds, or None for the step of the tier
+        """
+        now = time.time()
+        with self.lock:
+            row = self.rows.get(name)
+            if row is None:
+                return None
+            stopped = self.stopped.get(name, now)
+            tier = self.tier_for(now, start, step)
+            # each point covers a whole number of buckets
+            buckets_per_point = max(1, int((step or tier.step) // tier.step))
+            first = int(start // tier.step) // buckets_per_point * buckets_per_point
+            last = int(end // tier.step)
+            if (last - first) // buckets_per_point + 1 > MAX_POINTS:
+                raise ValueError("The history would have more than " + str(MAX_POINTS) + " points")
+
+            # The values before the first point are the last ones sampled before it, if the tier still has them.
+            previous = None
+            for bucket in range(first - 1, max(first - tier.size, 0), -1):
+                values = tier.bucket(row, bucket)
+                if values is not None:
+                    previous = merge_buckets([values])
+                    break
+
+            points = []
+            for point in range(first, last + 1, buckets_per_point):
+                point_time = point * tier.step
+                values = [tier.bucket(row, bucket) for bucket in range(point, point + buckets_per_point)]
+                values = [value for value in values if value is not None]
+                if len(values) > 0:
+                    previous = merge_buckets(values)
+                    points.append(dict(previous, time=point_time))
+                elif previous is not None and point_time <= stopped:
+                    points.append(dict(previous, time=point_time, samples=0))
+                else:
+                    points.append(dict(EMPTY_POINT, time=point_time))
+            return {"name": name, "step": tier.step * buckets_per_point, "points": points}
+
+    def tier_for(self, now: float, start: float, step: Optional[float]) -> HistoryTier:
+        """
+          Returns the finest tier that covers the start time with buckets not longer than the step, or the
+          coarsest one if none does.
+        """
+        for tier in self.tiers:
+            if (step is None or tier.step <= step) and start > now - tier.span():
+                return tier
+        return self.tiers[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"history-containers": len(self.rows),
+                    "history-bytes": len(self.rows) * sum(tier.row_bytes() for tier in self.tiers)}
+
+
+# point of the history without any sample
+EMPTY_POINT = {"samples": 0, "running": None, "packet_loss": None, "rtt_avg_ms": None, "restart_count": None}
+
+
+def merge_buckets(buckets: List[Tuple[int, int, float, int, float, int, int]]) -> Dict[str, Any]:
+    """
+      Merges the aggregated values of some buckets into a point of the history: the number of samples, the
+      fraction of them in which the container was running, the average packet loss and round trip time and
+      the highest restart count.
+    """
+    samples = sum(bucket[0] for bucket in buckets)
+    loss_samples = sum(bucket[3] for bucket in buckets)
+    rtt_samples = sum(bucket[5] for bucket in buckets)
+    return {"samples": samples,
+            "running": round(sum(bucket[1] for bucket in buckets) / samples, 3),
+            "packet_loss": round(sum(bucket[2] for bucket in buckets) / loss_samples, 3) if loss_samples > 0 else None,
+            "rtt_avg_ms": round(sum(bucket[4] for bucket in buckets) / rtt_samples, 3) if rtt_samples > 0 else None,
+            "restart_count": max(bucket[6] for bucket in buckets)}
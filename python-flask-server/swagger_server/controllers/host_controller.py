@@ -0,0 +1,19 @@
+import json
+
+from flask import Response
+import swagger_server.controllers.rabbitMQ_manager as rabbitMQ_manager
+
+
+def get_hosts():  # noqa: E501
+    """get_hosts
+
+    REST controller method that is triggered by a request for the hosts of the cluster.
+    It returns the hosts known from the heartbeats of their agents, each one with the content of its last
+    heartbeat and whether it is alive.
+
+    :rtype: List[Host]
+    """
+    return Response(
+        json.dumps(rabbitMQ_manager.get_hosts()),
+        status=200
+    )
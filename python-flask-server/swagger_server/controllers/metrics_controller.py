@@ -0,0 +1,20 @@
+import json
+
+from flask import Response
+import swagger_server.controllers.rabbitMQ_manager as rabbitMQ_manager
+
+
+def get_metrics():  # noqa: E501
+    """get_metrics
+
+    REST controller method that is triggered by a request for the metrics of the manager.
+    It returns a dictionary with the counters of the manager, for example the number of broadcasts sent
+    to the agents and the number of requests that shared a broadcast already in flight, and with the
+    statistics of the compression of the messages.
+
+    :rtype: object
+    """
+    return Response(
+        json.dumps(rabbitMQ_manager.get_metrics()),
+        status=200
+    )
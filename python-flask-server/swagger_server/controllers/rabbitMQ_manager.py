@@ -1,15 +1,25 @@
 import json
+import queue
 import sys
 import threading
 import time
 import uuid
-from typing import List, Any, Callable, Optional
+import zlib
+from collections import OrderedDict
+from typing import List, Any, Callable, Dict, Iterator, Optional, Tuple
 
 import pika as pika
 
-# Number of hosts in the cluster
+from swagger_server.controllers import codec
+from swagger_server.controllers.history import History
+from swagger_server.controllers.watch_hub import WatchHub
+
+# Number of hosts in the cluster, expected to answer the broadcasts until the first heartbeat is received
 HOSTS = 3
 
+# Seconds after the last heartbeat of a host after which the host is considered down
+HOST_EXPIRY = 15
+
 # Maximum time, in seconds, to wait when expecting to receive responses by the agents after
 # sending a request
 TIMEOUT = 4
@@ -18,7 +28,9 @@ TIMEOUT = 4
 topics_list = [
     "status_response",
     "containers_list_response",
-    "config_response"
+    "config_response",
+    "status_delta",
+    "heartbeat"
 ]
 
 # dictionaries for aggregating the responses of the various hosts, when a request for all the hosts is sent
@@ -32,6 +44,79 @@ containers_list_responses_lock = threading.Lock()
 status_responses_lock = threading.Lock()
 config_responses_lock = threading.Lock()
 
+# materialized view of the status of the monitored containers, built from the status deltas sent by the agents.
+# It is indexed by hostname, and for each host it contains the sequence number of the last delta applied, the
+# time it was received and the status of its containers, indexed by container name. The status dictionaries are
+# replaced, never modified. The hosts whose heartbeats expired are dropped from the view.
+cluster_view = {}
+cluster_view_lock = threading.Lock()
+
+# registry of the hosts of the cluster, indexed by hostname, built from the heartbeats sent by the agents.
+# For each host it contains the content of its last heartbeat and the time it was received.
+hosts = {}
+hosts_lock = threading.Lock()
+
+# reads of the whole cluster in flight, indexed by the key of the read, and number of requests served by a read
+# already in flight instead of sending their own broadcast
+inflight_reads = {}
+inflight_reads_lock = threading.Lock()
+coalesced_requests = 0
+broadcasts = 0
+
+# cache of the results of the reads of the cluster, indexed by the key of the read, with the time each result
+# was read. It holds at most CACHE_SIZE results, evicting the least recently used. By default a result is
+# served from the cache for CACHE_TTL seconds, depending on the kind of read. The generation is incremented
+# by the writes, so that a read in flight during a write does not fill the cache with an outdated result.
+CACHE_SIZE = 256
+CACHE_TTL = {"status": 2, "container_list": 5, "config": 30}
+# last element of the keys of the reads whose result is encoded in the columns format
+COLUMNS = "columns"
+read_cache = OrderedDict()
+read_cache_lock = threading.Lock()
+cache_generation = 0
+cache_hits = 0
+
+# hub that distributes the state changes of the containers, found applying the status deltas, to the
+# clients of the watch endpoint, and the default packet loss threshold of the agents
+watch_hub = WatchHub()
+DEFAULT_THRESHOLD = 60.0
+
+# history of the status of each container, fed by the status deltas
+history = History()
+
+# time of the last resync request sent to each host whose deltas were lost, and minimum seconds between
+# two resync requests to the same host
+resync_requests = {}
+RESYNC_INTERVAL = TIMEOUT
+
+# configuration requested to the agents and its version. Each update is merged into the requested configuration,
+# which is always sent as a whole, so that an agent that missed an update catches up with the next one. The
+# version is the time of the update, in milliseconds, so that it keeps increasing across restarts of the manager.
+# The configuration acknowledged by each host, taken from its heartbeats, is kept in the registry of the hosts.
+# A host whose heartbeats show an older version gets the configuration again, at most every CONFIG_RESEND_INTERVAL
+# seconds.
+requested_config = {}
+config_version = 0
+config_lock = threading.Lock()
+config_resends = {}
+CONFIG_RESEND_INTERVAL = HOST_EXPIRY
+
+# checks of the values of the configuration parameters, the same that the agents apply
+CONFIG_CHECKS = {
+    "threshold": lambda value: 0 <= float(value) <= 100,
+    "ping-retries": lambda value: int(value) >= 0,
+    "monitoring-period": lambda value: int(value) >= 0,
+    "max-restarts": lambda value: int(value) > 0,
+    "restart-window": lambda value: int(value) > 0,
+    "restart-backoff": lambda value: float(value) >= 0
+}
+
+# compression of the messages: the bodies larger than COMPRESSION_THRESHOLD bytes are compressed when all the
+# agents alive announced in their heartbeats that they can decompress them. The compressed messages received
+# are decompressed whatever the threshold.
+COMPRESSION_THRESHOLD = 8192
+compressor = codec.Compressor(COMPRESSION_THRESHOLD)
+
 # ip address of the host running the rabbitMQ broker
 rabbitMQ_broker_address = '172.16.3.170'
 
@@ -40,6 +125,24 @@ def broker_callback(channel, method, properties, body) -> None:
     """
       Callback method for all messages received.
     """
+    topic = method.routing_key
+
+    # The agents compress the large messages, marking them with their content encoding. A message that cannot
+    # be decompressed is dropped: raising the error here would stop the consumption of all the messages.
+    if body is not None and properties is not None:
+        try:
+            body = compressor.decompress(body, properties.content_encoding)
+        except (ValueError, zlib.error) as e:
+            print("Dropped message on topic " + topic + ": " + str(e), file=sys.stderr)
+            return
+
+    # The agents can send the responses with lists of containers as json fragments, with the token in the headers
+    # of the message. The fragments are not decoded: they are joined as they are into the response to the client.
+    headers = properties.headers if properties is not None and properties.headers is not None else {}
+    if headers.get("format") == "fragment":
+        add_fragment(topic, headers["token"], body, headers.get("host"), properties.content_type)
+        print("Received fragment on topic " + topic + ", " + str(len(body)) + " bytes", file=sys.stderr)
+        return
 
     # We decode the message and parse it from json format.
     if body is None:
@@ -48,7 +151,6 @@ def broker_callback(channel, method, properties, body) -> None:
         response = json.loads(body.decode())
 
     # We check the topic of the message, on which the actions to be done depend.
-    topic = method.routing_key
     if topic == "containers_list_response":
         # this topic means that the message is a response to a request for the complete list of
         # containers running on the cluster. This response comes from one of the hosts in the cluster.
@@ -63,7 +165,7 @@ def broker_callback(channel, method, properties, body) -> None:
                 if "containers" in response and token in containers_list_responses:
                     # the list of containers name is appended to the correct entry of the containers_list_responses
                     # dictionary
-                    containers_list_responses[token].append(response["containers"])
+                    containers_list_responses[token].add(response["containers"])
 
     if topic == "status_response":
         # a message with this topic is received in two cases only: when the message is a response to a request
@@ -86,14 +188,14 @@ def broker_callback(channel, method, properties, body) -> None:
                     # of the status_responses dictionary
                     values = response["containers"].values()
                     values_list = list(values)
-                    status_responses[token].append(values_list)
+                    status_responses[token].add(values_list, response.get("host"))
 
                 elif "container" in response and token in status_responses:
                     # if the response contains a "container" field, then it is a response to the request of
                     # the status of a specific monitored container in the cluster. We append the
                     # dictionary, containing the data about one of the containers to the correct entry
                     # of the status_responses dictionary
-                    status_responses[token].append(response["container"])
+                    status_responses[token].add(response["container"])
 
     if topic == "config_response":
         # this topic means that the message is a response to a request for the configuration
@@ -110,8 +212,66 @@ def broker_callback(channel, method, properties, body) -> None:
                     # the dictionary, containing the current configuration of one agent,
                     # is appended to the correct entry of the config_responses
                     # dictionary
-                    config_responses[token].append(response["config"])
-    print("Received command on topic " + method.routing_key + ", body: " + str(response), file=sys.stderr)
+                    config_responses[token].add(response["config"])
+
+    if topic == "status_delta":
+        # this topic means that the message contains the changes in the status of the containers monitored
+        # on a host, or a full checkpoint of their status. It is applied to the cluster view.
+        apply_status_delta(response)
+
+    if topic == "heartbeat":
+        # this topic means that the message is the periodic heartbeat of an agent. It is saved in the registry
+        # of the hosts.
+        register_heartbeat(response)
+    print("Received command on topic " + topic + ", " + str(len(body) if body is not None else 0) + " bytes",
+          file=sys.stderr)
+
+
+def add_fragment(topic: str, token: str, fragment: bytes, host: str = None, content_type: str = None) -> None:
+    """
+      Adds a response sent as a fragment to the request it answers. The json fragments are added as they are.
+      A fragment in the columns format, only sent to the requests of the clients that accept that format, is
+      decoded into the list it contains, that is encoded again with the other responses into a single columns
+      payload.
+
+      :param topic: the topic of the response
+      :param token: the token of the request
+      :param fragment: the encoding of the list of containers, or of the container, in the response
+      :param host: the name of the host that sent the response
+      :param content_type: the content type of the fragment, json if None
+    """
+    if content_type is not None and content_type != codec.CONTENT_TYPE_JSON:
+        fragment = codec.decode(fragment, content_type)
+
+    if topic == "containers_list_response":
+        merge_dictionary, lock = containers_list_responses, containers_list_responses_lock
+    elif topic == "status_response":
+        merge_dictionary, lock = status_responses, status_responses_lock
+    else:
+        return
+
+    with lock:
+        if token in merge_dictionary:
+            merge_dictionary[token].add(fragment, host)
+
+
+def join_fragments(responses: List[Any], brackets: bytes = b"[]") -> bytes:
+    """
+      Joins the responses containing json lists into the json encoding of a single list, in linear time.
+      Each response can be a json fragment, as sent by the agents, or a list decoded from a json response.
+      Responses containing json objects are joined into a single object in the same way.
+
+      :param responses: the responses to join
+      :param brackets: the brackets of the result: b"[]" for lists, b"{}" for objects
+    """
+    items = []
+    for response in responses:
+        fragment = response if isinstance(response, bytes) else json.dumps(response).encode()
+        # We drop the brackets of each list, and the empty ones.
+        fragment = fragment.strip()[1:-1].strip()
+        if len(fragment) > 0:
+            items.append(fragment)
+    return brackets[:1] + b", ".join(items) + brackets[1:]
 
 
 def initialize_communication(broker: str, topics: List[str], callback: Any = None) -> None:
@@ -145,13 +305,25 @@ def initialize_communication(broker: str, topics: List[str], callback: Any = Non
     threading.Thread(target=channel.start_consuming).start()
 
 
-def send_message(broker: str, topic: str, body: Any) -> None:
+def send_message(broker: str, topic: str, body: Any, accept: str = codec.CONTENT_TYPE_JSON) -> None:
     """
       Opens a connection with a rabbitMQ broker to send a message, then closes the connection.
 
       :param broker: the ip address of the broker
       :param topic: the topic related to the message
       :param body: the content of the message body
+      :param accept: the content types accepted in the responses, separated by commas
+    """
+    send_messages(broker, [(topic, body)], accept)
+
+
+def send_messages(broker: str, messages: List[Tuple[str, Any]], accept: str = codec.CONTENT_TYPE_JSON) -> None:
+    """
+      Opens a connection with a rabbitMQ broker to send some messages, then closes the connection.
+
+      :param broker: the ip address of the broker
+      :param messages: the topic and the content of the body of each message
+      :param accept: the content types accepted in the responses, separated by commas
     """
     # We open the connection with a rabbitMQ broker.
     connection = pika.BlockingConnection(
@@ -159,14 +331,232 @@ def send_message(broker: str, topic: str, body: Any) -> None:
     channel = connection.channel()
     channel.exchange_declare(exchange="topics", exchange_type="topic")
 
-    # We encode the message in json format (needed since we sometimes need to send complex
-    # objects like dictionaries and lists). We then encode the message in bytes and send it with the topic
-    # provided as parameter, closing the connection at the end.
-    message = json.dumps(body).encode()
-    channel.basic_publish(exchange="topics", routing_key=topic, body=message)
+    # We encode each message in json format (needed since we sometimes need to send complex
+    # objects like dictionaries and lists). We then encode the message in bytes and send it with its topic,
+    # closing the connection at the end. The accept header tells the agents whether the lists in their responses
+    # can be encoded in the columns format, which is only asked for the clients that accept it, since the json
+    # fragments are forwarded to the clients without decoding them. The accept-encoding header tells the agents
+    # that their messages can be compressed. Older agents ignore both and answer in json, uncompressed.
+    headers = {"accept": accept, "accept-encoding": codec.CONTENT_ENCODING_DEFLATE}
+    compress = agents_accept_compression()
+    for topic, body in messages:
+        message = json.dumps(body).encode()
+        content_encoding = None
+        if compress:
+            message, content_encoding = compressor.compress(message)
+        properties = pika.BasicProperties(content_type=codec.CONTENT_TYPE_JSON, content_encoding=content_encoding,
+                                          headers=headers)
+        channel.basic_publish(exchange="topics", routing_key=topic, body=message, properties=properties)
     connection.close()
 
 
+def register_heartbeat(heartbeat: dict) -> None:
+    """
+      Saves the heartbeat of an agent in the registry of the hosts.
+
+      If the host acknowledges an older version of the configuration than the requested one, and it did not
+      reject the requested one, the requested configuration is sent to it again.
+
+      :param heartbeat: the heartbeat, containing the host name, the version of the agent, the number of
+                        containers it monitors, the load of the host, its configuration with its version and
+                        the counters of the agent
+    """
+    name = heartbeat["name"]
+    now = time.time()
+    # the lock is used to ensure mutual exclusion while manipulating the hosts dictionary
+    with hosts_lock:
+        if name not in hosts:
+            print("Host " + name + " joined the cluster", file=sys.stderr)
+        hosts[name] = {"name": name,
+                       "version": heartbeat.get("version"),
+                       "containers": heartbeat.get("containers"),
+                       "load": heartbeat.get("load"),
+                       "config-version": heartbeat.get("config-version"),
+                       "config": heartbeat.get("config"),
+                       "rejected-config": heartbeat.get("rejected-config"),
+                       "metrics": heartbeat.get("metrics"),
+                       "accept-encoding": heartbeat.get("accept-encoding"),
+                       "last-seen": now}
+
+    # agents that do not send their configuration in the heartbeats do not support versioned configurations
+    if heartbeat.get("config") is None:
+        return
+    rejected_version = (heartbeat.get("rejected-config") or {}).get("version", 0)
+    with config_lock:
+        if max(heartbeat.get("config-version", 0), rejected_version) >= config_version or \
+                now - config_resends.get(name, 0) < CONFIG_RESEND_INTERVAL:
+            return
+        config_resends[name] = now
+        message = {"version": config_version, "config": dict(requested_config)}
+    print("Host " + name + " lags behind configuration version " + str(message["version"]), file=sys.stderr)
+    send_message(rabbitMQ_broker_address, name + "set_config", message)
+
+
+def get_hosts() -> List[dict]:
+    """
+      Returns the hosts that sent at least one heartbeat, each one with the content of its last heartbeat,
+      including the counters of the agent, the time it was received and whether the host is alive, that is,
+      whether the heartbeat was received less than HOST_EXPIRY seconds ago.
+    """
+    now = time.time()
+    with hosts_lock:
+        return [dict({key: value for key, value in host.items()
+                      if key not in ("config", "rejected-config", "accept-encoding")},
+                     alive=now - host["last-seen"] <= HOST_EXPIRY) for host in hosts.values()]
+
+
+def expected_hosts() -> int:
+    """
+      Returns the number of hosts expected to answer a broadcast: the hosts alive according to their
+      heartbeats, or HOSTS if no heartbeat was received yet.
+    """
+    now = time.time()
+    with hosts_lock:
+        if len(hosts) == 0:
+            return HOSTS
+        return sum(1 for host in hosts.values() if now - host["last-seen"] <= HOST_EXPIRY)
+
+
+def agents_accept_compression() -> bool:
+    """
+      Tells whether all the hosts alive announced in their heartbeats that they can decompress the messages.
+      It is False until the first heartbeat is received.
+    """
+    now = time.time()
+    with hosts_lock:
+        alive = [host for host in hosts.values() if now - host["last-seen"] <= HOST_EXPIRY]
+        return len(alive) > 0 and all(codec.accepts_deflate(host["accept-encoding"]) for host in alive)
+
+
+def apply_status_delta(delta: dict) -> None:
+    """
+      Applies a status delta sent by an agent to the cluster view. A full checkpoint replaces the view of
+      the host. A delta is only applied if it directly follows the last one applied for the host: otherwise
+      some deltas were lost, and a resync is requested to the host, which will answer with a full checkpoint.
+
+      :param delta: the delta, containing the host name, the sequence number, whether it is a full checkpoint,
+                    the status of the changed containers indexed by name and the names of the removed ones
+    """
+    host = delta["host"]
+    seq = delta["seq"]
+    resync = False
+    applied = False
+    removed = []
+    events = []
+
+    # the lock is used to ensure mutual exclusion while manipulating the cluster_view dictionary
+    with cluster_view_lock:
+        view = cluster_view.get(host)
+        if delta["full"]:
+            cluster_view[host] = {"seq": seq, "updated": time.time(), "containers": delta["containers"]}
+            resync_requests.pop(host, None)
+            applied = True
+            if view is not None:
+                removed = [name for name in view["containers"] if name not in delta["containers"]]
+                events = container_events(host, view["containers"], delta["containers"],
+                                          delta.get("threshold", DEFAULT_THRESHOLD))
+        elif view is not None and seq == view["seq"] + 1:
+            # We build a new dictionary instead of updating the current one, so that the readers that took
+            # the current one are not affected.
+            containers = dict(view["containers"])
+            containers.update(delta["containers"])
+            for name in delta["removed"]:
+                containers.pop(name, None)
+            cluster_view[host] = {"seq": seq, "updated": time.time(), "containers": containers}
+            applied = True
+            removed = delta["removed"]
+            events = container_events(host, view["containers"], containers,
+                                      delta.get("threshold", DEFAULT_THRESHOLD))
+        elif view is None or seq > view["seq"]:
+            # We request a resync at most once every RESYNC_INTERVAL seconds, in case the request or its
+            # answer is lost too. The deltas received meanwhile are ignored.
+            now = time.time()
+            if now - resync_requests.get(host, 0) > RESYNC_INTERVAL:
+                resync_requests[host] = now
+                resync = True
+
+    if resync:
+        print("Lost status deltas of " + host + ", requesting a resync", file=sys.stderr)
+        send_message(rabbitMQ_broker_address, host + "resync", None)
+    if applied:
+        now = time.time()
+        for name, status in delta["containers"].items():
+            history.record(name, now, status)
+        for name in removed:
+            history.stop(name, now)
+    watch_hub.publish(events)
+
+
+def expire_views() -> None:
+    """
+      Drops from the cluster view the hosts whose last heartbeat, or last status delta if they never sent a
+      heartbeat, was received more than HOST_EXPIRY seconds ago, so that the containers of a host that is down
+      are not reported with their last known status. The history of their containers is stopped.
+    """
+    now = time.time()
+    with hosts_lock:
+        last_seen = {name: host["last-seen"] for name, host in hosts.items()}
+    with cluster_view_lock:
+        expired = {host: view for host, view in cluster_view.items()
+                   if now - last_seen.get(host, view["updated"]) > HOST_EXPIRY}
+        for host in expired:
+            del cluster_view[host]
+    for host, view in expired.items():
+        print("Host " + host + " expired, dropping it from the cluster view", file=sys.stderr)
+        for name in view["containers"]:
+            history.stop(name, now)
+
+
+def container_events(host: str, old: dict, new: dict, threshold: float) -> List[dict]:
+    """
+      Compares the status of the containers of a host before and after a delta, and returns the state changes:
+      containers added or removed, started or stopped, restarted, and whose packet loss went over or under the
+      threshold.
+
+      :param host: the name of the host
+      :param old: the status of the containers before the delta, indexed by name
+      :param new: the status of the containers after the delta, indexed by name
+      :param threshold: the packet loss threshold of the host
+    """
+    now = time.time()
+    events = []
+
+    def event(event_type: str, name: str, status: Optional[dict], **fields) -> None:
+        events.append(dict({"type": event_type, "host": host, "container": name, "time": now, "status": status},
+                           **fields))
+
+    for name, status in new.items():
+        previous = old.get(name)
+        if previous is None:
+            event("added", name, status)
+            continue
+        if previous is status:
+            continue
+        if previous.get("running") != status.get("running"):
+            event("running", name, status, previous=previous.get("running"), current=status.get("running"))
+        if previous.get("started_at") is not None and previous.get("started_at") != status.get("started_at"):
+            event("restarted", name, status, restart_count=status.get("restart_count"))
+        previous_loss = loss_of(previous)
+        loss = loss_of(status)
+        if previous_loss is not None and loss is not None and (previous_loss > threshold) != (loss > threshold):
+            event("loss-above-threshold" if loss > threshold else "loss-below-threshold", name, status,
+                  loss=loss, threshold=threshold)
+    for name in old:
+        if name not in new:
+            event("removed", name, None)
+    return events
+
+
+def loss_of(status: dict) -> Optional[float]:
+    """
+      Returns the packet loss of a container on which its restarts are decided: the loss over its window of
+      packets, or the loss of its last probe for the agents that do not report the window.
+    """
+    if status.get("window_loss") is not None:
+        return status["window_loss"]
+    return status.get("packet_loss")
+
+
 def add_container(container_name: str, hostname: str) -> None:
     """
           Sends a message to a agent and requests that a container is added to the
@@ -178,6 +568,7 @@ def add_container(container_name: str, hostname: str) -> None:
     # prepends the name of the agent's host to the topic, to use the topic of that specific
     # host and avoid sending the message to all agents.
     send_message(rabbitMQ_broker_address, hostname + "add_container", container_name)
+    invalidate_cache(("status", None, None), ("status", None, None, COLUMNS), ("status", container_name, hostname))
 
 
 def remove_container(container_name: str, hostname: str) -> None:
@@ -191,149 +582,474 @@ def remove_container(container_name: str, hostname: str) -> None:
     # prepends the name of the agent's host to the topic, to use the topic of that specific
     # host and avoid sending the message to all agents.
     send_message(rabbitMQ_broker_address, hostname + "remove_container", container_name)
+    invalidate_cache(("status", None, None), ("status", None, None, COLUMNS), ("status", container_name, hostname))
 
 
-def set_threshold(threshold: float) -> None:
+def group_by_host(names: List[str]) -> Optional[Dict[str, List[str]]]:
+    """
+      Groups the names of some containers by the host on which they run. Returns the names of the containers
+      on each host, without the hostname, or None if a name is not in the correct format: the hostname,
+      followed by a dash (-) followed by the container name.
+
+      :param names: the names of the containers, containing the hostname
+    """
+    containers = {}
+    for name in names:
+        split = name.split("-", 2)
+        if len(split) != 2:
+            return None
+        containers.setdefault(split[0], []).append(split[1])
+    return containers
+
+
+def add_containers(containers: Dict[str, List[str]]) -> None:
+    """
+      Sends a message to each agent involved and requests that a list of containers is added to the
+      monitored containers. All the messages are sent on a single connection.
+
+      :param containers: the names of the containers to add, indexed by the name of the host on which they run
+    """
+    send_messages(rabbitMQ_broker_address, [(hostname + "add_container", names)
+                                            for hostname, names in containers.items()])
+    invalidate_cache(("status", None, None), ("status", None, None, COLUMNS), *[("status", name, hostname)
+                                               for hostname, names in containers.items() for name in names])
+
+
+def remove_containers(containers: Dict[str, List[str]]) -> None:
+    """
+      Sends a message to each agent involved and requests that a list of containers is removed from the
+      monitored containers. All the messages are sent on a single connection.
+
+      :param containers: the names of the containers to remove, indexed by the name of the host on which they run
+    """
+    send_messages(rabbitMQ_broker_address, [(hostname + "remove_container", names)
+                                            for hostname, names in containers.items()])
+    invalidate_cache(("status", None, None), ("status", None, None, COLUMNS), *[("status", name, hostname)
+                                               for hostname, names in containers.items() for name in names])
+
+
+def update_configuration(config: Dict[str, Any]) -> int:
+    """
+      Merges new values of the configuration parameters into the requested configuration and sends it,
+      with a new version, to all agents in a single message. Each agent applies all the parameters
+      at once, and acknowledges the version in its heartbeats. Returns the new version. Raises a ValueError,
+      without sending anything, if a parameter is unknown or its value is not valid.
+
+      :param config: the new value of each parameter to change, indexed by the name of the parameter
+    """
+    global config_version
+
+    # A value that the agents reject would stay in the requested configuration, sent with every later update.
+    for name, value in config.items():
+        try:
+            valid = CONFIG_CHECKS[name](value)
+        except KeyError:
+            raise ValueError("Unknown configuration parameter " + name)
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise ValueError("Invalid value of " + name + ": " + str(value))
+
+    with config_lock:
+        requested_config.update(config)
+        config_version = max(config_version + 1, int(time.time() * 1000))
+        message = {"version": config_version, "config": dict(requested_config)}
+    # the agents ignore a version older than the one they applied, so two updates sent out of order are harmless
+    send_message(rabbitMQ_broker_address, "set_config", message)
+    invalidate_cache(("config",))
+    return message["version"]
+
+
+class SharedRead:
+    """
+      A read of the cluster in flight, whose result is shared by all the requests that need it. The done
+      event is set when the result, or the exception raised by the read, is available.
     """
-      Sends a message to all agents, setting a new value for their packet loss threshold
-      parameter.
 
-      :param threshold: the new value for the threshold parameter
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.error = None  # type: Optional[Exception]
+
+
+def single_flight(key: tuple, read: Callable[[], Any]) -> Any:
     """
-    send_message(rabbitMQ_broker_address, "set_threshold", str(threshold))
+      Performs a read of the cluster, unless an identical read is already in flight: in that case the
+      request waits for the result of that read instead of sending its own broadcast. The result is shared
+      by all the requests, so it must not be modified.
 
+      :param key: the key that identifies the read, for example the topic and the parameters of the request
+      :param read: the function that performs the read and returns its result
+    """
+    global coalesced_requests, broadcasts
+
+    with inflight_reads_lock:
+        shared = inflight_reads.get(key)
+        leader = shared is None
+        if leader:
+            shared = SharedRead()
+            inflight_reads[key] = shared
+            broadcasts += 1
+        else:
+            coalesced_requests += 1
+
+    if not leader:
+        shared.done.wait()
+        if shared.error is not None:
+            raise shared.error
+        return shared.result
+
+    try:
+        shared.result = read()
+    except Exception as e:
+        shared.error = e
+        raise
+    finally:
+        with inflight_reads_lock:
+            del inflight_reads[key]
+        shared.done.set()
+    return shared.result
+
+
+def cached_read(key: tuple, read: Callable[[], Any], max_staleness: float = None) -> Tuple[Any, float]:
+    """
+      Returns the result of a read of the cluster from the cache, if it is recent enough, otherwise performs
+      the read and saves its result in the cache. Returns the result and its age, in seconds.
 
-def set_ping_retries(ping_retries: int) -> None:
+      :param key: the key that identifies the read. Its first element is the kind of read, used to find its TTL.
+      :param read: the function that performs the read and returns its result
+      :param max_staleness: the maximum age, in seconds, of a result taken from the cache. If None, the TTL of
+                            the kind of read is used.
     """
-      Sends a message to all agents, setting a new value for their ping_retries
-      parameter. That is, the number of packets sent to a container when trying to
-      reach it for diagnostic reasons.
+    global cache_hits
+
+    max_age = CACHE_TTL[key[0]] if max_staleness is None else max_staleness
+    with read_cache_lock:
+        entry = read_cache.get(key)
+        if entry is not None and time.time() - entry[0] <= max_age:
+            read_cache.move_to_end(key)
+            cache_hits += 1
+            return entry[1], time.time() - entry[0]
+        generation = cache_generation
+
+    result = single_flight(key, read)
+
+    # We save the result, unless it is empty or a write happened meanwhile.
+    if result is not None:
+        with read_cache_lock:
+            if generation == cache_generation:
+                read_cache[key] = (time.time(), result)
+                read_cache.move_to_end(key)
+                while len(read_cache) > CACHE_SIZE:
+                    read_cache.popitem(last=False)
+    return result, 0.0
+
+
+def invalidate_cache(*keys: tuple) -> None:
+    """
+      Removes the results of the reads affected by a write from the cache.
 
-      :param ping_retries: the new value for the ping_retries parameter
+      :param keys: the keys of the reads to remove
     """
-    send_message(rabbitMQ_broker_address, "set_ping_retries", str(ping_retries))
+    global cache_generation
+
+    with read_cache_lock:
+        cache_generation += 1
+        for key in keys:
+            read_cache.pop(key, None)
 
 
-def set_monitoring_period(period: int) -> None:
+def get_metrics() -> dict:
+    """
+      Returns the counters of the manager.
+    """
+    with inflight_reads_lock:
+        metrics = {"broadcasts": broadcasts, "coalesced-requests": coalesced_requests,
+                   "reads-in-flight": len(inflight_reads)}
+    with read_cache_lock:
+        metrics.update({"cache-hits": cache_hits, "cache-entries": len(read_cache)})
+    metrics.update(watch_hub.stats())
+    metrics.update(history.stats())
+    metrics["compression"] = compressor.stats()
+    return metrics
+
+
+class PendingRequest:
+    """
+      Responses received so far for a request sent to the agents. The completed event is set as soon as
+      the expected number of responses is received, waking up at once the thread that awaits for them.
     """
-      Sends a message to all agents, setting a new value for their monitoring period
-      parameter.
 
-      :param period: the new value for the monitoring period
+    def __init__(self, expected_responses: int) -> None:
+        """
+          :param expected_responses: the number of responses that the request should receive
+        """
+        self.expected_responses = expected_responses
+        self.responses = []
+        self.completed = threading.Event()
+        if expected_responses <= 0:
+            self.completed.set()
+
+    def add(self, response: Any, host: str = None) -> None:
+        """
+          Adds a response to the request. Must be called holding the lock of the dictionary of the request.
+
+          :param response: the response received
+          :param host: the name of the host that sent the response, if known
+        """
+        self.responses.append(response)
+        if len(self.responses) >= self.expected_responses:
+            self.completed.set()
+
+
+class StreamingRequest(PendingRequest):
     """
-    send_message(rabbitMQ_broker_address, "set_monitoring_period", str(period))
+      Request whose responses are also put in a queue as they arrive, together with the name of the host
+      that sent each of them, so that they can be streamed to the client one by one.
+    """
+
+    def __init__(self, expected_responses: int) -> None:
+        super().__init__(expected_responses)
+        self.queue = queue.Queue()
+
+    def add(self, response: Any, host: str = None) -> None:
+        super().add(response, host)
+        self.queue.put((host, response))
 
 
 def await_and_merge_responses(request_token: str,
-                              expected_responses: int,
                               merge_dictionary: dict,
                               merge_function: Callable[[Any], Any],
                               lock: threading.Lock,
                               timeout: int) -> Optional[list]:
     """
-      Utility function that awaits for a certain number of responses to a
-      specific request. Then it merges the received responses in an unique object
-      using a custom method passed as parameter. It exploits a lock to manage the
+      Utility function that awaits for the expected responses to a specific request, whose
+      PendingRequest is found in the merge_dictionary. Then it merges the received responses in an
+      unique object using a custom method passed as parameter. It exploits a lock to manage the
       dictionary of responses in mutual exclusion.
       A timeout must be provided: when it elapses and the number of responses does not
       match the expected number, a partial result is returned.
 
       :param request_token: the request token, used to access the correct entry of the merge_dictionary
-      :param expected_responses: the number of responses that the request should receive
       :param merge_dictionary: a dictionary in which the responses should eventually be found
       :param merge_function: a function that must be used to merge the different responses into a single response
       :param lock: the lock that must be used when accessing the merge_dictionary to avoid conflicts
       :param timeout: the maximum amount of time to wait for responses
     """
 
-    # We save the starting time in a local variable, so we can check whether the timeout
-    # is elapsed during execution.
-    start = time.time()
-    end = time.time()
-
-    while True:
-        # We periodically check if the merge_dictionary contains expected_responses values associated
-        # with the request of interest. If this is true, we received all responses and we can proceed
-        # with merging them and returning the result.
-        with lock:
-            if len(merge_dictionary[request_token]) == expected_responses:
-                break
-
-        # If it is not true, we check if the timeout is elapsed, in which case we leave the loop.
-        # Otherwise we sleep for some milliseconds and continue with the loop.
-        end = time.time()
-        if (end - start) > timeout:
-            break
-        time.sleep(0.1)
-
-    # Since we are outside the loop, we check the reason of exit. If the exit was caused by
-    # the timeout, we print an error message.
-    if (end - start) > timeout:
+    # We wait until the broker callback receives the last expected response, or the timeout elapses,
+    # in which case we print an error message.
+    with lock:
+        request = merge_dictionary[request_token]
+    if not request.completed.wait(timeout):
         print("Timeout elapsed on request " + request_token, file=sys.stderr)
 
     with lock:
-        # If we don't find any response in the dictionary, we just delete the request's entry
-        # and return None, since the timeout is surely elapsed in this case, and no host responded.
-        if len(merge_dictionary[request_token]) == 0:
-            del merge_dictionary[request_token]
+        # We delete the request's entry, so that the responses arriving late are discarded.
+        del merge_dictionary[request_token]
+
+        # If we don't find any response, we return None, since the timeout is surely elapsed in this case,
+        # and no host responded.
+        if len(request.responses) == 0:
             return None
         else:
-            # If we find at least one response, we merge the responses and delete the request's entry
-            # in the dictionary, then we return the result, partial or complete.
-            result = merge_function(merge_dictionary[request_token])
-            del merge_dictionary[request_token]
-            return result
+            # If we find at least one response, we merge the responses and return the result, partial or complete.
+            return merge_function(request.responses)
 
 
-def merge_containers_status(lists: List[List[dict]]) -> List[dict]:
+def merge_containers_status(lists: List[Any]) -> bytes:
     """
-      Utility function used to merge the responses to the containers status request into a
-      single list.
+      Utility function used to merge the responses to the containers status request into the
+      json encoding of a single list.
 
-      :param lists: the list of responses, each containing a list of dictionaries that represent the status of different containers
+      :param lists: the list of responses, each containing a list of dictionaries that represent the status of different containers, or its json encoding
     """
-    result = []
-    for x in lists:
-        result = result + x
-    return result
+    return join_fragments(lists)
+
+
+def merge_columns(responses: List[Any], encode: Callable[[list], bytes]) -> bytes:
+    """
+      Utility function used to merge the responses containing lists into a single payload in the columns format.
+
+      :param responses: the list of responses, each containing a list, decoded or encoded in json
+      :param encode: the function that encodes the merged list in the columns format
+    """
+    values = []
+    for response in responses:
+        values += json.loads(response.decode()) if isinstance(response, bytes) else response
+    return encode(values)
 
 
-def merge_container_status(responses: List[dict]) -> Optional[dict]:
+def merge_container_status(responses: List[Any]) -> Optional[bytes]:
     """
-      Utility function used to obtain a single response to the container status request.
+      Utility function used to obtain the json encoding of a single response to the container status request.
 
       :param responses: the list of responses, that should in any case only contain one response.
     """
-    if len(responses) > 0:
+    if len(responses) == 0 or responses[0] is None or responses[0] == b"null":
+        return None
+    if isinstance(responses[0], bytes):
         return responses[0]
-    return None
+    return json.dumps(responses[0]).encode()
 
 
-def get_container_status(container_name=None, hostname=None) -> Any:
+def get_container_status(container_name=None, hostname=None, max_staleness: float = None,
+                         columns: bool = False) -> Tuple[Any, float]:
     """
-      Sends a request for the status of one or all the containers, depending on the parameters.
-      Then it awaits for all the expected responses and merges them into a single result that is
-      returned.
+      Returns the status of one or all the containers, depending on the parameters, and its age in seconds.
+      The status is read from the cluster view, kept up to date by the status deltas of the agents, and its
+      age is the time since the oldest of the last deltas it is built from. If the view does not contain any
+      host yet, or the requested host, or if it is older than max_staleness, the status is taken from the cache
+      or requested to the agents, with a request shared by the identical requests received meanwhile.
 
       :param hostname: the name of the host on which the requested container runs. If this is left empty, a request for the status of all the containers will be sent.
       :param container_name: the name of the container of which the status is requested. This parameter is ignored if hostname is left empty.
+      :param max_staleness: the maximum age, in seconds, of a status taken from the cache
+      :param columns: whether to encode the status of all the containers in the columns format instead of json
 
-      :return: a dictionary containing information about one container, if a container name is passed as parameter; a list of dictionary containing information about all the monitored containers otherwise
+      :return: the json encoding of a dictionary containing information about one container, if a container name is passed as parameter; of a list of dictionary containing information about all the monitored containers otherwise
     """
 
-    # We generate a random token for the request and initialize a entry in the status_responses
-    # dictionary.
+    # We read the status from the cluster view, if it contains the hosts of interest.
+    expire_views()
+    now = time.time()
+    with cluster_view_lock:
+        if hostname is None and len(cluster_view) > 0:
+            result = [status for view in cluster_view.values() for status in view["containers"].values()]
+            age = now - min(view["updated"] for view in cluster_view.values())
+        elif hostname is not None and hostname in cluster_view:
+            if container_name is None:
+                return None, 0.0
+            result = cluster_view[hostname]["containers"].get(hostname + "-" + container_name)
+            age = now - cluster_view[hostname]["updated"]
+            if result is None and (max_staleness is None or age <= max_staleness):
+                return None, age
+        else:
+            result = None
+    columns = columns and hostname is None
+    if result is not None and (max_staleness is None or age <= max_staleness):
+        return codec.encode_records(result) if columns else json.dumps(result).encode(), age
+
+    # Otherwise we send a request to the agents. The identical requests received meanwhile share its result.
+    if columns:
+        return cached_read(("status", None, None, COLUMNS), lambda: request_container_status(columns=True),
+                           max_staleness)
+    return cached_read(("status", container_name, hostname),
+                       lambda: request_container_status(container_name, hostname), max_staleness)
+
+
+def get_containers_status(containers: Dict[str, List[str]]) -> bytes:
+    """
+      Returns the json encoding of a dictionary with the status of a list of containers, indexed by name.
+      The status of the containers of the hosts in the cluster view is read from the view; the other hosts
+      are sent a single request each, for all their containers, and the responses are awaited together.
+      The status of a container that is not monitored is null; the containers of the hosts that do not answer
+      are missing.
+
+      :param containers: the names of the containers, indexed by the name of the host on which they run
+    """
+    result = {}
+    missing = {}
+    expire_views()
+    with cluster_view_lock:
+        for hostname, names in containers.items():
+            if hostname in cluster_view:
+                view = cluster_view[hostname]["containers"]
+                for name in names:
+                    result[hostname + "-" + name] = view.get(hostname + "-" + name)
+            else:
+                missing[hostname] = names
+    responses = [json.dumps(result).encode()]
+
+    if len(missing) > 0:
+        # We generate a random token for the request and initialize an entry in the status_responses dictionary,
+        # that expects a response from each host involved.
+        request_uuid = str(uuid.uuid4())
+        with status_responses_lock:
+            status_responses[request_uuid] = PendingRequest(len(missing))
+        send_messages(rabbitMQ_broker_address, [(hostname + "container_status",
+                                                 {"token": request_uuid, "containers": names})
+                                                for hostname, names in missing.items()])
+        result = await_and_merge_responses(request_token=request_uuid,
+                                           merge_dictionary=status_responses,
+                                           merge_function=lambda x: x,
+                                           lock=status_responses_lock,
+                                           timeout=TIMEOUT
+                                           )
+        if result is not None:
+            responses += result
+    # Each response is a dictionary with the status of some containers indexed by name.
+    return join_fragments(responses, b"{}")
+
+
+def stream_container_status() -> Iterator[bytes]:
+    """
+      Sends a request for the status of all the containers to the agents, and yields the containers of
+      each host as soon as its response arrives, as a line of json with the form
+      {"host": "name", "containers": [...]}. When all the live hosts answered, or the timeout elapses, a
+      last line is yielded with the form {"trailer": true, "answered": [...], "timed_out": [...], "missing": 0},
+      listing the hosts that answered and the live hosts that did not. Before the first heartbeat the hosts are
+      not known by name, so missing tells how many of the expected hosts did not answer.
+    """
+    # We generate a random token for the request and initialize an entry in the status_responses dictionary,
+    # that expects a response from each live host.
+    request_uuid = str(uuid.uuid4())
+    request = StreamingRequest(expected_hosts())
+    with status_responses_lock:
+        status_responses[request_uuid] = request
+    send_message(rabbitMQ_broker_address, "all_containers_status", request_uuid)
+
+    deadline = time.time() + TIMEOUT
+    answered = []
+    try:
+        while len(answered) < request.expected_responses:
+            try:
+                host, response = request.queue.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                print("Timeout elapsed on request " + request_uuid, file=sys.stderr)
+                break
+            answered.append(host)
+            fragment = response if isinstance(response, bytes) else json.dumps(response).encode()
+            yield b'{"host": ' + json.dumps(host).encode() + b', "containers": ' + fragment + b'}\n'
+    finally:
+        # We delete the request's entry, so that the responses arriving late are discarded.
+        with status_responses_lock:
+            status_responses.pop(request_uuid, None)
+
+    timed_out = [host["name"] for host in get_hosts() if host["alive"] and host["name"] not in answered]
+    missing = max(request.expected_responses - len(answered), len(timed_out))
+    yield json.dumps({"trailer": True, "answered": answered, "timed_out": timed_out,
+                      "missing": missing}).encode() + b"\n"
+
+
+def request_container_status(container_name=None, hostname=None, columns: bool = False) -> Any:
+    """
+      Sends a request for the status of one or all the containers to the agents, depending on the parameters.
+      Then it awaits for all the expected responses and merges them into a single result that is
+      returned.
+
+      :param hostname: the name of the host on which the requested container runs. If this is left empty, a request for the status of all the containers will be sent.
+      :param container_name: the name of the container of which the status is requested. This parameter is ignored if hostname is left empty.
+      :param columns: whether to merge the status of all the containers in the columns format instead of json
+    """
+    # We generate a random token for the request.
     request_uuid = str(uuid.uuid4())
-    status_responses[request_uuid] = []
 
     if hostname is None:
         # if the hostname was not provided as parameter, we request the status of all the
-        # containers, and we return the responses aggregated in a single result.
-        send_message(rabbitMQ_broker_address, "all_containers_status", request_uuid)
+        # containers, and we return the responses aggregated in a single result. We initialize an entry
+        # in the status_responses dictionary, that expects a response from each live host.
+        with status_responses_lock:
+            status_responses[request_uuid] = PendingRequest(expected_hosts())
+        if columns:
+            send_message(rabbitMQ_broker_address, "all_containers_status", request_uuid, codec.ACCEPT)
+            merge_function = lambda responses: merge_columns(responses, codec.encode_records)
+        else:
+            send_message(rabbitMQ_broker_address, "all_containers_status", request_uuid)
+            merge_function = merge_containers_status
         result = await_and_merge_responses(request_token=request_uuid,
-                                           expected_responses=HOSTS,
                                            merge_dictionary=status_responses,
-                                           merge_function=merge_containers_status,
+                                           merge_function=merge_function,
                                            lock=status_responses_lock,
                                            timeout=TIMEOUT
                                            )
@@ -346,10 +1062,11 @@ def get_container_status(container_name=None, hostname=None) -> Any:
 
         # we insert the token in the request and send it to the specified host, prepending its name
         # to the topic. Then, we return the received response.
+        with status_responses_lock:
+            status_responses[request_uuid] = PendingRequest(1)
         request = {"token": request_uuid, "container": container_name}
         send_message(rabbitMQ_broker_address, hostname + "container_status", request)
         result = await_and_merge_responses(request_token=request_uuid,
-                                           expected_responses=1,
                                            merge_dictionary=status_responses,
                                            merge_function=merge_container_status,
                                            lock=status_responses_lock,
@@ -358,37 +1075,73 @@ def get_container_status(container_name=None, hostname=None) -> Any:
         return result
 
 
-def merge_containers_lists(lists: List[List[str]]) -> List[str]:
+def get_container_history(container_name: str, start: float = None, end: float = None,
+                          step: float = None) -> Optional[dict]:
     """
-      Utility function used to merge the responses to the containers list request into a
-      single list.
+      Returns the history of the status of a container, built from the status deltas sent by the agents,
+      or None if there is none. Raises a ValueError if the history would have too many points.
 
-      :param lists: the list of responses, each containing a list of container names
+      :param container_name: the name of the container, containing the hostname
+      :param start: the start time, in seconds since the epoch, by default one hour before the end time
+      :param end: the end time, in seconds since the epoch, by default the current time
+      :param step: the duration of each point, in seconds, by default the finest one available
     """
-    result = []
-    for x in lists:
-        result = result + x
-    return result
+    if end is None:
+        end = time.time()
+    if start is None:
+        start = end - 3600
+    return history.query(container_name, start, end, step)
+
+
+def merge_containers_lists(lists: List[Any]) -> bytes:
+    """
+      Utility function used to merge the responses to the containers list request into the
+      json encoding of a single list.
+
+      :param lists: the list of responses, each containing a list of container names, or its json encoding
+    """
+    return join_fragments(lists)
 
 
-def get_containers_list():
+def get_containers_list(max_staleness: float = None, columns: bool = False) -> Tuple[Optional[bytes], float]:
+    """
+      Returns the json encoding of the list of all the names of containers running on all hosts of the
+      cluster, and its age in seconds. The list is taken from the cache if it is recent enough, otherwise
+      the concurrent requests share a single request to the agents.
+
+      :param max_staleness: the maximum age, in seconds, of a list taken from the cache
+      :param columns: whether to encode the list in the columns format instead of json
+    """
+    if columns:
+        return cached_read(("container_list", COLUMNS), lambda: request_containers_list(True), max_staleness)
+    return cached_read(("container_list",), request_containers_list, max_staleness)
+
+
+def request_containers_list(columns: bool = False):
     """
       Sends a request for the list of all the names of containers running on all hosts of the cluster.
       Then it awaits for all the expected responses and merges them into a single list that is
       returned.
+
+      :param columns: whether to merge the list in the columns format instead of json
     """
-    # We generate a random token for the request and initialize a entry in the status_responses
-    # dictionary.
+    # We generate a random token for the request and initialize a entry in the containers_list_responses
+    # dictionary, that expects a response from each live host.
     request_uuid = str(uuid.uuid4())
-    containers_list_responses[request_uuid] = []
+    with containers_list_responses_lock:
+        containers_list_responses[request_uuid] = PendingRequest(expected_hosts())
 
     # we request the list of all the names of containers running in the cluster,
     # and we return the responses aggregated in a single result.
-    send_message(rabbitMQ_broker_address, "container_list", request_uuid)
+    if columns:
+        send_message(rabbitMQ_broker_address, "container_list", request_uuid, codec.ACCEPT)
+        merge_function = lambda responses: merge_columns(responses, codec.encode_strings)
+    else:
+        send_message(rabbitMQ_broker_address, "container_list", request_uuid)
+        merge_function = merge_containers_lists
     result = await_and_merge_responses(request_token=request_uuid,
-                                       expected_responses=HOSTS,
                                        merge_dictionary=containers_list_responses,
-                                       merge_function=merge_containers_lists,
+                                       merge_function=merge_function,
                                        lock=containers_list_responses_lock,
                                        timeout=TIMEOUT
                                        )
@@ -407,22 +1160,51 @@ def merge_configurations(configurations: List[dict]) -> List[dict]:
     return configurations
 
 
-def get_configuration():
+def get_configuration(max_staleness: float = None) -> Tuple[Optional[List[dict]], float]:
+    """
+      Returns the current configuration of all active agents, and its age in seconds. Each configuration
+      has the version acknowledged by the agent, whether it is up to date with the requested one, the last
+      version rejected by the agent with the parameters it found not valid, if any, and the counters of the agent.
+      The configurations are taken from the registry of the hosts, which is kept up to date by the
+      heartbeats. If some active agent does not send its configuration in the heartbeats, or the
+      heartbeats are older than max_staleness, the configuration is requested to the agents instead:
+      it is taken from the cache if it is recent enough, otherwise the concurrent requests share a
+      single request to the agents.
+
+      :param max_staleness: the maximum age, in seconds, of a configuration taken from the registry or the cache
+    """
+    now = time.time()
+    with hosts_lock:
+        alive = [host for host in hosts.values() if now - host["last-seen"] <= HOST_EXPIRY]
+    if len(alive) > 0 and all(host["config"] is not None for host in alive):
+        age = now - min(host["last-seen"] for host in alive)
+        if max_staleness is None or age <= max_staleness:
+            with config_lock:
+                version = config_version
+            return [dict(host["config"], name=host["name"], **(host["metrics"] or {}),
+                         **{"config-version": host["config-version"],
+                            "up-to-date": host["config-version"] >= version,
+                            "rejected-config": host["rejected-config"]})
+                    for host in alive], age
+    return cached_read(("config",), request_configuration, max_staleness)
+
+
+def request_configuration():
     """
       Sends a request for the current configuration of all active agents.
       Then it awaits for all the expected responses and merges them into a single list that is
       returned.
     """
-    # We generate a random token for the request and initialize a entry in the status_responses
-    # dictionary.
+    # We generate a random token for the request and initialize a entry in the config_responses
+    # dictionary, that expects a response from each live host.
     request_uuid = str(uuid.uuid4())
-    config_responses[request_uuid] = []
+    with config_responses_lock:
+        config_responses[request_uuid] = PendingRequest(expected_hosts())
 
     # we request the configuration of all the agents in the cluster,
     # and we return the responses aggregated in a single result.
     send_message(rabbitMQ_broker_address, "config", request_uuid)
     result = await_and_merge_responses(request_token=request_uuid,
-                                       expected_responses=HOSTS,
                                        merge_dictionary=config_responses,
                                        merge_function=merge_configurations,
                                        lock=config_responses_lock,
@@ -0,0 +1,112 @@
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+
+class Subscription:
+    """
+      Events waiting to be sent to a single client of the watch endpoint. The buffer is bounded: when it is
+      full, a new event of a container replaces the oldest buffered event of the same container, or the
+      oldest event if there is none, and the dropped events are counted so that the client can be told.
+    """
+
+    def __init__(self, hosts: Optional[Set[str]], containers: Optional[Set[str]], size: int) -> None:
+        """
+          :param hosts: the hosts whose events are sent to the client, or None for all the hosts
+          :param containers: the containers whose events are sent to the client, or None for all the containers
+          :param size: the maximum number of events buffered for the client
+        """
+        self.hosts = hosts
+        self.containers = containers
+        self.size = size
+        self.events = deque()
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def matches(self, event: dict) -> bool:
+        return (self.hosts is None or event["host"] in self.hosts) and \
+            (self.containers is None or event["container"] in self.containers)
+
+    def put(self, event: dict) -> None:
+        with self.condition:
+            if len(self.events) >= self.size:
+                self.dropped += 1
+                for buffered in self.events:
+                    if buffered["container"] == event["container"]:
+                        self.events.remove(buffered)
+                        break
+                else:
+                    self.events.popleft()
+            self.events.append(event)
+            self.condition.notify()
+
+    def get(self, timeout: float) -> List[dict]:
+        """
+          Returns the buffered events, waiting at most timeout seconds for the first one. If some events
+          were dropped since the last call, an event of type "dropped" with their number comes first.
+
+          :param timeout: the maximum number of seconds to wait
+        """
+        with self.condition:
+            if len(self.events) == 0:
+                self.condition.wait(timeout)
+            events = list(self.events)
+            self.events.clear()
+            if self.dropped > 0:
+                events.insert(0, {"type": "dropped", "host": None, "container": None, "count": self.dropped})
+                self.dropped = 0
+            return events
+
+
+class WatchHub:
+    """
+      Distributes the state changes of the containers to the clients of the watch endpoint. All the clients
+      share the single subscription of the manager to the broker: each event is copied to the buffer of
+      every client whose filters match it.
+    """
+
+    def __init__(self, buffer_size: int = 256) -> None:
+        """
+          :param buffer_size: the maximum number of events buffered for each client
+        """
+        self.buffer_size = buffer_size
+        self.lock = threading.Lock()
+        self.subscriptions = set()  # type: Set[Subscription]
+        self.published = 0
+
+    def subscribe(self, hosts: List[str] = None, containers: List[str] = None) -> Subscription:
+        """
+          Adds a client and returns its subscription.
+
+          :param hosts: the hosts whose events are sent to the client, or None for all the hosts
+          :param containers: the containers whose events are sent to the client, or None for all the containers
+        """
+        subscription = Subscription(set(hosts) if hosts else None, set(containers) if containers else None,
+                                    self.buffer_size)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def publish(self, events: List[dict]) -> None:
+        """
+          Copies the events to the buffers of the clients whose filters match them.
+
+          :param events: the events, each with at least the host and the container it is about
+        """
+        if len(events) == 0:
+            return
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+            self.published += len(events)
+        for subscription in subscriptions:
+            for event in events:
+                if subscription.matches(event):
+                    subscription.put(event)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"watchers": len(self.subscriptions), "published-events": self.published}
@@ -15,31 +15,46 @@ class Config(Model):
     Do not edit the class manually.
     """
 
-    def __init__(self, threshold: float=None, ping_retries: int=None, monitoring_period: int=None):  # noqa: E501
+    def __init__(self, threshold: float=None, ping_retries: int=None, monitoring_period: int=None, max_restarts: int=None, restart_window: int=None, restart_backoff: float=None):  # noqa: E501
         """Config - a model defined in Swagger
 
         :param threshold: The threshold of this Config.  # noqa: E501
         :type threshold: float
         :param ping_retries: The ping_retries of this Config.  # noqa: E501
         :type ping_retries: int
-        :param monitoring_period: The attack_interval of this Config.  # noqa: E501
+        :param monitoring_period: The monitoring_period of this Config.  # noqa: E501
         :type monitoring_period: int
+        :param max_restarts: The max_restarts of this Config.  # noqa: E501
+        :type max_restarts: int
+        :param restart_window: The restart_window of this Config.  # noqa: E501
+        :type restart_window: int
+        :param restart_backoff: The restart_backoff of this Config.  # noqa: E501
+        :type restart_backoff: float
         """
         self.swagger_types = {
             'threshold': float,
             'ping_retries': int,
-            'attack_interval': int
+            'monitoring_period': int,
+            'max_restarts': int,
+            'restart_window': int,
+            'restart_backoff': float
         }
 
         self.attribute_map = {
             'threshold': 'threshold',
             'ping_retries': 'ping-retries',
-            'attack_interval': 'monitoring-period'
+            'monitoring_period': 'monitoring-period',
+            'max_restarts': 'max-restarts',
+            'restart_window': 'restart-window',
+            'restart_backoff': 'restart-backoff'
         }
 
         self._threshold = threshold
         self._ping_retries = ping_retries
         self._monitoring_period = monitoring_period
+        self._max_restarts = max_restarts
+        self._restart_window = restart_window
+        self._restart_backoff = restart_backoff
 
     @classmethod
     def from_dict(cls, dikt) -> 'Config':
@@ -96,21 +111,84 @@ class Config(Model):
 
     @property
     def monitoring_period(self) -> int:
-        """Gets the attack_interval of this Config.
+        """Gets the monitoring_period of this Config.
 
 
-        :return: The attack_interval of this Config.
+        :return: The monitoring_period of this Config.
         :rtype: int
         """
         return self._monitoring_period
 
     @monitoring_period.setter
     def monitoring_period(self, monitoring_period: int):
-        """Sets the attack_interval of this Config.
+        """Sets the monitoring_period of this Config.
 
 
-        :param monitoring_period: The attack_interval of this Config.
+        :param monitoring_period: The monitoring_period of this Config.
         :type monitoring_period: int
         """
 
         self._monitoring_period = monitoring_period
+
+    @property
+    def max_restarts(self) -> int:
+        """Gets the max_restarts of this Config.
+
+
+        :return: The max_restarts of this Config.
+        :rtype: int
+        """
+        return self._max_restarts
+
+    @max_restarts.setter
+    def max_restarts(self, max_restarts: int):
+        """Sets the max_restarts of this Config.
+
+
+        :param max_restarts: The max_restarts of this Config.
+        :type max_restarts: int
+        """
+
+        self._max_restarts = max_restarts
+
+    @property
+    def restart_window(self) -> int:
+        """Gets the restart_window of this Config.
+
+
+        :return: The restart_window of this Config.
+        :rtype: int
+        """
+        return self._restart_window
+
+    @restart_window.setter
+    def restart_window(self, restart_window: int):
+        """Sets the restart_window of this Config.
+
+
+        :param restart_window: The restart_window of this Config.
+        :type restart_window: int
+        """
+
+        self._restart_window = restart_window
+
+    @property
+    def restart_backoff(self) -> float:
+        """Gets the restart_backoff of this Config.
+
+
+        :return: The restart_backoff of this Config.
+        :rtype: float
+        """
+        return self._restart_backoff
+
+    @restart_backoff.setter
+    def restart_backoff(self, restart_backoff: float):
+        """Sets the restart_backoff of this Config.
+
+
+        :param restart_backoff: The restart_backoff of this Config.
+        :type restart_backoff: float
+        """
+
+        self._restart_backoff = restart_backoff
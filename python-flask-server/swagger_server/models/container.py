@@ -15,7 +15,7 @@ class Container(Model):
     Do not edit the class manually.
     """
 
-    def __init__(self, name: str=None, monitored: bool=None, running: bool=None, started_at: str=None, restart_count: int=None, image: str=None, ip: str=None, packet_loss: str=None):  # noqa: E501
+    def __init__(self, name: str=None, monitored: bool=None, running: bool=None, started_at: str=None, restart_count: int=None, image: str=None, ip: str=None, packet_loss: str=None, quarantined: bool=None, window_loss: float=None, loss_ewma: float=None, samples: int=None, rtt_avg_ms: float=None, rtt_p95_ms: float=None, probe_timeout_ms: float=None):  # noqa: E501
         """Container - a model defined in Swagger
 
         :param name: The name of this Container.  # noqa: E501
@@ -34,6 +34,20 @@ class Container(Model):
         :type ip: str
         :param packet_loss: The packet_loss of this Container.  # noqa: E501
         :type packet_loss: str
+        :param quarantined: The quarantined of this Container.  # noqa: E501
+        :type quarantined: bool
+        :param window_loss: The window_loss of this Container.  # noqa: E501
+        :type window_loss: float
+        :param loss_ewma: The loss_ewma of this Container.  # noqa: E501
+        :type loss_ewma: float
+        :param samples: The samples of this Container.  # noqa: E501
+        :type samples: int
+        :param rtt_avg_ms: The rtt_avg_ms of this Container.  # noqa: E501
+        :type rtt_avg_ms: float
+        :param rtt_p95_ms: The rtt_p95_ms of this Container.  # noqa: E501
+        :type rtt_p95_ms: float
+        :param probe_timeout_ms: The probe_timeout_ms of this Container.  # noqa: E501
+        :type probe_timeout_ms: float
         """
         self.swagger_types = {
             'name': str,
@@ -43,7 +57,14 @@ class Container(Model):
             'restart_count': int,
             'image': str,
             'ip': str,
-            'packet_loss': str
+            'packet_loss': str,
+            'quarantined': bool,
+            'window_loss': float,
+            'loss_ewma': float,
+            'samples': int,
+            'rtt_avg_ms': float,
+            'rtt_p95_ms': float,
+            'probe_timeout_ms': float
         }
 
         self.attribute_map = {
@@ -54,7 +75,14 @@ class Container(Model):
             'restart_count': 'restart_count',
             'image': 'image',
             'ip': 'ip',
-            'packet_loss': 'packet-loss'
+            'packet_loss': 'packet-loss',
+            'quarantined': 'quarantined',
+            'window_loss': 'window_loss',
+            'loss_ewma': 'loss_ewma',
+            'samples': 'samples',
+            'rtt_avg_ms': 'rtt_avg_ms',
+            'rtt_p95_ms': 'rtt_p95_ms',
+            'probe_timeout_ms': 'probe_timeout_ms'
         }
 
         self._name = name
@@ -65,6 +93,13 @@ class Container(Model):
         self._image = image
         self._ip = ip
         self._packet_loss = packet_loss
+        self._quarantined = quarantined
+        self._window_loss = window_loss
+        self._loss_ewma = loss_ewma
+        self._samples = samples
+        self._rtt_avg_ms = rtt_avg_ms
+        self._rtt_p95_ms = rtt_p95_ms
+        self._probe_timeout_ms = probe_timeout_ms
 
     @classmethod
     def from_dict(cls, dikt) -> 'Container':
@@ -246,3 +281,150 @@ class Container(Model):
         """
 
         self._packet_loss = packet_loss
+
+    @property
+    def quarantined(self) -> bool:
+        """Gets the quarantined of this Container.
+
+
+        :return: The quarantined of this Container.
+        :rtype: bool
+        """
+        return self._quarantined
+
+    @quarantined.setter
+    def quarantined(self, quarantined: bool):
+        """Sets the quarantined of this Container.
+
+
+        :param quarantined: The quarantined of this Container.
+        :type quarantined: bool
+        """
+
+        self._quarantined = quarantined
+
+    @property
+    def window_loss(self) -> float:
+        """Gets the window_loss of this Container.
+
+
+        :return: The window_loss of this Container.
+        :rtype: float
+        """
+        return self._window_loss
+
+    @window_loss.setter
+    def window_loss(self, window_loss: float):
+        """Sets the window_loss of this Container.
+
+
+        :param window_loss: The window_loss of this Container.
+        :type window_loss: float
+        """
+
+        self._window_loss = window_loss
+
+    @property
+    def loss_ewma(self) -> float:
+        """Gets the loss_ewma of this Container.
+
+
+        :return: The loss_ewma of this Container.
+        :rtype: float
+        """
+        return self._loss_ewma
+
+    @loss_ewma.setter
+    def loss_ewma(self, loss_ewma: float):
+        """Sets the loss_ewma of this Container.
+
+
+        :param loss_ewma: The loss_ewma of this Container.
+        :type loss_ewma: float
+        """
+
+        self._loss_ewma = loss_ewma
+
+    @property
+    def samples(self) -> int:
+        """Gets the samples of this Container.
+
+
+        :return: The samples of this Container.
+        :rtype: int
+        """
+        return self._samples
+
+    @samples.setter
+    def samples(self, samples: int):
+        """Sets the samples of this Container.
+
+
+        :param samples: The samples of this Container.
+        :type samples: int
+        """
+
+        self._samples = samples
+
+    @property
+    def rtt_avg_ms(self) -> float:
+        """Gets the rtt_avg_ms of this Container.
+
+
+        :return: The rtt_avg_ms of this Container.
+        :rtype: float
+        """
+        return self._rtt_avg_ms
+
+    @rtt_avg_ms.setter
+    def rtt_avg_ms(self, rtt_avg_ms: float):
+        """Sets the rtt_avg_ms of this Container.
+
+
+        :param rtt_avg_ms: The rtt_avg_ms of this Container.
+        :type rtt_avg_ms: float
+        """
+
+        self._rtt_avg_ms = rtt_avg_ms
+
+    @property
+    def rtt_p95_ms(self) -> float:
+        """Gets the rtt_p95_ms of this Container.
+
+
+        :return: The rtt_p95_ms of this Container.
+        :rtype: float
+        """
+        return self._rtt_p95_ms
+
+    @rtt_p95_ms.setter
+    def rtt_p95_ms(self, rtt_p95_ms: float):
+        """Sets the rtt_p95_ms of this Container.
+
+
+        :param rtt_p95_ms: The rtt_p95_ms of this Container.
+        :type rtt_p95_ms: float
+        """
+
+        self._rtt_p95_ms = rtt_p95_ms
+
+    @property
+    def probe_timeout_ms(self) -> float:
+        """Gets the probe_timeout_ms of this Container.
+
+
+        :return: The probe_timeout_ms of this Container.
+        :rtype: float
+        """
+        return self._probe_timeout_ms
+
+    @probe_timeout_ms.setter
+    def probe_timeout_ms(self, probe_timeout_ms: float):
+        """Sets the probe_timeout_ms of this Container.
+
+
+        :param probe_timeout_ms: The probe_timeout_ms of this Container.
+        :type probe_timeout_ms: float
+        """
+
+        self._probe_timeout_ms = probe_timeout_ms
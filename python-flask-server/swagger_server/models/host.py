@@ -0,0 +1,246 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from swagger_server.models.base_model_ import Model
+from swagger_server import util
+
+
+class Host(Model):
+    """NOTE: This class is auto generated by the swagger code generator program.
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, name: str=None, version: str=None, containers: int=None, load: float=None, last_seen: float=None, alive: bool=None, config_version: int=None, metrics: object=None):  # noqa: E501
+        """Host - a model defined in Swagger
+
+        :param name: The name of this Host.  # noqa: E501
+        :type name: str
+        :param version: The version of this Host.  # noqa: E501
+        :type version: str
+        :param containers: The containers of this Host.  # noqa: E501
+        :type containers: int
+        :param load: The load of this Host.  # noqa: E501
+        :type load: float
+        :param config_version: The config_version of this Host.  # noqa: E501
+        :type config_version: int
+        :param metrics: The metrics of this Host.  # noqa: E501
+        :type metrics: object
+        :param last_seen: The last_seen of this Host.  # noqa: E501
+        :type last_seen: float
+        :param alive: The alive of this Host.  # noqa: E501
+        :type alive: bool
+        """
+        self.swagger_types = {
+            'name': str,
+            'version': str,
+            'containers': int,
+            'load': float,
+            'last_seen': float,
+            'alive': bool,
+            'config_version': int,
+            'metrics': object
+        }
+
+        self.attribute_map = {
+            'name': 'name',
+            'version': 'version',
+            'containers': 'containers',
+            'load': 'load',
+            'last_seen': 'last-seen',
+            'alive': 'alive',
+            'config_version': 'config-version',
+            'metrics': 'metrics'
+        }
+
+        self._name = name
+        self._version = version
+        self._containers = containers
+        self._load = load
+        self._last_seen = last_seen
+        self._alive = alive
+        self._config_version = config_version
+        self._metrics = metrics
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'Host':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The Host of this Host.  # noqa: E501
+        :rtype: Host
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def name(self) -> str:
+        """Gets the name of this Host.
+
+
+        :return: The name of this Host.
+        :rtype: str
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        """Sets the name of this Host.
+
+
+        :param name: The name of this Host.
+        :type name: str
+        """
+
+        self._name = name
+
+    @property
+    def version(self) -> str:
+        """Gets the version of this Host.
+
+
+        :return: The version of this Host.
+        :rtype: str
+        """
+        return self._version
+
+    @version.setter
+    def version(self, version: str):
+        """Sets the version of this Host.
+
+
+        :param version: The version of this Host.
+        :type version: str
+        """
+
+        self._version = version
+
+    @property
+    def containers(self) -> int:
+        """Gets the containers of this Host.
+
+
+        :return: The containers of this Host.
+        :rtype: int
+        """
+        return self._containers
+
+    @containers.setter
+    def containers(self, containers: int):
+        """Sets the containers of this Host.
+
+
+        :param containers: The containers of this Host.
+        :type containers: int
+        """
+
+        self._containers = containers
+
+    @property
+    def load(self) -> float:
+        """Gets the load of this Host.
+
+
+        :return: The load of this Host.
+        :rtype: float
+        """
+        return self._load
+
+    @load.setter
+    def load(self, load: float):
+        """Sets the load of this Host.
+
+
+        :param load: The load of this Host.
+        :type load: float
+        """
+
+        self._load = load
+
+    @property
+    def last_seen(self) -> float:
+        """Gets the last_seen of this Host.
+
+
+        :return: The last_seen of this Host.
+        :rtype: float
+        """
+        return self._last_seen
+
+    @last_seen.setter
+    def last_seen(self, last_seen: float):
+        """Sets the last_seen of this Host.
+
+
+        :param last_seen: The last_seen of this Host.
+        :type last_seen: float
+        """
+
+        self._last_seen = last_seen
+
+    @property
+    def alive(self) -> bool:
+        """Gets the alive of this Host.
+
+
+        :return: The alive of this Host.
+        :rtype: bool
+        """
+        return self._alive
+
+    @alive.setter
+    def alive(self, alive: bool):
+        """Sets the alive of this Host.
+
+
+        :param alive: The alive of this Host.
+        :type alive: bool
+        """
+
+        self._alive = alive
+
+    @property
+    def config_version(self) -> int:
+        """Gets the config_version of this Host.
+
+
+        :return: The config_version of this Host.
+        :rtype: int
+        """
+        return self._config_version
+
+    @config_version.setter
+    def config_version(self, config_version: int):
+        """Sets the config_version of this Host.
+
+
+        :param config_version: The config_version of this Host.
+        :type config_version: int
+        """
+
+        self._config_version = config_version
+
+    @property
+    def metrics(self) -> object:
+        """Gets the metrics of this Host.
+
+
+        :return: The metrics of this Host.
+        :rtype: object
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, metrics: object):
+        """Sets the metrics of this Host.
+
+
+        :param metrics: The metrics of this Host.
+        :type metrics: object
+        """
+
+        self._metrics = metrics
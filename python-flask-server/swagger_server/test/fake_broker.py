@@ -0,0 +1,133 @@
+# coding: utf-8
+
+"""
+  Harness of the rabbitMQ manager unit tests: the manager is imported with a fake pika module, and the messages
+  it sends are recorded by a fake broker, where the tests can answer them in place of the agents.
+"""
+
+from __future__ import absolute_import
+
+import json
+import sys
+import threading
+import types
+import unittest
+from unittest import mock
+
+
+class FakeBroker:
+    """
+      Stands in for the rabbitMQ broker: it records the messages sent by the manager, and their headers, and
+      hands each of them to the responder, if any, that plays the part of the agents.
+    """
+
+    def __init__(self) -> None:
+        self.published = []
+        self.headers = []
+        self.responder = None
+
+    def publish(self, topic: str, body: bytes, headers: dict = None) -> None:
+        message = json.loads(body.decode())
+        self.published.append((topic, message))
+        self.headers.append(headers)
+        if self.responder is not None:
+            threading.Thread(target=self.responder, args=(topic, message)).start()
+
+    def topics(self) -> list:
+        return [topic for topic, _ in self.published]
+
+
+class FakeChannel:
+
+    def exchange_declare(self, **kwargs) -> None:
+        pass
+
+    def queue_declare(self, name: str):
+        return types.SimpleNamespace(method=types.SimpleNamespace(queue="manager"))
+
+    def queue_bind(self, **kwargs) -> None:
+        pass
+
+    def basic_consume(self, **kwargs) -> None:
+        pass
+
+    def start_consuming(self) -> None:
+        pass
+
+    def basic_publish(self, exchange: str, routing_key: str, body: bytes, properties=None) -> None:
+        broker.publish(routing_key, body, properties.headers if properties is not None else None)
+
+
+class FakeConnection:
+
+    def __init__(self, parameters=None) -> None:
+        pass
+
+    def channel(self) -> FakeChannel:
+        return FakeChannel()
+
+    def close(self) -> None:
+        pass
+
+
+broker = FakeBroker()
+
+# The manager connects to the broker when it is imported, so it is imported with a fake pika module.
+fake_pika = types.ModuleType("pika")
+fake_pika.BlockingConnection = FakeConnection
+fake_pika.ConnectionParameters = lambda host: None
+fake_pika.BasicProperties = lambda **kwargs: types.SimpleNamespace(**kwargs)
+real_pika = sys.modules.get("pika")
+sys.modules["pika"] = fake_pika
+try:
+    from swagger_server.controllers import rabbitMQ_manager
+finally:
+    if real_pika is not None:
+        sys.modules["pika"] = real_pika
+    else:
+        del sys.modules["pika"]
+rabbitMQ_manager.pika = fake_pika
+
+def reply(topic: str, message) -> None:
+    """
+      Delivers a message sent by an agent to the manager, as the broker would.
+    """
+    rabbitMQ_manager.broker_callback(None, types.SimpleNamespace(routing_key=topic),
+                                     types.SimpleNamespace(headers=None, content_encoding=None, content_type=None),
+                                     json.dumps(message).encode())
+
+
+def reply_fragment(topic: str, token: str, host: str, fragment: bytes, content_type: str = None) -> None:
+    """
+      Delivers a response sent by an agent as a fragment, with the token in the headers of the message.
+    """
+    rabbitMQ_manager.broker_callback(None, types.SimpleNamespace(routing_key=topic),
+                                     types.SimpleNamespace(headers={"format": "fragment", "token": token,
+                                                                    "host": host},
+                                                           content_encoding=None, content_type=content_type),
+                                     fragment)
+
+
+class ManagerTestCase(unittest.TestCase):
+    """Base class of the manager unit tests, that starts each test with an empty manager"""
+
+    def setUp(self):
+        for registry in (rabbitMQ_manager.hosts, rabbitMQ_manager.cluster_view, rabbitMQ_manager.read_cache,
+                         rabbitMQ_manager.inflight_reads, rabbitMQ_manager.status_responses,
+                         rabbitMQ_manager.containers_list_responses, rabbitMQ_manager.config_responses,
+                         rabbitMQ_manager.resync_requests):
+            registry.clear()
+        broker.published.clear()
+        broker.headers.clear()
+        broker.responder = None
+
+    def tearDown(self):
+        broker.responder = None
+
+    def patch(self, target, name: str, value) -> None:
+        """
+          Replaces an attribute of a module, such as a setting of the manager, until the end of the test.
+        """
+        patcher = mock.patch.object(target, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
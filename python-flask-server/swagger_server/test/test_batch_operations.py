@@ -0,0 +1,56 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager, reply_fragment
+
+
+class TestBatchOperations(ManagerTestCase):
+    """Batch container operations unit tests"""
+
+    def test_group_by_host(self):
+        """The containers are grouped by the host on which they run, and a malformed name is rejected"""
+        self.assertEqual(rabbitMQ_manager.group_by_host(["a-x", "b-y", "a-z"]), {"a": ["x", "z"], "b": ["y"]})
+        self.assertEqual(rabbitMQ_manager.group_by_host([]), {})
+        self.assertIsNone(rabbitMQ_manager.group_by_host(["a-x", "y"]))
+        self.assertIsNone(rabbitMQ_manager.group_by_host(["a-x-y"]))
+
+    def test_add_and_remove(self):
+        """A single message is sent to each host involved, and the cached status of the containers is invalidated"""
+        rabbitMQ_manager.cached_read(("status", "x", "a"), lambda: "cached", 10)
+        rabbitMQ_manager.add_containers(rabbitMQ_manager.group_by_host(["a-x", "b-y", "a-z"]))
+        self.assertEqual(sorted(broker.published), [("aadd_container", ["x", "z"]), ("badd_container", ["y"])])
+        self.assertNotIn(("status", "x", "a"), rabbitMQ_manager.read_cache)
+
+        broker.published.clear()
+        rabbitMQ_manager.remove_containers({"b": ["y"]})
+        self.assertEqual(broker.published, [("bremove_container", ["y"])])
+
+    def test_status_across_hosts(self):
+        """The status of the containers is read from the cluster view, or requested to each other host once"""
+        self.patch(rabbitMQ_manager, "TIMEOUT", 0.3)
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"a-x": {"local_name": "x"}}})
+
+        def agent(topic, message):
+            if topic == "bcontainer_status":
+                reply_fragment("status_response", message["token"], "b",
+                               json.dumps({"b-" + name: {"local_name": name} if name == "y" else None
+                                           for name in message["containers"]}).encode())
+
+        broker.responder = agent
+        result = rabbitMQ_manager.get_containers_status(
+            rabbitMQ_manager.group_by_host(["a-x", "a-w", "b-y", "b-v", "c-u"]))
+        self.assertEqual(json.loads(result), {"a-x": {"local_name": "x"}, "a-w": None,
+                                              "b-y": {"local_name": "y"}, "b-v": None})
+        # the hosts not in the view are sent one request each, with the same token
+        self.assertEqual(sorted((topic, message["containers"]) for topic, message in broker.published),
+                         [("bcontainer_status", ["y", "v"]), ("ccontainer_status", ["u"])])
+        self.assertEqual(len(set(message["token"] for _, message in broker.published)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+from swagger_server.controllers import codec
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager, reply_fragment
+
+
+class TestColumns(ManagerTestCase):
+    """Negotiation of the columns format unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        rabbitMQ_manager.register_heartbeat({"name": "b"})
+
+    def agent(self, topic, message):
+        # host a answers in the columns format when the request accepts it, host b is an older agent
+        if topic == "all_containers_status":
+            if codec.accepts_columns(broker.headers[-1]["accept"]):
+                reply_fragment("status_response", message, "a", codec.encode_records([{"local_name": "x"}]),
+                               codec.CONTENT_TYPE_COLUMNS)
+            else:
+                reply_fragment("status_response", message, "a", b'[{"local_name": "x"}]')
+            reply_fragment("status_response", message, "b", b'[{"local_name": "y"}]')
+        elif topic == "container_list":
+            reply_fragment("containers_list_response", message, "a", codec.encode_strings(["a-x"]),
+                           codec.CONTENT_TYPE_COLUMNS)
+            reply_fragment("containers_list_response", message, "b", b'["b-y"]')
+
+    def test_json(self):
+        """The json requests do not accept the columns format, and the fragments are joined as they are"""
+        broker.responder = self.agent
+        result, _ = rabbitMQ_manager.get_container_status(max_staleness=0)
+        self.assertEqual(broker.headers[0]["accept"], codec.CONTENT_TYPE_JSON)
+        self.assertIn(b'{"local_name": "x"}', result)
+        self.assertIn(b'{"local_name": "y"}', result)
+
+    def test_columns(self):
+        """The columns requests accept the columns format and merge all the responses into a columns payload"""
+        broker.responder = self.agent
+        result, _ = rabbitMQ_manager.get_container_status(max_staleness=0, columns=True)
+        self.assertTrue(codec.accepts_columns(broker.headers[0]["accept"]))
+        self.assertEqual(sorted(record["local_name"] for record in codec.decode(result, codec.CONTENT_TYPE_COLUMNS)),
+                         ["x", "y"])
+
+        result, _ = rabbitMQ_manager.get_containers_list(max_staleness=0, columns=True)
+        self.assertEqual(sorted(codec.decode(result, codec.CONTENT_TYPE_COLUMNS)), ["a-x", "b-y"])
+
+    def test_cluster_view(self):
+        """The status read from the cluster view is encoded in the format requested"""
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"a-x": {"local_name": "x"}}})
+        result, _ = rabbitMQ_manager.get_container_status(columns=True)
+        self.assertEqual(codec.decode(result, codec.CONTENT_TYPE_COLUMNS), [{"local_name": "x"}])
+        self.assertEqual(json.loads(rabbitMQ_manager.get_container_status()[0]), [{"local_name": "x"}])
+        self.assertEqual(broker.published, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import types
+import unittest
+import zlib
+
+from swagger_server.controllers import codec
+from swagger_server.test.fake_broker import ManagerTestCase, rabbitMQ_manager
+
+
+def deliver(topic: str, body: bytes, content_encoding: str, headers: dict = None) -> None:
+    """
+      Delivers a message sent by an agent with a content encoding, as the broker would.
+    """
+    rabbitMQ_manager.broker_callback(None, types.SimpleNamespace(routing_key=topic),
+                                     types.SimpleNamespace(headers=headers, content_encoding=content_encoding,
+                                                           content_type=None),
+                                     body)
+
+
+class TestCompression(ManagerTestCase):
+    """Decompression of the messages received by the manager unit tests"""
+
+    def test_deflate(self):
+        """A compressed message is decompressed before it is handled"""
+        decompressed = rabbitMQ_manager.compressor.stats()["decompressed-messages"]
+        body = zlib.compress(json.dumps({"name": "a", "containers": 2}).encode())
+        deliver("heartbeat", body, codec.CONTENT_ENCODING_DEFLATE)
+        self.assertEqual([host["containers"] for host in rabbitMQ_manager.get_hosts()], [2])
+        self.assertEqual(rabbitMQ_manager.compressor.stats()["decompressed-messages"], decompressed + 1)
+
+        # the fragments too
+        request = rabbitMQ_manager.PendingRequest(1)
+        rabbitMQ_manager.status_responses["token"] = request
+        deliver("status_response", zlib.compress(b'[{"local_name": "x"}]'), codec.CONTENT_ENCODING_DEFLATE,
+                {"format": "fragment", "token": "token", "host": "a"})
+        self.assertEqual(json.loads(rabbitMQ_manager.merge_containers_status(request.responses)),
+                         [{"local_name": "x"}])
+
+    def test_unsupported_encoding(self):
+        """A message that cannot be decompressed is dropped, and the following ones are still handled"""
+        deliver("heartbeat", json.dumps({"name": "a"}).encode(), "br")
+        deliver("heartbeat", b"not deflate", codec.CONTENT_ENCODING_DEFLATE)
+        self.assertEqual(rabbitMQ_manager.get_hosts(), [])
+
+        deliver("heartbeat", json.dumps({"name": "a"}).encode(), None)
+        self.assertEqual([host["name"] for host in rabbitMQ_manager.get_hosts()], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
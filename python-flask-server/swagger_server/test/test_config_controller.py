@@ -16,9 +16,11 @@ class TestConfigController(BaseTestCase):
 
         
         """
+        query_string = [('max_staleness', 1.2)]
         response = self.client.open(
             '/config',
-            method='GET')
+            method='GET',
+            query_string=query_string)
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
@@ -0,0 +1,61 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager
+
+
+class TestConfiguration(ManagerTestCase):
+    """Versioned configuration unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        rabbitMQ_manager.requested_config.clear()
+
+    def test_invalid_values(self):
+        """A configuration with a value that the agents would reject is not sent"""
+        for config in ({"threshold": 101}, {"max-restarts": 0}, {"restart-window": "x"}, {"ping-retries": None},
+                       {"unknown": 1}):
+            with self.assertRaises(ValueError):
+                rabbitMQ_manager.update_configuration(dict({"monitoring-period": 4}, **config))
+        self.assertEqual(broker.published, [])
+        self.assertEqual(rabbitMQ_manager.requested_config, {})
+
+        version = rabbitMQ_manager.update_configuration({"threshold": 50, "max-restarts": 3})
+        self.assertEqual(broker.published, [("set_config", {"version": version,
+                                                            "config": {"threshold": 50, "max-restarts": 3}})])
+
+    def test_heartbeat_metrics(self):
+        """The counters of the agents are taken from their heartbeats"""
+        metrics = {"last-cycle-duration": 0.01, "scheduler": {"overruns": 0}}
+        rabbitMQ_manager.register_heartbeat({"name": "a", "config-version": 0, "config": {"threshold": 60.0},
+                                             "metrics": metrics})
+        self.assertEqual(rabbitMQ_manager.get_hosts()[0]["metrics"], metrics)
+        configuration, _ = rabbitMQ_manager.get_configuration()
+        self.assertEqual(configuration[0]["threshold"], 60.0)
+        self.assertEqual(configuration[0]["last-cycle-duration"], 0.01)
+        self.assertEqual(configuration[0]["scheduler"], {"overruns": 0})
+
+    def test_rejected(self):
+        """A host that rejected the requested configuration is reported as lagging, and it is not sent again"""
+        rabbitMQ_manager.config_resends.clear()
+        version = rabbitMQ_manager.update_configuration({"threshold": 50})
+        broker.published.clear()
+        rejected = {"version": version, "parameters": ["threshold"]}
+        rabbitMQ_manager.register_heartbeat({"name": "a", "config-version": 0, "config": {"threshold": 60.0},
+                                             "rejected-config": rejected})
+        configuration, _ = rabbitMQ_manager.get_configuration()
+        self.assertFalse(configuration[0]["up-to-date"])
+        self.assertEqual(configuration[0]["rejected-config"], rejected)
+        self.assertEqual(broker.published, [])
+        self.assertNotIn("rejected-config", rabbitMQ_manager.get_hosts()[0])
+
+        # a host that did not reject it is sent the configuration again
+        rabbitMQ_manager.register_heartbeat({"name": "b", "config-version": 0, "config": {"threshold": 60.0}})
+        self.assertEqual(broker.published, [("bset_config", {"version": version, "config": {"threshold": 50}})])
+
+
+if __name__ == '__main__':
+    unittest.main()
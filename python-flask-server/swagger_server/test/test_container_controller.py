@@ -2,6 +2,8 @@
 
 from __future__ import absolute_import
 
+from flask import json
+
 from swagger_server.test import BaseTestCase
 
 
@@ -19,14 +21,60 @@ class TestContainerController(BaseTestCase):
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_add_containers(self):
+        """Test case for add_containers
+
+        
+        """
+        body = ['host-name_example']
+        response = self.client.open(
+            '/container/batch',
+            method='POST',
+            data=json.dumps(body),
+            content_type='application/json')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_get_container_history(self):
+        """Test case for get_container_history
+
+        
+        """
+        query_string = [('from', 1.2),
+                        ('to', 1.2),
+                        ('step', 1.2)]
+        response = self.client.open(
+            '/container/{name}/history'.format(name='name_example'),
+            method='GET',
+            query_string=query_string)
+        # no status delta was received for the container, so it has no history
+        self.assert404(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_get_containers_status(self):
+        """Test case for get_containers_status
+
+        
+        """
+        body = ['host-name_example']
+        response = self.client.open(
+            '/container/status/batch',
+            method='POST',
+            data=json.dumps(body),
+            content_type='application/json')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
     def test_get_containers_list(self):
         """Test case for get_containers_list
 
         
         """
+        query_string = [('max_staleness', 1.2)]
         response = self.client.open(
             '/container',
-            method='GET')
+            method='GET',
+            query_string=query_string)
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
@@ -35,12 +83,54 @@ class TestContainerController(BaseTestCase):
 
         
         """
+        query_string = [('max_staleness', 1.2)]
         response = self.client.open(
             '/container/status',
+            method='GET',
+            query_string=query_string)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_get_monitored_containers_status_stream(self):
+        """Test case for get_monitored_containers_status_stream
+
+        
+        """
+        response = self.client.open(
+            '/container/status/stream',
             method='GET')
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_remove_containers(self):
+        """Test case for remove_containers
+
+        
+        """
+        body = ['host-name_example']
+        response = self.client.open(
+            '/container/batch',
+            method='DELETE',
+            data=json.dumps(body),
+            content_type='application/json')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_watch_containers(self):
+        """Test case for watch_containers
+
+        
+        """
+        query_string = [('host', 'host_example'),
+                        ('container', 'container_example')]
+        response = self.client.open(
+            '/container/watch',
+            method='GET',
+            query_string=query_string,
+            buffered=False)
+        self.assert200(response)
+        response.close()
+
     def test_remove_container(self):
         """Test case for remove_container
 
@@ -0,0 +1,83 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager, reply
+
+
+class TestHeartbeats(ManagerTestCase):
+    """register_heartbeat, get_hosts and expected_hosts unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(rabbitMQ_manager, "HOST_EXPIRY", 0.1)
+
+    def test_register(self):
+        """A host is registered by its first heartbeat, and updated by the following ones"""
+        self.assertEqual(rabbitMQ_manager.get_hosts(), [])
+        reply("heartbeat", {"name": "a", "version": "1.0.0", "containers": 2, "load": 0.5})
+        hosts = rabbitMQ_manager.get_hosts()
+        self.assertEqual([(host["name"], host["containers"], host["alive"]) for host in hosts], [("a", 2, True)])
+        self.assertNotIn("accept-encoding", hosts[0])
+
+        rabbitMQ_manager.register_heartbeat({"name": "a", "containers": 3})
+        self.assertEqual([host["containers"] for host in rabbitMQ_manager.get_hosts()], [3])
+
+    def test_liveness(self):
+        """A host is no longer alive when its last heartbeat is older than HOST_EXPIRY, until the next one"""
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        time.sleep(0.15)
+        self.assertFalse(rabbitMQ_manager.get_hosts()[0]["alive"])
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        self.assertTrue(rabbitMQ_manager.get_hosts()[0]["alive"])
+
+    def test_expected_hosts(self):
+        """The broadcasts expect an answer from the hosts alive, or from HOSTS before the first heartbeat"""
+        self.patch(rabbitMQ_manager, "HOSTS", 4)
+        self.assertEqual(rabbitMQ_manager.expected_hosts(), 4)
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        time.sleep(0.15)
+        rabbitMQ_manager.register_heartbeat({"name": "b"})
+        rabbitMQ_manager.register_heartbeat({"name": "c"})
+        self.assertEqual(rabbitMQ_manager.expected_hosts(), 2)
+
+        # the request ends as soon as the live hosts answered, without waiting for the expired one
+        self.patch(rabbitMQ_manager, "TIMEOUT", 5)
+
+        def agent(topic, message):
+            for name in ("b", "c"):
+                reply("status_response", {"token": message, "host": name, "containers": {}})
+
+        broker.responder = agent
+        start = time.monotonic()
+        rabbitMQ_manager.request_container_status()
+        self.assertLess(time.monotonic() - start, 1)
+        start = time.monotonic()
+        lines = list(rabbitMQ_manager.stream_container_status())
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(len(lines), 3)
+
+    def test_config_resend(self):
+        """A host that acknowledges an older configuration is sent the requested one, at most once per interval"""
+        rabbitMQ_manager.requested_config.clear()
+        rabbitMQ_manager.config_resends.clear()
+        version = rabbitMQ_manager.update_configuration({"threshold": 50})
+        broker.published.clear()
+
+        rabbitMQ_manager.register_heartbeat({"name": "a", "config-version": version, "config": {"threshold": 50}})
+        self.assertEqual(broker.published, [])
+        rabbitMQ_manager.register_heartbeat({"name": "b", "config-version": 0, "config": {"threshold": 60}})
+        self.assertEqual(broker.published, [("bset_config", {"version": version, "config": {"threshold": 50}})])
+        rabbitMQ_manager.register_heartbeat({"name": "b", "config-version": 0, "config": {"threshold": 60}})
+        self.assertEqual(len(broker.published), 1)
+
+        # an agent that does not send its configuration does not support the versioned configurations
+        rabbitMQ_manager.register_heartbeat({"name": "c"})
+        self.assertEqual(len(broker.published), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import time
+import unittest
+
+from swagger_server.controllers import container_controller
+from swagger_server.controllers.history import EMPTY_POINT, History, HistoryTier, MAX_POINTS
+from swagger_server.test.fake_broker import ManagerTestCase, rabbitMQ_manager
+
+
+def status(loss: float = 0.0, rtt: float = 0.1, running: bool = True, restarts: int = 0) -> dict:
+    return {"packet_loss": loss, "rtt_avg_ms": rtt, "running": running, "restart_count": restarts}
+
+
+class TestHistoryTier(unittest.TestCase):
+    """HistoryTier unit tests"""
+
+    def test_aggregation(self):
+        """The samples of a bucket are counted and summed, the missing values are left out"""
+        tier = HistoryTier(10, 4)
+        tier.add_row()
+        tier.add(0, 100, 10.0, 1.0, True, 0)
+        tier.add(0, 105, 30.0, None, False, 2)
+        tier.add(0, 109, None, 3.0, True, 1)
+        self.assertEqual(tier.bucket(0, 10), (3, 2, 40.0, 2, 4.0, 2, 2))
+        self.assertIsNone(tier.bucket(0, 11))
+
+    def test_wraparound(self):
+        """A bucket is reused by the time one span later, and the older samples are forgotten"""
+        tier = HistoryTier(1, 4)
+        tier.add_row()
+        tier.add_row()
+        tier.add(0, 100, 10.0, None, True, 0)
+        tier.add(1, 100, 50.0, None, True, 0)
+        self.assertEqual(tier.bucket(0, 100)[2], 10.0)
+        tier.add(0, 104, 20.0, None, True, 0)
+        self.assertIsNone(tier.bucket(0, 100))
+        self.assertEqual(tier.bucket(0, 104), (1, 1, 20.0, 1, 0.0, 0, 0))
+        # the rows of the other containers are not affected
+        self.assertEqual(tier.bucket(1, 100)[2], 50.0)
+
+        tier.clear_row(1)
+        self.assertIsNone(tier.bucket(1, 100))
+
+    def test_memory(self):
+        """The memory of the tier only depends on the number of rows"""
+        tier = HistoryTier(1, 120)
+        for _ in range(3):
+            tier.add_row()
+        self.assertEqual(len(tier.buckets), 3 * 120)
+        self.assertEqual(tier.row_bytes(), sum(getattr(tier, name).itemsize for name, _ in tier.TYPECODES) * 120)
+
+
+class TestHistory(unittest.TestCase):
+    """History unit tests"""
+
+    def test_fine_tier(self):
+        """A recent history is read from the finest tier"""
+        history = History(tiers=((1, 10), (5, 20)))
+        base = int(time.time()) - 5
+        for i in range(3):
+            history.record("a-x", base + i, status(loss=i * 10.0))
+        result = history.query("a-x", base, base + 2)
+        self.assertEqual(result["step"], 1)
+        self.assertEqual([point["time"] for point in result["points"]], [base, base + 1, base + 2])
+        self.assertEqual([point["packet_loss"] for point in result["points"]], [0.0, 10.0, 20.0])
+
+    def test_downsampling(self):
+        """An older history is read from the coarser tier, that averages the samples of each bucket"""
+        history = History(tiers=((1, 10), (5, 20)))
+        # the points of 10 seconds are aligned on multiples of their step
+        base = int(time.time()) // 10 * 10 - 50
+        for i in range(10):
+            history.record("a-x", base + i, status(loss=i * 10.0, running=i % 2 == 0, restarts=i))
+        result = history.query("a-x", base, base + 9)
+        self.assertEqual(result["step"], 5)
+        self.assertEqual([(point["time"], point["samples"], point["packet_loss"], point["running"],
+                           point["restart_count"]) for point in result["points"]],
+                         [(base, 5, 20.0, 0.6, 4), (base + 5, 5, 70.0, 0.4, 9)])
+
+        # the points can merge several buckets
+        result = history.query("a-x", base, base + 9, step=10)
+        self.assertEqual(result["step"], 10)
+        self.assertEqual([(point["samples"], point["packet_loss"]) for point in result["points"]], [(10, 45.0)])
+
+    def test_from_filter(self):
+        """The points start at the start time, with the values sampled before it carried forward"""
+        history = History(tiers=((1, 60),))
+        base = int(time.time()) - 30
+        history.record("a-x", base, status(loss=50.0))
+        history.record("a-x", base + 4, status(loss=0.0))
+        result = history.query("a-x", base + 2, base + 5)
+        self.assertEqual([point["time"] for point in result["points"]], [base + 2, base + 3, base + 4, base + 5])
+        self.assertEqual([(point["samples"], point["packet_loss"]) for point in result["points"]],
+                         [(0, 50.0), (0, 50.0), (1, 0.0), (0, 0.0)])
+
+    def test_stop(self):
+        """The values are not carried forward after the container stopped being monitored"""
+        history = History(tiers=((1, 60),))
+        base = int(time.time()) - 30
+        history.record("a-x", base, status())
+        history.stop("a-x", base + 1)
+        points = history.query("a-x", base, base + 3)["points"]
+        self.assertEqual([point["samples"] for point in points], [1, 0, 0, 0])
+        self.assertEqual(points[1]["running"], 1.0)
+        self.assertEqual(points[2], dict(EMPTY_POINT, time=base + 2))
+
+        # a new sample resumes the history
+        history.record("a-x", base + 3, status())
+        self.assertEqual(history.query("a-x", base + 3, base + 4)["points"][1]["samples"], 0)
+        self.assertEqual(history.query("a-x", base + 3, base + 4)["points"][1]["running"], 1.0)
+
+    def test_unknown_container(self):
+        self.assertIsNone(History().query("a-x", time.time() - 60, time.time()))
+
+    def test_max_points(self):
+        """A query with too many points is rejected"""
+        history = History(tiers=((1, 60),))
+        now = time.time()
+        history.record("a-x", now, status())
+        with self.assertRaises(ValueError):
+            history.query("a-x", now - MAX_POINTS - 10, now, step=1)
+
+    def test_reuse_rows(self):
+        """When all the rows are taken, the row of the container updated least recently is reused"""
+        history = History(max_containers=2, tiers=((1, 60),))
+        now = int(time.time()) - 10
+        history.record("a-x", now, status(loss=10.0))
+        history.record("a-y", now + 1, status(loss=20.0))
+        history.record("a-z", now + 2, status(loss=30.0))
+        self.assertIsNone(history.query("a-x", now, now + 2))
+        self.assertEqual(history.query("a-z", now, now + 2)["points"][0], dict(EMPTY_POINT, time=now))
+        self.assertEqual(history.query("a-z", now, now + 2)["points"][2]["packet_loss"], 30.0)
+        self.assertEqual(history.stats()["history-containers"], 2)
+
+
+class TestHistoryEndpoint(ManagerTestCase):
+    """History endpoint unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(rabbitMQ_manager, "history", History(tiers=((1, 60),)))
+
+    def test_from_filter(self):
+        """The history starts at the time of the from parameter, and is built from the status deltas"""
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"a-x": {"running": True, "packet_loss": 0.0}}})
+        now = int(time.time())
+        response = container_controller.get_container_history("a-x", to=now + 1, **{"from": now - 2})
+        self.assertEqual(response.status_code, 200)
+        points = json.loads(response.response)["points"]
+        self.assertEqual([point["time"] for point in points], [now - 2, now - 1, now, now + 1])
+        self.assertEqual(points[0], dict(EMPTY_POINT, time=now - 2))
+
+        # the keyword is also received as from_
+        response = container_controller.get_container_history("a-x", to=now, from_=now)
+        self.assertEqual(len(json.loads(response.response)["points"]), 1)
+
+    def test_errors(self):
+        """A container without history is not found, and a wrong range is rejected"""
+        self.assertEqual(container_controller.get_container_history("a-x").status_code, 404)
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"a-x": {"running": True}}})
+        self.assertEqual(container_controller.get_container_history("a-x", to=10, **{"from": 20}).status_code, 400)
+        self.assertEqual(container_controller.get_container_history("a-x", step=0).status_code, 400)
+        self.assertEqual(container_controller.get_container_history("a-x", to=1e7, step=1,
+                                                                    **{"from": 0}).status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
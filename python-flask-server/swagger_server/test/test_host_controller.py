@@ -0,0 +1,25 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+from swagger_server.test import BaseTestCase
+
+
+class TestHostController(BaseTestCase):
+    """HostController integration test stubs"""
+
+    def test_get_hosts(self):
+        """Test case for get_hosts
+
+        
+        """
+        response = self.client.open(
+            '/hosts',
+            method='GET')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
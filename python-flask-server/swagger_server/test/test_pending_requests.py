@@ -0,0 +1,55 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import threading
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, rabbitMQ_manager, reply
+
+
+class TestPendingRequest(ManagerTestCase):
+    """PendingRequest and await_and_merge_responses unit tests"""
+
+    def await_responses(self, request: rabbitMQ_manager.PendingRequest, timeout: float):
+        rabbitMQ_manager.status_responses["token"] = request
+        return rabbitMQ_manager.await_and_merge_responses(request_token="token",
+                                                          merge_dictionary=rabbitMQ_manager.status_responses,
+                                                          merge_function=lambda responses: sorted(responses),
+                                                          lock=rabbitMQ_manager.status_responses_lock,
+                                                          timeout=timeout)
+
+    def test_wakeup(self):
+        """The waiting thread is woken up as soon as the last expected response arrives"""
+        request = rabbitMQ_manager.PendingRequest(2)
+        threading.Timer(0.05, request.add, args=(1,)).start()
+        threading.Timer(0.1, request.add, args=(2,)).start()
+        start = time.monotonic()
+        self.assertEqual(self.await_responses(request, 5), [1, 2])
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertNotIn("token", rabbitMQ_manager.status_responses)
+
+    def test_timeout(self):
+        """When the timeout elapses, the responses received so far are merged, or None is returned"""
+        request = rabbitMQ_manager.PendingRequest(2)
+        request.add(1)
+        self.assertEqual(self.await_responses(request, 0.1), [1])
+        self.assertNotIn("token", rabbitMQ_manager.status_responses)
+        self.assertIsNone(self.await_responses(rabbitMQ_manager.PendingRequest(1), 0.1))
+
+    def test_no_expected_response(self):
+        """A request that expects no response is completed at once"""
+        start = time.monotonic()
+        self.assertIsNone(self.await_responses(rabbitMQ_manager.PendingRequest(0), 5))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_late_response(self):
+        """A response received after the request ended is discarded"""
+        self.assertIsNone(self.await_responses(rabbitMQ_manager.PendingRequest(1), 0.05))
+        reply("status_response", {"token": "token", "container": {"local_name": "x"}})
+        self.assertNotIn("token", rabbitMQ_manager.status_responses)
+
+
+if __name__ == '__main__':
+    unittest.main()
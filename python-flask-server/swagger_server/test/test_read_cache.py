@@ -0,0 +1,71 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager
+
+
+class TestCachedRead(ManagerTestCase):
+    """cached_read and invalidate_cache unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+
+    def read(self):
+        self.calls += 1
+        return [self.calls]
+
+    def test_ttl(self):
+        """A result is served from the cache until it is older than the maximum staleness"""
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", None, None), self.read, 0.2), ([1], 0.0))
+        result, age = rabbitMQ_manager.cached_read(("status", None, None), self.read, 0.2)
+        self.assertEqual(result, [1])
+        self.assertLess(age, 0.2)
+        time.sleep(0.25)
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", None, None), self.read, 0.2), ([2], 0.0))
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", None, None), self.read, 0), ([3], 0.0))
+
+    def test_default_ttl(self):
+        """Without a maximum staleness, the TTL of the kind of read is used"""
+        ttl = rabbitMQ_manager.CACHE_TTL["config"]
+        rabbitMQ_manager.CACHE_TTL["config"] = 0.1
+        try:
+            rabbitMQ_manager.cached_read(("config",), self.read)
+            self.assertEqual(rabbitMQ_manager.cached_read(("config",), self.read)[0], [1])
+            time.sleep(0.15)
+            self.assertEqual(rabbitMQ_manager.cached_read(("config",), self.read)[0], [2])
+        finally:
+            rabbitMQ_manager.CACHE_TTL["config"] = ttl
+
+    def test_empty_result(self):
+        """An empty result, as returned when no agent answered, is not cached"""
+        rabbitMQ_manager.cached_read(("config",), lambda: None, 10)
+        self.assertEqual(rabbitMQ_manager.cached_read(("config",), self.read, 10), ([1], 0.0))
+
+    def test_invalidation(self):
+        """A write removes the results of the reads it affects from the cache"""
+        rabbitMQ_manager.cached_read(("status", None, None), self.read, 10)
+        rabbitMQ_manager.cached_read(("status", "x", "a"), self.read, 10)
+        rabbitMQ_manager.cached_read(("status", "y", "a"), self.read, 10)
+        rabbitMQ_manager.add_container("x", "a")
+        self.assertEqual(broker.published[-1], ("aadd_container", "x"))
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", None, None), self.read, 10)[0], [4])
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", "x", "a"), self.read, 10)[0], [5])
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", "y", "a"), self.read, 10)[0], [3])
+
+    def test_write_during_read(self):
+        """The result of a read during which a write happened is not cached, since it may be older than the write"""
+        def read():
+            rabbitMQ_manager.invalidate_cache(("status", "x", "a"))
+            return self.read()
+
+        rabbitMQ_manager.cached_read(("status", None, None), read, 10)
+        self.assertEqual(rabbitMQ_manager.cached_read(("status", None, None), self.read, 10), ([2], 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import threading
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager, reply
+
+
+def run_concurrently(function, count: int) -> list:
+    """
+      Calls a function from count threads at the same time, and returns the result, or the exception raised,
+      of each call.
+    """
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def call(i: int) -> None:
+        barrier.wait()
+        try:
+            results[i] = function()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(ManagerTestCase):
+    """single_flight unit tests"""
+
+    def test_coalescing(self):
+        """The identical reads in flight at the same time share the result of a single read"""
+        calls = []
+
+        def read():
+            calls.append(1)
+            time.sleep(0.2)
+            return ["result"]
+
+        coalesced = rabbitMQ_manager.coalesced_requests
+        results = run_concurrently(lambda: rabbitMQ_manager.single_flight(("status", None, None), read), 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [["result"]] * 5)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(rabbitMQ_manager.coalesced_requests - coalesced, 4)
+        self.assertEqual(len(rabbitMQ_manager.inflight_reads), 0)
+
+        # a read started after the previous one ended is performed again
+        rabbitMQ_manager.single_flight(("status", None, None), read)
+        self.assertEqual(len(calls), 2)
+
+    def test_different_keys(self):
+        """The reads with different keys are not coalesced"""
+        calls = []
+
+        def read(key):
+            calls.append(key)
+            time.sleep(0.1)
+            return key
+
+        results = run_concurrently(lambda: rabbitMQ_manager.single_flight(
+            ("status", threading.current_thread().name, None), lambda: read(threading.current_thread().name)), 3)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(results), sorted(calls))
+
+    def test_error(self):
+        """The exception raised by the read is raised to all the requests that share it"""
+        def read():
+            time.sleep(0.2)
+            raise RuntimeError("broker unreachable")
+
+        results = run_concurrently(lambda: rabbitMQ_manager.single_flight(("config",), read), 3)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(len(rabbitMQ_manager.inflight_reads), 0)
+
+    def test_single_broadcast(self):
+        """The concurrent requests for the status of all the containers send a single broadcast"""
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+
+        def agent(topic, message):
+            if topic == "all_containers_status":
+                time.sleep(0.2)
+                reply("status_response", {"token": message, "host": "a",
+                                          "containers": {"a-x": {"local_name": "x"}}})
+
+        broker.responder = agent
+        results = run_concurrently(lambda: rabbitMQ_manager.get_container_status(max_staleness=0), 4)
+        self.assertEqual(broker.topics().count("all_containers_status"), 1)
+        self.assertEqual([json.loads(result[0]) for result in results], [[{"local_name": "x"}]] * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager
+
+
+def delta(seq: int, containers: dict, removed: list = (), full: bool = False, host: str = "a") -> dict:
+    return {"host": host, "seq": seq, "full": full, "containers": containers, "removed": list(removed)}
+
+
+class TestStatusDeltas(ManagerTestCase):
+    """apply_status_delta and expire_views unit tests"""
+
+    def containers(self, host: str = "a") -> dict:
+        return rabbitMQ_manager.cluster_view[host]["containers"]
+
+    def test_deltas(self):
+        """The deltas that follow the last one applied update the view of the host"""
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": True}, "a-y": {"running": True}},
+                                                  full=True))
+        rabbitMQ_manager.apply_status_delta(delta(2, {"a-x": {"running": False}}, removed=["a-y"]))
+        self.assertEqual(self.containers(), {"a-x": {"running": False}})
+        self.assertEqual(rabbitMQ_manager.cluster_view["a"]["seq"], 2)
+        self.assertEqual(broker.published, [])
+
+    def test_gap(self):
+        """A gap in the sequence numbers is not applied, and a resync is requested to the host"""
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": True}}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(3, {"a-x": {"running": False}}))
+        self.assertEqual(self.containers(), {"a-x": {"running": True}})
+        self.assertEqual(broker.published, [("aresync", None)])
+
+        # a delta of a host without view is a gap too
+        rabbitMQ_manager.apply_status_delta(delta(5, {}, host="b"))
+        self.assertNotIn("b", rabbitMQ_manager.cluster_view)
+        self.assertEqual(broker.topics(), ["aresync", "bresync"])
+
+    def test_resync_rate_limit(self):
+        """A resync is requested at most once every RESYNC_INTERVAL seconds, until the checkpoint arrives"""
+        self.patch(rabbitMQ_manager, "RESYNC_INTERVAL", 0.1)
+        rabbitMQ_manager.apply_status_delta(delta(1, {}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(3, {}))
+        rabbitMQ_manager.apply_status_delta(delta(4, {}))
+        self.assertEqual(broker.topics(), ["aresync"])
+        time.sleep(0.15)
+        rabbitMQ_manager.apply_status_delta(delta(5, {}))
+        self.assertEqual(broker.topics(), ["aresync", "aresync"])
+
+        # the checkpoint ends the resync, and a new gap is reported at once
+        rabbitMQ_manager.apply_status_delta(delta(6, {}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(8, {}))
+        self.assertEqual(broker.topics(), ["aresync", "aresync", "aresync"])
+
+    def test_old_delta(self):
+        """A duplicate or older delta is ignored, without requesting a resync"""
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": True}}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(2, {"a-x": {"running": False}}))
+        rabbitMQ_manager.apply_status_delta(delta(2, {"a-x": {"running": True}}))
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-y": {"running": True}}))
+        self.assertEqual(self.containers(), {"a-x": {"running": False}})
+        self.assertEqual(rabbitMQ_manager.cluster_view["a"]["seq"], 2)
+        self.assertEqual(broker.published, [])
+
+    def test_checkpoint(self):
+        """A checkpoint replaces the view of the host, also when the agent restarted and its sequence starts over"""
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": True}}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(2, {"a-y": {"running": True}}))
+        rabbitMQ_manager.apply_status_delta(delta(3, {"a-z": {"running": True}}, full=True))
+        self.assertEqual(self.containers(), {"a-z": {"running": True}})
+
+        # the agent restarted
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": False}}, full=True))
+        self.assertEqual(self.containers(), {"a-x": {"running": False}})
+        rabbitMQ_manager.apply_status_delta(delta(2, {"a-x": {"running": True}}))
+        self.assertEqual(self.containers(), {"a-x": {"running": True}})
+        self.assertEqual(broker.published, [])
+
+    def test_expire_views(self):
+        """The hosts whose heartbeat, or last delta without heartbeats, expired are dropped from the view"""
+        self.patch(rabbitMQ_manager, "HOST_EXPIRY", 0.1)
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        rabbitMQ_manager.apply_status_delta(delta(1, {"a-x": {"running": True}}, full=True))
+        rabbitMQ_manager.apply_status_delta(delta(1, {"b-x": {"running": True}}, full=True, host="b"))
+        rabbitMQ_manager.expire_views()
+        self.assertEqual(sorted(rabbitMQ_manager.cluster_view), ["a", "b"])
+
+        time.sleep(0.15)
+        # host a keeps sending heartbeats, host b is silent
+        rabbitMQ_manager.register_heartbeat({"name": "a"})
+        rabbitMQ_manager.expire_views()
+        self.assertEqual(list(rabbitMQ_manager.cluster_view), ["a"])
+
+        time.sleep(0.15)
+        rabbitMQ_manager.expire_views()
+        self.assertEqual(rabbitMQ_manager.cluster_view, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import time
+import unittest
+
+from swagger_server.test.fake_broker import ManagerTestCase, broker, rabbitMQ_manager, reply
+
+
+class TestStreamContainerStatus(ManagerTestCase):
+    """stream_container_status unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(rabbitMQ_manager, "TIMEOUT", 0.5)
+        for name in ("a", "b", "c"):
+            rabbitMQ_manager.register_heartbeat({"name": name})
+
+    def test_stream(self):
+        """Each host is streamed as soon as it answers, and the trailer lists the hosts that did not"""
+        def agent(topic, message):
+            if topic == "all_containers_status":
+                reply("status_response", {"token": message, "host": "a", "containers": {"a-x": {"local_name": "x"}}})
+                time.sleep(0.1)
+                reply("status_response", {"token": message, "host": "b", "containers": {}})
+
+        broker.responder = agent
+        start = time.monotonic()
+        stream = rabbitMQ_manager.stream_container_status()
+        self.assertEqual(json.loads(next(stream)), {"host": "a", "containers": [{"local_name": "x"}]})
+        self.assertLess(time.monotonic() - start, rabbitMQ_manager.TIMEOUT)
+        self.assertEqual(json.loads(next(stream)), {"host": "b", "containers": []})
+        self.assertEqual(json.loads(next(stream)), {"trailer": True, "answered": ["a", "b"], "timed_out": ["c"],
+                                                   "missing": 1})
+        with self.assertRaises(StopIteration):
+            next(stream)
+        self.assertEqual(len(rabbitMQ_manager.status_responses), 0)
+
+    def test_all_hosts_answer(self):
+        """The stream ends as soon as all the live hosts answered, without waiting for the timeout"""
+        def agent(topic, message):
+            for name in ("a", "b", "c"):
+                reply("status_response", {"token": message, "host": name, "containers": {}})
+
+        broker.responder = agent
+        start = time.monotonic()
+        lines = [json.loads(line) for line in rabbitMQ_manager.stream_container_status()]
+        self.assertLess(time.monotonic() - start, rabbitMQ_manager.TIMEOUT)
+        self.assertEqual(lines[-1], {"trailer": True, "answered": ["a", "b", "c"], "timed_out": [], "missing": 0})
+
+    def test_unknown_hosts(self):
+        """Before the first heartbeat, the trailer tells how many of the expected hosts did not answer"""
+        rabbitMQ_manager.hosts.clear()
+        self.patch(rabbitMQ_manager, "HOSTS", 3)
+        self.patch(rabbitMQ_manager, "TIMEOUT", 0.1)
+
+        def agent(topic, message):
+            reply("status_response", {"token": message, "host": "a", "containers": {}})
+
+        broker.responder = agent
+        lines = [json.loads(line) for line in rabbitMQ_manager.stream_container_status()]
+        self.assertEqual(lines[-1], {"trailer": True, "answered": ["a"], "timed_out": [], "missing": 2})
+
+    def test_client_disconnects(self):
+        """When the client stops reading, the request is removed and the late responses are discarded"""
+        def agent(topic, message):
+            reply("status_response", {"token": message, "host": "a", "containers": {}})
+
+        broker.responder = agent
+        stream = rabbitMQ_manager.stream_container_status()
+        next(stream)
+        stream.close()
+        self.assertEqual(len(rabbitMQ_manager.status_responses), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import threading
+import time
+import unittest
+
+from swagger_server.controllers import container_controller
+from swagger_server.controllers.watch_hub import WatchHub
+from swagger_server.test.fake_broker import ManagerTestCase, rabbitMQ_manager
+
+
+def event(container: str, event_type: str = "running") -> dict:
+    return {"type": event_type, "host": container.split("-")[0], "container": container}
+
+
+class TestWatchHub(unittest.TestCase):
+    """WatchHub unit tests"""
+
+    def test_filters(self):
+        """Each event is only copied to the clients whose filters match it"""
+        hub = WatchHub()
+        everything = hub.subscribe()
+        host_a = hub.subscribe(hosts=["a"])
+        container = hub.subscribe(containers=["b-y"])
+        hub.publish([event("a-x"), event("b-y"), event("b-z")])
+        self.assertEqual([e["container"] for e in everything.get(0)], ["a-x", "b-y", "b-z"])
+        self.assertEqual([e["container"] for e in host_a.get(0)], ["a-x"])
+        self.assertEqual([e["container"] for e in container.get(0)], ["b-y"])
+        self.assertEqual(hub.stats(), {"watchers": 3, "published-events": 3})
+
+        hub.unsubscribe(host_a)
+        hub.publish([event("a-x")])
+        self.assertEqual(host_a.get(0), [])
+        self.assertEqual(hub.stats()["watchers"], 2)
+
+    def test_wakeup(self):
+        """A client waiting for events is woken up by the first one, or returns nothing after the timeout"""
+        hub = WatchHub()
+        subscription = hub.subscribe()
+        start = time.monotonic()
+        self.assertEqual(subscription.get(0.1), [])
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+        threading.Timer(0.05, hub.publish, args=([event("a-x")],)).start()
+        start = time.monotonic()
+        self.assertEqual(len(subscription.get(5)), 1)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_drop_oldest(self):
+        """When the buffer of a slow client is full, the oldest event is dropped and the client is told"""
+        hub = WatchHub(buffer_size=2)
+        subscription = hub.subscribe()
+        hub.publish([event("a-x"), event("a-y"), event("a-z")])
+        events = subscription.get(0)
+        self.assertEqual(events[0], {"type": "dropped", "host": None, "container": None, "count": 1})
+        self.assertEqual([e["container"] for e in events[1:]], ["a-y", "a-z"])
+        self.assertEqual(subscription.get(0), [])
+
+    def test_drop_same_container(self):
+        """When the buffer is full, a new event of a container replaces the oldest buffered one of that container"""
+        hub = WatchHub(buffer_size=2)
+        subscription = hub.subscribe()
+        hub.publish([event("a-x", "running"), event("a-y"), event("a-x", "restarted")])
+        events = subscription.get(0)
+        self.assertEqual(events[0]["count"], 1)
+        self.assertEqual([(e["container"], e["type"]) for e in events[1:]], [("a-y", "running"),
+                                                                            ("a-x", "restarted")])
+
+    def test_slow_client_does_not_block(self):
+        """A client that does not read does not slow down the others"""
+        hub = WatchHub(buffer_size=10)
+        slow = hub.subscribe()
+        fast = hub.subscribe()
+        for i in range(100):
+            hub.publish([event("a-" + str(i))])
+        self.assertEqual(len(fast.get(0)), 11)
+        events = slow.get(0)
+        self.assertEqual(events[0]["count"], 90)
+        self.assertEqual(events[-1]["container"], "a-99")
+
+
+class TestWatch(ManagerTestCase):
+    """container_events and watch endpoint unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.patch(rabbitMQ_manager, "watch_hub", WatchHub(buffer_size=4))
+        self.patch(container_controller, "WATCH_KEEPALIVE", 0.05)
+
+    def test_container_events(self):
+        """The state changes of the containers are found by comparing their status before and after a delta"""
+        old = {"a-x": {"running": True, "started_at": "1", "window_loss": 0.0},
+               "a-y": {"running": True, "started_at": "1", "packet_loss": 0.0},
+               "a-z": {"running": True}}
+        new = {"a-x": {"running": False, "started_at": "2", "restart_count": 1, "window_loss": 0.0},
+               "a-y": {"running": True, "started_at": "1", "packet_loss": 80.0},
+               "a-w": {"running": True}}
+        events = rabbitMQ_manager.container_events("a", old, new, 60.0)
+        self.assertEqual([(e["type"], e["container"]) for e in events],
+                         [("running", "a-x"), ("restarted", "a-x"), ("loss-above-threshold", "a-y"),
+                          ("added", "a-w"), ("removed", "a-z")])
+        self.assertEqual((events[0]["previous"], events[0]["current"]), (True, False))
+        self.assertEqual(events[1]["restart_count"], 1)
+        self.assertEqual((events[2]["loss"], events[2]["threshold"]), (80.0, 60.0))
+        self.assertEqual(rabbitMQ_manager.container_events("a", new, dict(new), 60.0), [])
+
+    def test_stream(self):
+        """The events of the deltas are sent to the watchers as Server-Sent Events"""
+        response = container_controller.watch_containers(host=["a"])
+        self.assertEqual(response.mimetype, "text/event-stream")
+        stream = iter(response.response)
+        self.assertEqual(next(stream), ": keepalive\n\n")
+
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"a-x": {"running": True}}})
+        rabbitMQ_manager.apply_status_delta({"host": "b", "seq": 1, "full": True, "removed": [],
+                                             "containers": {"b-x": {"running": True}}})
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 2, "full": False, "removed": [],
+                                             "containers": {"a-x": {"running": False}}})
+        self.assertEqual(next(stream).split("\n")[0], "event: running")
+        self.assertEqual(rabbitMQ_manager.watch_hub.stats()["watchers"], 1)
+        stream.close()
+        self.assertEqual(rabbitMQ_manager.watch_hub.stats()["watchers"], 0)
+
+    def test_stream_drops(self):
+        """A watcher that reads slowly is told how many events it missed"""
+        response = container_controller.watch_containers()
+        stream = iter(response.response)
+        self.assertEqual(next(stream), ": keepalive\n\n")
+        # the first checkpoint of a host is not reported as events, the containers added afterwards are
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 1, "full": True, "removed": [], "containers": {}})
+        rabbitMQ_manager.apply_status_delta({"host": "a", "seq": 2, "full": True, "removed": [],
+                                             "containers": {"a-" + str(i): {"running": True} for i in range(6)}})
+        first = next(stream).split("\n")
+        self.assertEqual(first[0], "event: dropped")
+        self.assertEqual(json.loads(first[1][len("data: "):])["count"], 2)
+        self.assertEqual(len([next(stream) for _ in range(4)]), 4)
+        stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()